@@ -1,47 +1,71 @@
 # api/routes.py - Corrected Version
 
-from fastapi import APIRouter, Depends, Query, HTTPException, Request
-from fastapi.encoders import jsonable_encoder # <--- ADDED: To ensure correct JSON encoding
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketState
 from sqlalchemy.orm import Session
 from typing import Optional, List
+import asyncio
 from datetime import datetime # <--- ADDED: Used by datetime.now()
 import uuid
 
 # --- Core Dependencies ---
-# Assuming 'core.db' contains the database connection logic and get_db function.
-from core.db import get_db
+# 'core.db' owns the single engine / connection pool and the session dependencies.
+from core.db import get_db, get_async_db
 
 # --- Service Imports ---
-from services.crypto_service import get_market_data, fetch_coinpaprika_data, fetch_coingecko_data
-from services.health_service import get_health_status 
-from services.stats_service import get_etl_summary
+from services.crypto_service import (
+    get_market_data, get_market_data_async, parse_symbols, fetch_coinpaprika_data, fetch_coingecko_data
+)
+from services.health_service import get_health_status, get_health_status_async
+from services.stats_service import get_etl_summary, get_etl_summary_async
+from services.history_service import get_price_history, get_price_history_async
+from services.quote_service import get_quotes, get_quotes_async, get_quote, get_quote_async
+from services.cache_service import cached_query, make_cache_key
+from services.notify_service import market_updates
+from services.http_cache import check_conditional, runs_token
+from services.export_service import (
+    EXPORT_FORMATS, PARQUET_AVAILABLE, build_export_query, iter_export, iter_export_async
+)
+from services.serialization import RawJSONResponse, dumps, loads, rows_to_json
+from core.config import settings
 
 # --- Schema Imports ---
-from schemas.normalized import PaginatedResponse
+from schemas.normalized import PaginatedResponse, MarketData
 from schemas.health import HealthResponse
 from schemas.stats import StatsResponse
+from schemas.history import HistoryResponse
+from schemas.quotes import QuotesResponse, ConsolidatedQuote
 from schemas.raw import CoinPaprikaResponse, CoinGeckoResponse
 
+# Field order of one /api/data row (MarketData)
+MARKET_DATA_FIELDS = tuple(MarketData.model_fields)
+
 # --- Router Initialization ---
 router = APIRouter(prefix="/api", tags=["Kasparro API"])
 
+# AsyncSession (asyncpg) when USE_ASYNC_DB is set, blocking psycopg2 Session otherwise
+db_session = get_async_db if settings.USE_ASYNC_DB else get_db
+
 # ==================================
 # 1. RAW DATA ENDPOINTS
 # ==================================
 
 @router.get("/coinpaprika", response_model=List[CoinPaprikaResponse], summary="Fetches raw CoinPaprika data (Debug)")
-def get_coinpaprika():
+async def get_coinpaprika():
     """
     Retrieves raw market data directly from the CoinPaprika source (simulated or actual).
+    Debug sample: first page only; the ETL fetches the full universe.
     """
-    return fetch_coinpaprika_data()
+    return await fetch_coinpaprika_data(max_pages=1)
 
 @router.get("/coingecko", response_model=List[CoinGeckoResponse], summary="Fetches raw CoinGecko data (Debug)")
-def get_coingecko():
+async def get_coingecko():
     """
     Retrieves raw market data directly from the CoinGecko source (simulated or actual).
+    Debug sample: first page only (one provider request); the ETL fetches the full universe.
     """
-    return fetch_coingecko_data()
+    return await fetch_coingecko_data(max_pages=1)
 
 # ==================================
 # 2. MANDATORY BACKEND ENDPOINTS
@@ -52,55 +76,88 @@ def get_coingecko():
     response_model=PaginatedResponse, 
     summary="Paginated and Filtered Normalized Market Data"
 )
-def read_data(
+async def read_data(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(db_session),
     limit: int = Query(10, ge=1, le=100, description="Number of records per page."),
     offset: int = Query(0, ge=0, description="Number of records to skip."),
-    symbol: Optional[str] = Query(None, description="Filter by asset symbol (e.g., BTC, ETH)")
+    symbol: Optional[str] = Query(None, description="Filter by asset symbol (e.g., BTC, ETH)"),
+    symbol_match: str = Query("exact", pattern="^(exact|prefix)$", description="Match 'symbol' exactly or as a prefix."),
+    symbols: Optional[str] = Query(None, description="Comma-separated list of exact symbols, e.g. BTC,ETH,SOL."),
+    cursor: Optional[str] = Query(None, description="Opaque 'next_cursor' from the previous page (keyset pagination)."),
+    count: str = Query("exact", pattern="^(exact|estimate|none)$", description="How to compute 'total_records'.")
 ):
     """
     Retrieves normalized cryptocurrency market data from the database.
-    Supports pagination and filtering by symbol. Returns request metadata.
+    Supports offset or cursor pagination and filtering by symbol. Returns request metadata.
     """
     start_time = datetime.now()
     request_id = str(uuid.uuid4())
+
+    # Unchanged since the client's copy (same data generation): 304 before any query runs
+    not_modified, cache_headers = await check_conditional(request, db, "api-data")
+    if not_modified:
+        return not_modified
     
     # 1. Fetch data from service layer
-    # NOTE: The definition of get_market_data in services/crypto_service.py MUST be fixed!
-    data_list, total_count = get_market_data(db, limit, offset, symbol)
+    # (Served from the response cache until the next ETL load or TTL expiry)
+    symbol_list = parse_symbols(symbols)
+
+    query_args = dict(
+        limit=limit, offset=offset, symbol=symbol, cursor=cursor, count_mode=count,
+        symbols=symbol_list, symbol_match=symbol_match
+    )
+
+    def to_page(rows, total, cursor_out):
+        # Cached as ready-to-send JSON bytes: rows are encoded once, straight from the DB rows
+        return rows_to_json(rows, MARKET_DATA_FIELDS), total, cursor_out
+
+    async def load_page_async():
+        return to_page(*await get_market_data_async(db, **query_args))
+
+    cache_key = make_cache_key(
+        "api-data", limit=limit, offset=offset, symbol=symbol and symbol.upper(),
+        symbol_match=symbol_match, symbols=symbol_list, cursor=cursor, count=count
+    )
+    data_json, total_count, next_cursor = await cached_query(
+        db, cache_key, lambda: to_page(*get_market_data(db, **query_args)), load_page_async
+    )
     
     end_time = datetime.now()
     api_latency_ms = int((end_time - start_time).total_seconds() * 1000)
 
     # 2. Construct the required response structure
-    response_content = {
-        "metadata": {
-            "request_id": request_id,
-            "api_latency_ms": api_latency_ms,
-            "total_records": total_count,
-            "limit": limit,
-            "offset": offset,
-            "filter_applied": {"symbol": symbol}
-        },
-        "data": data_list
+    metadata = {
+        "request_id": request_id,
+        "api_latency_ms": api_latency_ms,
+        "total_records": total_count,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+        "filter_applied": {"symbol": symbol, "symbol_match": symbol_match, "symbols": symbol_list or None}
     }
-    
-    # Use jsonable_encoder for safety when dealing with complex types like datetime
-    return jsonable_encoder(response_content)
+
+    # Only the per-request metadata is encoded here; the (cached) data array is spliced in as-is.
+    # 'response_model' documents the shape; the body bypasses the second validation pass.
+    return RawJSONResponse(
+        b'{"metadata":' + dumps(metadata) + b',"data":' + data_json + b'}', headers=cache_headers
+    )
 
 @router.get(
     "/health", 
     response_model=HealthResponse, 
     summary="System Health Check (DB Connectivity, ETL Status)"
 )
-def get_health(db: Session = Depends(get_db)):
+async def get_health(db: Session = Depends(db_session)):
     """
     Reports connectivity to the database and the last run status of the ETL pipeline
     based on the 'etl_checkpoints' table.
     """
     # This calls the service function that combines DB check and ETL status lookup
-    health_data = get_health_status(db)
+    health_data = await cached_query(
+        db, make_cache_key("health"), lambda: get_health_status(db), lambda: get_health_status_async(db),
+        ttl_seconds=settings.CACHE_HEALTH_TTL_SECONDS
+    )
     return health_data
 
 # ==================================
@@ -112,13 +169,18 @@ def get_health(db: Session = Depends(get_db)):
     response_model=List[StatsResponse], 
     summary="ETL Run Summaries"
 )
-def get_stats(db: Session = Depends(get_db)):
+async def get_stats(request: Request, response: Response, db: Session = Depends(db_session)):
     """
-    Exposes ETL summaries: records processed, duration, and last success/failure timestamps
-    for all data sources tracked in the checkpoint table.
+    Exposes ETL summaries: records processed, average duration, success rate, throughput and
+    last success/failure timestamps per source, from the 'etl_run_summaries' running totals.
     """
-    # This queries the database for ETL logs
-    return get_etl_summary(db)
+    not_modified, cache_headers = await check_conditional(request, db, "api-stats", include_runs=True)
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers)
+    return await cached_query(
+        db, make_cache_key("api-stats", runs=runs_token()), lambda: get_etl_summary(db), lambda: get_etl_summary_async(db)
+    )
 
 # ==================================
 # 4. Simple Status Endpoint
@@ -127,4 +189,195 @@ def get_stats(db: Session = Depends(get_db)):
 @router.get("/status", summary="Simple Service Status Check")
 def service_status():
     """Confirms the API application is running."""
-    return {"service": "Kasparro Backend", "status": "Running"}
\ No newline at end of file
+    return {"service": "Kasparro Backend", "status": "Running"}
+# ==================================
+# 5. PRICE HISTORY ENDPOINT
+# ==================================
+
+@router.get(
+    "/history/{symbol}",
+    response_model=HistoryResponse,
+    summary="OHLCV Price History from Precomputed Rollups"
+)
+async def read_history(
+    symbol: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_session),
+    start: Optional[datetime] = Query(None, description="Range start (ISO-8601). Defaults to end - 24h."),
+    end: Optional[datetime] = Query(None, description="Range end (ISO-8601). Defaults to now."),
+    source: Optional[str] = Query(None, description="Restrict to one source (coingecko, coinpaprika)."),
+    resolution: Optional[str] = Query(None, pattern="^(1m|1h|1d)$", description="Force a rollup; picked from the range by default.")
+):
+    """
+    Returns candles for the symbol from the 1m/1h/1d rollup that fits the requested range,
+    so months of data are served from a single index range scan.
+    """
+    not_modified, cache_headers = await check_conditional(request, db, "history")
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers)
+    cache_key = make_cache_key(
+        "history", symbol=symbol.upper(), start=start, end=end, source=source, resolution=resolution
+    )
+    return await cached_query(
+        db, cache_key,
+        lambda: get_price_history(db, symbol, start, end, source, resolution),
+        lambda: get_price_history_async(db, symbol, start, end, source, resolution)
+    )
+
+# ==================================
+# 6. CONSOLIDATED QUOTES ENDPOINTS
+# ==================================
+
+@router.get(
+    "/quotes",
+    response_model=QuotesResponse,
+    summary="Cross-Source Consolidated Quotes"
+)
+async def read_quotes(
+    request: Request,
+    response: Response,
+    db: Session = Depends(db_session),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    symbols: Optional[str] = Query(None, description="Comma-separated list of exact symbols, e.g. BTC,ETH,SOL.")
+):
+    """
+    One quote per symbol merged across all sources (volume-weighted price, largest market cap,
+    price divergence), precomputed by the ETL and ordered by market cap.
+    """
+    not_modified, cache_headers = await check_conditional(request, db, "quotes")
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers)
+    symbol_list = parse_symbols(symbols)
+    cache_key = make_cache_key("quotes", limit=limit, offset=offset, symbols=symbol_list)
+
+    def to_response(quotes):
+        return {"metadata": {"limit": limit, "offset": offset}, "data": quotes}
+
+    async def load_async():
+        return to_response(await get_quotes_async(db, limit, offset, symbol_list))
+
+    return await cached_query(
+        db, cache_key, lambda: to_response(get_quotes(db, limit, offset, symbol_list)), load_async
+    )
+
+@router.get(
+    "/quotes/{symbol}",
+    response_model=ConsolidatedQuote,
+    summary="Consolidated Quote for One Symbol"
+)
+async def read_quote(symbol: str, db: Session = Depends(db_session)):
+    quote = await cached_query(
+        db, make_cache_key("quote", symbol=symbol.upper()),
+        lambda: get_quote(db, symbol), lambda: get_quote_async(db, symbol)
+    )
+    if quote is None:
+        raise HTTPException(status_code=404, detail=f"No consolidated quote for '{symbol.upper()}'")
+    return quote
+
+# ==================================
+# 7. BULK EXPORT ENDPOINT
+# ==================================
+
+@router.get("/export", summary="Streams the Normalized Market Data Table (NDJSON / CSV / Parquet)")
+def export_data(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$", description="Output format."),
+    source: Optional[str] = Query(None, description="Restrict to one source (coingecko, coinpaprika)."),
+    symbols: Optional[str] = Query(None, description="Comma-separated list of exact symbols, e.g. BTC,ETH,SOL."),
+    updated_since: Optional[datetime] = Query(None, description="Only rows with last_updated_at at or after this time (ISO-8601).")
+):
+    """
+    The whole 'normalized_data' table (optionally filtered) in one response, read through a
+    server-side cursor and encoded EXPORT_BATCH_ROWS rows at a time, so memory stays constant
+    however large the table is. Not cached; rows are in no particular order.
+    """
+    if format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Parquet export needs the 'pyarrow' package on the server")
+
+    query = build_export_query(source, parse_symbols(symbols), updated_since)
+    # The body is produced after this handler returns, so the reader opens its own connection
+    # instead of using a request-scoped session.
+    body = iter_export_async(format, query) if settings.USE_ASYNC_DB else iter_export(format, query)
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        body, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="normalized_data.{extension}"'}
+    )
+
+# ==================================
+# 8. LIVE UPDATES (WebSocket / SSE)
+# ==================================
+
+@router.websocket("/ws/updates")
+async def ws_updates(websocket: WebSocket, symbols: Optional[str] = None):
+    """
+    Pushes {"type": "update", "data": [rows]} whenever an ETL load changes a subscribed symbol
+    (all symbols if 'symbols' is omitted). Sending {"symbols": ["BTC", "ETH"]} replaces the filter;
+    any other message is answered with {"type": "error"} and updates keep flowing.
+    """
+    await websocket.accept()
+    subscription = market_updates.subscribe(parse_symbols(symbols))
+
+    async def receive_filters():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            try:
+                requested = loads(message.get("text") or message.get("bytes") or b"")["symbols"]
+                if not isinstance(requested, list):
+                    raise TypeError
+            except (ValueError, TypeError, KeyError):
+                await websocket.send_bytes(dumps({"type": "error", "detail": 'expected {"symbols": [...]}'}))
+                continue
+            subscription.symbols = set(parse_symbols(",".join(map(str, requested))))
+
+    async def send_updates():
+        while True:
+            rows = await subscription.queue.get()
+            await websocket.send_bytes(dumps({"type": "update", "data": rows}))
+
+    tasks = [asyncio.create_task(receive_filters()), asyncio.create_task(send_updates())]
+    try:
+        # Whichever side stops first (normally the client disconnecting) ends the session
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not isinstance(task.exception(), (WebSocketDisconnect, ValueError, RuntimeError)):
+                task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        market_updates.unsubscribe(subscription)
+        # Never leave the client hanging on a session that no longer pushes
+        if websocket.client_state == websocket.application_state == WebSocketState.CONNECTED:
+            try:
+                await websocket.close(code=1011)
+            except RuntimeError:
+                pass
+
+
+@router.get("/stream/updates", summary="Server-Sent Events Stream of Market Updates")
+async def sse_updates(symbols: Optional[str] = Query(None, description="Comma-separated list of exact symbols, e.g. BTC,ETH,SOL.")):
+    """Same updates as /api/ws/updates as 'event: update' Server-Sent Events."""
+    subscription = market_updates.subscribe(parse_symbols(symbols))
+
+    async def events():
+        try:
+            yield b": connected\n\n"
+            while True:
+                try:
+                    rows = await asyncio.wait_for(subscription.queue.get(), settings.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"event: update\ndata: " + dumps(rows) + b"\n\n"
+        finally:
+            market_updates.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,146 @@
+"""
+End-to-end ETL benchmark: run_etl_pipeline() against the in-process provider stub
+(benchmarks/provider_stub.py) and the configured database.
+
+Run 1 is a cold load (every coin new); each later run advances the stub so only
+--change-fraction of the coins changed, which measures the incremental path (content-hash
+skips, small merges). Per run: wall time, rows fetched/loaded/skipped and the stage
+timings from PipelineStats.
+
+    python benchmarks/bench_etl.py --coins 20000 --latency-ms 50 --runs 3 --json etl.json
+    python benchmarks/bench_etl.py --rate-limit-fraction 0.05 --malformed-fraction 0.01
+
+With --provider-url the ETL goes over real HTTP to a running stub server instead
+(python benchmarks/provider_stub.py); between runs the server is advanced via POST /advance.
+
+Use a scratch database: the stub coins ('stub-coin-*') are written to normalized_data.
+"""
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+from typing import Dict
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import compare, write_results
+from benchmarks.provider_stub import StubProvider, SyntheticMarket, stub_client
+from core.config import settings
+from ingestion.etl_main import run_etl_pipeline
+from services.crypto_service import iter_coingecko_pages, iter_coinpaprika_pages
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    per_page = settings.COINGECKO_PER_PAGE
+    max_pages = math.ceil(args.coins / per_page) + 1
+
+    if args.provider_url:
+        # Real HTTP against 'python benchmarks/provider_stub.py' (its own --coins etc. apply)
+        base = args.provider_url.rstrip("/")
+        settings.COINGECKO_BASE_URL = f"{base}/api/v3"
+        settings.COINPAPRIKA_BASE_URL = f"{base}/v1"
+        client = httpx.AsyncClient(timeout=60)
+
+        async def advance():
+            await client.post(f"{base}/advance")
+
+        async def request_count():
+            return (await client.get(f"{base}/stats")).json()["requests"]
+    else:
+        market = SyntheticMarket(args.coins, args.change_fraction, args.malformed_fraction)
+        provider = StubProvider(
+            market, args.latency_ms, args.latency_jitter_ms, args.rate_limit_fraction, retry_after_seconds=args.retry_after
+        )
+        client = stub_client(provider)
+
+        async def advance():
+            market.advance()
+
+        async def request_count():
+            return provider.requests
+
+    runs = []
+    async with client:
+        sources = {
+            "coingecko": lambda: iter_coingecko_pages(client=client, per_page=per_page, max_pages=max_pages),
+            "coinpaprika": lambda: iter_coinpaprika_pages(client=client),
+        }
+        for number in range(1, args.runs + 1):
+            if number > 1:
+                await advance()
+            requests_before = await request_count()
+            started = time.perf_counter()
+            summary = await run_etl_pipeline(sources)
+            seconds = time.perf_counter() - started
+            if summary is None:
+                raise SystemExit("ETL run failed; see the log above")
+
+            fetched = sum(summary["rows_fetched"].values())
+            run = {
+                "kind": "cold" if number == 1 else "incremental",
+                "wall_seconds": round(seconds, 3),
+                "rows_fetched": fetched,
+                "rows_loaded": sum(summary["rows_loaded"].values()),
+                "rows_skipped": sum(summary["rows_skipped"].values()),
+                "fetched_rows_per_second": round(fetched / seconds, 1) if seconds else None,
+                "requests": await request_count() - requests_before,
+                "stages": summary["stages"],
+                "failed_sources": summary["failed_sources"],
+            }
+            runs.append(run)
+            print(
+                f"run {number} ({run['kind']:<11}) {run['wall_seconds']:>8.3f}s  fetched {run['rows_fetched']:>9,}  "
+                f"loaded {run['rows_loaded']:>9,}  skipped {run['rows_skipped']:>9,}  "
+                f"({run['fetched_rows_per_second']:,.0f} rows/s)"
+            )
+
+    incremental = [run["wall_seconds"] for run in runs[1:]]
+    return {
+        "config": {
+            "provider": args.provider_url or "in-process",
+            "coins_per_source": args.coins,
+            "latency_ms": args.latency_ms,
+            "latency_jitter_ms": args.latency_jitter_ms,
+            "change_fraction": args.change_fraction,
+            "malformed_fraction": args.malformed_fraction,
+            "rate_limit_fraction": args.rate_limit_fraction,
+            "runs": args.runs,
+            "load_batch_size": settings.ETL_LOAD_BATCH_SIZE,
+            "load_workers": settings.ETL_LOAD_WORKERS,
+            "fetch_concurrency": settings.FETCH_CONCURRENCY,
+        },
+        "cold_wall_seconds": runs[0]["wall_seconds"],
+        "incremental_wall_seconds": round(sum(incremental) / len(incremental), 3) if incremental else None,
+        "runs": {str(number): run for number, run in enumerate(runs, start=1)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=10_000, help="Coins per source.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub latency per request.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Extra random latency, 0 .. N ms.")
+    parser.add_argument("--change-fraction", type=float, default=0.05, help="Coins that change between runs.")
+    parser.add_argument("--malformed-fraction", type=float, default=0.0, help="Share of malformed stub records.")
+    parser.add_argument("--rate-limit-fraction", type=float, default=0.0, help="Share of stub requests answered with 429.")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After seconds sent with the stub's 429s.")
+    parser.add_argument("--provider-url", help="Running stub server (provider_stub.py) to use instead of the in-process one.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", help="Also write the results to this file.")
+    parser.add_argument("--compare", help="Previous --json file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression before --compare fails.")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    if args.json:
+        write_results(args.json, "bench_etl", results)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
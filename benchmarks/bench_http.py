@@ -0,0 +1,143 @@
+"""
+HTTP load test for the read endpoints: each endpoint is driven in turn by --concurrency
+workers for --duration seconds (after a warm-up), reporting requests/s and p50/p95/p99.
+
+Endpoint templates may use {offset} (random multiple of --limit up to --max-offset) and
+{symbol} (a random seeded 'B<n>' symbol, see benchmarks/seed_data.py), so runs mix
+cache hits and misses the way dashboards paging through the table do.
+
+    python benchmarks/seed_data.py --rows 1000000
+    uvicorn main:app --workers 4 &
+    python benchmarks/bench_http.py --concurrency 64 --duration 30 --json http.json
+
+Without a running server, --in-process drives the app through httpx's ASGI transport
+(measures the app alone; no network, no uvicorn).
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.common import compare, percentiles, write_results
+
+DEFAULT_ENDPOINTS = [
+    "/market-data?limit={limit}&offset={offset}",
+    "/api/data?limit={limit}&offset={offset}",
+    "/api/data?limit={limit}&symbols={symbol}",
+    "/health",
+]
+
+
+def render(template: str, args: argparse.Namespace, rng: random.Random) -> str:
+    return template.format(
+        limit=args.limit,
+        offset=rng.randrange(0, args.max_offset + 1, args.limit) if args.max_offset else 0,
+        symbol=f"B{rng.randrange(args.symbols)}",
+    )
+
+
+async def drive(client: httpx.AsyncClient, template: str, args: argparse.Namespace, seconds: float) -> Dict:
+    """Runs --concurrency workers against one endpoint for 'seconds'; returns its stats."""
+    latencies: List[float] = []
+    statuses = Counter()
+    errors = Counter()
+    deadline = time.perf_counter() + seconds
+
+    async def worker(worker_id: int):
+        rng = random.Random(worker_id)
+        while time.perf_counter() < deadline:
+            path = render(template, args, rng)
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                await response.aread()
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    failed = sum(count for status, count in statuses.items() if status >= 400) + sum(errors.values())
+    return {
+        "requests": len(latencies),
+        "failed": failed,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        **percentiles(latencies),
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+        "errors": dict(errors),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.in_process:
+        from main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", limits=limits)
+    else:
+        client = httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout)
+
+    endpoints = {}
+    async with client:
+        for template in args.endpoints:
+            if args.warmup:
+                await drive(client, template, args, args.warmup)
+            stats = await drive(client, template, args, args.duration)
+            endpoints[template] = stats
+            print(
+                f"{template:<48} {stats['rps']:>9,.1f} req/s  p50 {stats['p50_ms'] or 0:>8.2f}  "
+                f"p95 {stats['p95_ms'] or 0:>8.2f}  p99 {stats['p99_ms'] or 0:>8.2f} ms  "
+                f"failed {stats['failed']}"
+            )
+    return {
+        "config": {
+            "target": "in-process" if args.in_process else args.base_url,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "limit": args.limit,
+            "max_offset": args.max_offset,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--in-process", action="store_true", help="Call the ASGI app directly instead of --base-url.")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS, help="Path templates to drive, in order.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per endpoint.")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds per endpoint first.")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--max-offset", type=int, default=1000)
+    parser.add_argument("--symbols", type=int, default=50_000, help="Symbol range of the seeded data.")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", help="Also write the results to this file.")
+    parser.add_argument("--compare", help="Previous --json file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression before --compare fails.")
+    args = parser.parse_args(argv)
+
+    print(f"Concurrency {args.concurrency}, {args.duration}s per endpoint")
+    results = asyncio.run(run(args))
+    if args.json:
+        write_results(args.json, "bench_http", results)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
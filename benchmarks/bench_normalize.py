@@ -0,0 +1,140 @@
+"""
+Transform-stage benchmark: row-at-a-time normalization (one dict per coin) vs the
+columnar path the ETL uses (services/columnar_service.ColumnBatch).
+
+Each path is timed on synthetic provider pages, both for normalization alone and for
+everything the ETL does before COPY: normalize -> watermark -> content hashes and the
+unchanged-row check -> COPY CSV buffer. The per-dict path is the pre-columnar pipeline.
+
+    python benchmarks/bench_normalize.py --rows 100000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import write_results
+from services.columnar_service import _NUMPY_AVAILABLE
+from services.crypto_service import (
+    coingecko_columns, coinpaprika_columns, normalize_coingecko_page, normalize_coinpaprika_page
+)
+from services.database_service import (
+    NORMALIZED_COLUMNS, _csv_buffer, content_hash, content_hashes, parse_timestamp
+)
+
+# Stored hashes never match in a first load; the lookup cost is what is measured
+KNOWN_HASHES = {}
+
+
+def coingecko_payload(rows: int) -> list:
+    return [
+        {
+            "id": f"coin-{i}",
+            "symbol": f"c{i % 100000}",
+            "name": f"Coin {i}",
+            "current_price": random.uniform(0.0001, 50000) if i % 50 else None,
+            "market_cap": random.randint(0, 10 ** 12),
+            "total_volume": random.uniform(0, 10 ** 9),
+            "price_change_percentage_24h": random.uniform(-20, 20) if i % 7 else None,
+            "last_updated": "2024-05-01T12:00:00.000Z",
+        }
+        for i in range(rows)
+    ]
+
+
+def coinpaprika_payload(rows: int) -> list:
+    return [
+        {
+            "id": f"c{i}-coin-{i}",
+            "symbol": f"C{i % 100000}",
+            "name": f"Coin {i}",
+            "quotes": {"USD": {
+                "price": random.uniform(0.0001, 50000),
+                "market_cap": random.randint(0, 10 ** 12),
+                "volume_24h": random.uniform(0, 10 ** 9),
+                "percent_change_24h": random.uniform(-20, 20),
+            }},
+            "last_updated": "2024-05-01T12:00:00Z",
+        }
+        for i in range(rows)
+    ]
+
+
+def row_pipeline(normalize, page):
+    watermark = None
+    rows = []
+    for row in normalize(page):
+        updated_at = parse_timestamp(row.get("last_updated_at"))
+        if updated_at and (watermark is None or updated_at > watermark):
+            watermark = updated_at
+        row["content_hash"] = content_hash(row)
+        if KNOWN_HASHES.get((row["source_record_id"], row["source_name"])) != row["content_hash"]:
+            rows.append(row)
+    return _csv_buffer(rows, NORMALIZED_COLUMNS)
+
+
+def columnar_pipeline(normalize, page):
+    batch = normalize(page)
+    max(filter(None, map(parse_timestamp, batch.column("last_updated_at"))), default=None)
+    hashes = batch.columns["content_hash"] = content_hashes(batch)
+    keep = [
+        i for i, key in enumerate(zip(batch.column("source_record_id"), batch.column("source_name")))
+        if KNOWN_HASHES.get(key) != hashes[i]
+    ]
+    return _csv_buffer(batch.take(keep), NORMALIZED_COLUMNS)
+
+
+def best_rate(func, pages, rows: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    random.seed(42)
+    sources = {
+        "coingecko": (coingecko_payload, normalize_coingecko_page, coingecko_columns),
+        "coinpaprika": (coinpaprika_payload, normalize_coinpaprika_page, coinpaprika_columns),
+    }
+    results = {"rows": args.rows, "page_size": args.page_size, "numpy": _NUMPY_AVAILABLE, "sources": {}}
+    for source_name, (payload, per_row, columnar) in sources.items():
+        data = payload(args.rows)
+        pages = [data[i:i + args.page_size] for i in range(0, len(data), args.page_size)]
+        rates = {
+            "normalize_rows_per_s": best_rate(per_row, pages, args.rows, args.repeat),
+            "normalize_columnar_per_s": best_rate(columnar, pages, args.rows, args.repeat),
+            "to_copy_rows_per_s": best_rate(lambda page: row_pipeline(per_row, page), pages, args.rows, args.repeat),
+            "to_copy_columnar_per_s": best_rate(lambda page: columnar_pipeline(columnar, page), pages, args.rows, args.repeat),
+        }
+        results["sources"][source_name] = {key: round(value) for key, value in rates.items()}
+
+    print(f"{args.rows} rows, pages of {args.page_size}, numpy={'yes' if _NUMPY_AVAILABLE else 'no'} (best of {args.repeat})")
+    print(f"{'source':<12} {'stage':<22} {'per-dict rows/s':>16} {'columnar rows/s':>16} {'speedup':>8}")
+    for source_name, rates in results["sources"].items():
+        for stage, row_key, columnar_key in (
+            ("normalize", "normalize_rows_per_s", "normalize_columnar_per_s"),
+            ("normalize+hash+csv", "to_copy_rows_per_s", "to_copy_columnar_per_s"),
+        ):
+            speedup = rates[columnar_key] / rates[row_key]
+            print(f"{source_name:<12} {stage:<22} {rates[row_key]:>16,} {rates[columnar_key]:>16,} {speedup:>7.2f}x")
+
+    if args.json:
+        write_results(args.json, "bench_normalize", results)
+
+
+if __name__ == "__main__":
+    main()
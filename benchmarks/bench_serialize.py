@@ -0,0 +1,111 @@
+"""
+Response-encoding microbenchmark for /api/data at limit=100: the previous path
+(pydantic model per row -> jsonable_encoder -> response_model validation -> JSONResponse)
+vs the direct rows -> JSON bytes path (services/serialization.py).
+
+Both are timed on a cache miss (rows from the DB) and a cache hit (page already cached),
+reporting p50/p99 latency per response.
+
+    python benchmarks/bench_serialize.py --iterations 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.routes import MARKET_DATA_FIELDS
+from models.etl_models import NormalizedMarketData
+from schemas.normalized import MarketData, PaginatedResponse
+from services.serialization import ORJSON_AVAILABLE, RawJSONResponse, dumps, rows_to_json
+
+
+def make_rows(limit: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        NormalizedMarketData(
+            source_record_id=f"coin-{i}", source_name="coingecko", symbol=f"C{i}", name=f"Coin {i}",
+            current_price_usd=1234.5678 + i, market_cap_usd=10 ** 9 - i, volume_24h_usd=None if i % 5 else 42.0,
+            percent_change_24h=-1.25, last_updated_at=now,
+        )
+        for i in range(limit)
+    ]
+
+
+def metadata(limit: int) -> dict:
+    return {
+        "request_id": str(uuid.uuid4()), "api_latency_ms": 1, "total_records": 20000, "limit": limit,
+        "offset": 0, "next_cursor": "WzEwMDAuMCwgImNvaW4iLCAiY29pbmdlY2tvIl0",
+        "filter_applied": {"symbol": None, "symbol_match": "exact", "symbols": None},
+    }
+
+
+def previous_response(page: list, limit: int) -> bytes:
+    # Route: jsonable_encoder; FastAPI: response_model validation + JSON dump; JSONResponse: json.dumps
+    content = jsonable_encoder({"metadata": metadata(limit), "data": page})
+    validated = PaginatedResponse.model_validate(content).model_dump(mode="json")
+    return JSONResponse(validated).body
+
+
+def direct_response(data_json: bytes, limit: int) -> bytes:
+    return RawJSONResponse(b'{"metadata":' + dumps(metadata(limit)) + b',"data":' + data_json + b'}').body
+
+
+def percentiles(func, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 4),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.limit)
+    cached_models = [MarketData.model_validate(row) for row in rows]
+    cached_bytes = rows_to_json(rows, MARKET_DATA_FIELDS)
+    assert json.loads(previous_response(cached_models, args.limit))["data"] == json.loads(cached_bytes)
+
+    cases = {
+        "previous_miss": lambda: previous_response([MarketData.model_validate(row) for row in rows], args.limit),
+        "direct_miss": lambda: direct_response(rows_to_json(rows, MARKET_DATA_FIELDS), args.limit),
+        "previous_hit": lambda: previous_response(cached_models, args.limit),
+        "direct_hit": lambda: direct_response(cached_bytes, args.limit),
+    }
+    results = {"limit": args.limit, "iterations": args.iterations, "orjson": ORJSON_AVAILABLE}
+    results.update({name: percentiles(func, args.iterations) for name, func in cases.items()})
+
+    print(f"/api/data encoding, limit={args.limit}, orjson={'yes' if ORJSON_AVAILABLE else 'no'}, {args.iterations} iterations")
+    print(f"{'case':<10} {'previous p50/p99 ms':>22} {'direct p50/p99 ms':>20}")
+    for case in ("miss", "hit"):
+        previous, direct = results[f"previous_{case}"], results[f"direct_{case}"]
+        print(
+            f"{case:<10} {previous['p50_ms']:>10.3f} / {previous['p99_ms']:<9.3f}"
+            f" {direct['p50_ms']:>8.3f} / {direct['p99_ms']:<9.3f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Helpers shared by the benchmark scripts: latency percentiles, the environment block
+stored with every result file, and comparison against a previous result file.
+
+Result files are plain JSON ({"benchmark", "environment", "results"}), so a run on a
+branch can be checked against one from main:
+
+    python benchmarks/bench_http.py --json after.json --compare before.json
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Metric name suffixes and which direction is an improvement
+LOWER_IS_BETTER = ("_ms", "seconds")
+HIGHER_IS_BETTER = ("rps", "per_second")
+
+
+def percentiles(samples_ms: Iterable[float]) -> Dict[str, Optional[float]]:
+    """p50 / p95 / p99 / max (nearest rank) and mean of latency samples in milliseconds."""
+    samples = sorted(samples_ms)
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None, "mean_ms": None}
+
+    def rank(p: float) -> float:
+        return round(samples[max(math.ceil(p * len(samples)) - 1, 0)], 3)
+
+    return {
+        "p50_ms": rank(0.50),
+        "p95_ms": rank(0.95),
+        "p99_ms": rank(0.99),
+        "max_ms": round(samples[-1], 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+    }
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: str, benchmark: str, results: Dict) -> None:
+    with open(path, "w") as file:
+        json.dump({"benchmark": benchmark, "environment": environment(), "results": results}, file, indent=2, default=str)
+    print(f"Results written to {path}")
+
+
+def _flatten(value, prefix: str = "") -> Dict[str, float]:
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def compare(results: Dict, baseline_path: str, tolerance: float = 0.10) -> List[str]:
+    """
+    Prints the change of every latency / throughput metric against a previous result file
+    and returns the metrics that got worse by more than 'tolerance' (10% by default).
+    """
+    with open(baseline_path) as file:
+        baseline = _flatten(json.load(file).get("results", {}))
+    current = _flatten(results)
+
+    regressions = []
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for name, value in current.items():
+        if name.startswith("config."):
+            continue
+        if name.endswith(LOWER_IS_BETTER):
+            higher_is_better = False
+        elif name.endswith(HIGHER_IS_BETTER):
+            higher_is_better = True
+        else:
+            continue
+        before = baseline.get(name)
+        if not before:
+            continue
+        change = (value - before) / before
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        print(f"  {name:<55} {before:>12.3f} -> {value:>12.3f} ({change:+.1%}){flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
@@ -0,0 +1,315 @@
+"""
+Deterministic stand-in for the CoinGecko /coins/markets and CoinPaprika /v1/tickers APIs,
+for running and benchmarking the ETL offline.
+
+Coin n is computed on demand from its index, so markets of any size cost no memory.
+Every advance() starts a new "version" in which about --change-fraction of the coins
+report a new price and last_updated; the rest are byte-for-byte unchanged, like
+consecutive polls of the real APIs. Failure injection: per-request latency (+ jitter),
+429s with Retry-After (a random share of requests and/or a requests-per-second cap),
+503s with Retry-After (a random share of requests) and a share of malformed records
+(missing ids, bad numbers and timestamps, odd types).
+
+In-process, mount it with httpx.MockTransport (stub_client()). As a server:
+
+    python benchmarks/provider_stub.py --port 9000 --coins 50000 --latency-ms 80 --rate-limit-fraction 0.02
+    COINGECKO_BASE_URL=http://127.0.0.1:9000/api/v3 COINPAPRIKA_BASE_URL=http://127.0.0.1:9000/v1 \\
+        python ingestion/etl_main.py
+
+POST /advance moves the market to the next version; GET /stats returns request counters.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from services.serialization import dumps
+
+EPOCH = datetime(2024, 5, 1, tzinfo=timezone.utc)
+# CoinGecko caps per_page at 250 whatever the client asks for
+MAX_PER_PAGE = 250
+
+# Ways a record can be broken; the ETL must drop or repair each without failing the page
+MALFORMATIONS = (
+    "missing_id",         # no 'id' -> row dropped
+    "null_symbol",        # symbol null -> row dropped
+    "long_symbol",        # longer than the symbol column -> row dropped
+    "numeric_symbol",     # number instead of text
+    "string_price",       # "n/a" as the price -> 0
+    "null_market_cap",    # null market cap -> 0
+    "bad_timestamp",      # unparsable last_updated -> NULL
+)
+
+
+class SyntheticMarket:
+    def __init__(self, coins: int, change_fraction: float = 0.05, malformed_fraction: float = 0.0):
+        self.coins = coins
+        # Coin n changes in version v when (n + v) % period == 0
+        self.period = max(int(round(1 / change_fraction)), 1) if change_fraction > 0 else 0
+        # Every malformed_period-th coin is broken, cycling through MALFORMATIONS
+        self.malformed_period = max(int(round(1 / malformed_fraction)), 1) if malformed_fraction > 0 else 0
+        self.version = 0
+
+    def advance(self) -> None:
+        self.version += 1
+
+    def _last_change(self, n: int) -> int:
+        if not self.period or not self.version:
+            return 0
+        return max(self.version - (n + self.version) % self.period, 0)
+
+    def malformation(self, n: int) -> Optional[str]:
+        if not self.malformed_period or n % self.malformed_period != self.malformed_period - 1:
+            return None
+        return MALFORMATIONS[(n // self.malformed_period) % len(MALFORMATIONS)]
+
+    def _values(self, n: int) -> Tuple[float, float, float, float, str]:
+        changed = self._last_change(n)
+        # Market cap falls with n, so index order is market_cap_desc order
+        market_cap = 1e12 / (n + 1)
+        price = round((1000.0 / math.sqrt(n + 1)) * (1 + 0.001 * changed), 8)
+        volume = market_cap / 20
+        change_24h = round(((n * 7919) % 4000) / 100 - 20, 2)
+        updated = (EPOCH + timedelta(minutes=changed)).isoformat().replace("+00:00", ".000Z")
+        return price, market_cap, volume, change_24h, updated
+
+    def _fields(self, n: int, symbol: str) -> Dict:
+        """Common fields with this coin's malformation (if any) applied."""
+        price, market_cap, volume, change_24h, updated = self._values(n)
+        fields = {
+            "id": f"stub-coin-{n}", "symbol": symbol, "name": f"Stub Coin {n}", "price": price,
+            "market_cap": market_cap, "volume": volume, "change_24h": change_24h, "updated": updated,
+        }
+        kind = self.malformation(n)
+        if kind == "missing_id":
+            fields["id"] = None
+        elif kind == "null_symbol":
+            fields["symbol"] = None
+        elif kind == "long_symbol":
+            fields["symbol"] = symbol * 8
+        elif kind == "numeric_symbol":
+            fields["symbol"] = n
+        elif kind == "string_price":
+            fields["price"] = "n/a"
+        elif kind == "null_market_cap":
+            fields["market_cap"] = None
+        elif kind == "bad_timestamp":
+            fields["updated"] = "yesterday"
+        return fields
+
+    def coingecko(self, n: int) -> Dict:
+        fields = self._fields(n, f"s{n}")
+        coin = {
+            "id": fields["id"],
+            "symbol": fields["symbol"],
+            "name": fields["name"],
+            "current_price": fields["price"],
+            "market_cap": fields["market_cap"],
+            "total_volume": fields["volume"],
+            "price_change_percentage_24h": fields["change_24h"],
+            "last_updated": fields["updated"],
+        }
+        if coin["id"] is None:
+            del coin["id"]
+        return coin
+
+    def coinpaprika(self, n: int) -> Dict:
+        fields = self._fields(n, f"S{n}")
+        coin = {
+            "id": f"s{n}-{fields['id']}" if fields["id"] else None,
+            "symbol": fields["symbol"],
+            "name": fields["name"],
+            "quotes": {"USD": {
+                "price": fields["price"],
+                "market_cap": fields["market_cap"],
+                "volume_24h": fields["volume"],
+                "percent_change_24h": fields["change_24h"],
+            }},
+            "last_updated": fields["updated"],
+        }
+        if coin["id"] is None:
+            del coin["id"]
+        return coin
+
+    def coingecko_page(self, page: int, per_page: int) -> List[Dict]:
+        start = (page - 1) * per_page
+        return [self.coingecko(n) for n in range(max(start, 0), min(start + per_page, self.coins))]
+
+    def coinpaprika_tickers(self) -> List[Dict]:
+        return [self.coinpaprika(n) for n in range(self.coins)]
+
+
+class StubProvider:
+    """
+    Serves a SyntheticMarket: respond() is shared by the in-process httpx handler and the
+    HTTP server. Encoded bodies are cached per version, so a benchmark times the ETL (and
+    the injected latency), not the stub's own JSON encoding.
+    """
+
+    def __init__(
+        self,
+        market: SyntheticMarket,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        rate_limit_fraction: float = 0.0,
+        max_rps: Optional[float] = None,
+        retry_after_seconds: float = 1.0,
+        seed: int = 42,
+        unavailable_fraction: float = 0.0,
+    ):
+        self.market = market
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.rate_limit_fraction = rate_limit_fraction
+        self.max_rps = max_rps
+        self.retry_after_seconds = retry_after_seconds
+        self.unavailable_fraction = unavailable_fraction
+        self.requests = 0
+        self.responses = Counter()
+        self._rng = random.Random(seed)
+        self._bodies: Dict[Tuple, bytes] = {}
+        # Token bucket for max_rps (burst of one second's worth)
+        self._tokens = max_rps or 0.0
+        self._refilled_at = time.monotonic()
+
+    def body(self, path: str, params: Dict[str, str]) -> Optional[bytes]:
+        if path.endswith("/coins/markets"):
+            per_page = min(max(int(params.get("per_page", 100)), 1), MAX_PER_PAGE)
+            key = (self.market.version, "markets", int(params.get("page", 1)), per_page)
+            if key not in self._bodies:
+                self._bodies[key] = dumps(self.market.coingecko_page(key[2], key[3]))
+        elif path.endswith("/tickers"):
+            key = (self.market.version, "tickers")
+            if key not in self._bodies:
+                self._bodies[key] = dumps(self.market.coinpaprika_tickers())
+        else:
+            return None
+        return self._bodies[key]
+
+    def _rate_limited(self) -> bool:
+        if self.max_rps:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._refilled_at) * self.max_rps, self.max_rps)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+        return self.rate_limit_fraction > 0 and self._rng.random() < self.rate_limit_fraction
+
+    async def respond(self, path: str, params: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        self.requests += 1
+        delay = self.latency_ms + (self._rng.uniform(0, self.latency_jitter_ms) if self.latency_jitter_ms else 0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if self._rate_limited():
+            status, headers, body = 429, {"Retry-After": f"{self.retry_after_seconds:g}"}, b'{"error":"rate limited"}'
+        elif self.unavailable_fraction > 0 and self._rng.random() < self.unavailable_fraction:
+            status, headers, body = 503, {"Retry-After": f"{self.retry_after_seconds:g}"}, b'{"error":"unavailable"}'
+        else:
+            try:
+                body = self.body(path, params)
+            except ValueError:
+                body, status = b'{"error":"invalid parameters"}', 400
+            else:
+                status = 200 if body is not None else 404
+                body = body if body is not None else b'{"error":"not found"}'
+            headers = {}
+        self.responses[status] += 1
+        return status, {"Content-Type": "application/json", **headers}, body
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        status, headers, body = await self.respond(request.url.path, dict(request.url.params))
+        return httpx.Response(status, content=body, headers=headers)
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.market.version,
+            "coins": self.market.coins,
+            "requests": self.requests,
+            "responses": {str(status): count for status, count in sorted(self.responses.items())},
+        }
+
+
+def stub_client(provider: StubProvider) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(provider.handle))
+
+
+def create_app(provider: StubProvider):
+    """ASGI app serving 'provider' under the real APIs' paths (any prefix ending in them)."""
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    async def stats(request: Request):
+        return JSONResponse(provider.stats())
+
+    async def advance(request: Request):
+        provider.market.advance()
+        return JSONResponse(provider.stats())
+
+    async def api(request: Request):
+        status, headers, body = await provider.respond(request.url.path, dict(request.query_params))
+        return Response(body, status_code=status, headers=headers)
+
+    return Starlette(routes=[
+        Route("/stats", stats),
+        Route("/advance", advance, methods=["POST"]),
+        Route("/{path:path}", api),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--coins", type=int, default=10_000, help="Coins per source.")
+    parser.add_argument("--change-fraction", type=float, default=0.05, help="Coins that change per version.")
+    parser.add_argument("--advance-seconds", type=float, default=0, help="Advance the market every N seconds (0 = only on POST /advance).")
+    parser.add_argument("--malformed-fraction", type=float, default=0.0, help="Share of malformed records.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-fraction", type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument("--max-rps", type=float, help="Answer 429 above this many requests per second.")
+    parser.add_argument("--unavailable-fraction", type=float, default=0.0, help="Share of requests answered with 503.")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s and 503s.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    provider = StubProvider(
+        SyntheticMarket(args.coins, args.change_fraction, args.malformed_fraction),
+        latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms,
+        rate_limit_fraction=args.rate_limit_fraction, max_rps=args.max_rps,
+        retry_after_seconds=args.retry_after, seed=args.seed, unavailable_fraction=args.unavailable_fraction,
+    )
+    app = create_app(provider)
+
+    if args.advance_seconds > 0:
+        async def advance_periodically():
+            while True:
+                await asyncio.sleep(args.advance_seconds)
+                provider.market.advance()
+
+        app.add_event_handler("startup", lambda: asyncio.get_running_loop().create_task(advance_periodically()))
+
+    print(f"Stub provider: {args.coins:,} coins per source on http://{args.host}:{args.port}")
+    print(f"  COINGECKO_BASE_URL=http://{args.host}:{args.port}/api/v3")
+    print(f"  COINPAPRIKA_BASE_URL=http://{args.host}:{args.port}/v1")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Seeds 'normalized_data' with synthetic coins for the API benchmarks (10k .. 10M rows).
+
+Rows are generated and loaded in chunks (COPY + merge on PostgreSQL, one commit per
+chunk), so memory stays flat at any volume. Keys are deterministic ('bench-<n>'):
+re-running with the same --rows updates the rows in place instead of adding new ones.
+
+    python benchmarks/seed_data.py --rows 1000000
+    python benchmarks/seed_data.py --rows 10000000 --chunk 100000 --quotes
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, text
+
+from benchmarks.common import write_results
+from models.etl_models import NormalizedMarketData
+from services.columnar_service import ColumnBatch
+from services.database_service import (
+    NORMALIZED_COLUMNS, NORMALIZED_KEY_COLUMNS, NORMALIZED_UPDATE_COLUMNS, SessionLocal,
+    _insert_upsert, commit_new_generation, copy_merge, ensure_schema, refresh_consolidated_quotes
+)
+
+SOURCES = ("coingecko", "coinpaprika")
+
+
+def make_batch(start: int, size: int, symbols: int, rng: random.Random) -> ColumnBatch:
+    """Rows start .. start+size-1; each symbol is shared by rows/symbols coins across both sources."""
+    now = datetime.now(timezone.utc)
+    ids = range(start, start + size)
+    return ColumnBatch({
+        "source_record_id": [f"bench-{i}" for i in ids],
+        "source_name": [SOURCES[i % len(SOURCES)] for i in ids],
+        "symbol": [f"B{i % symbols}" for i in ids],
+        "name": [f"Bench Coin {i}" for i in ids],
+        "current_price_usd": [rng.uniform(0.0001, 50000) for _ in ids],
+        "market_cap_usd": [float(rng.randint(0, 10 ** 12)) for _ in ids],
+        "volume_24h_usd": [rng.uniform(0, 10 ** 9) if i % 10 else None for i in ids],
+        "percent_change_24h": [rng.uniform(-20, 20) if i % 7 else None for i in ids],
+        "last_updated_at": [now - timedelta(seconds=rng.randint(0, 3600)) for _ in ids],
+        "content_hash": [None] * size,
+    }, size)
+
+
+def seed(rows: int, chunk: int, symbols: int, truncate: bool, quotes: bool, seed_value: int) -> dict:
+    ensure_schema()
+    rng = random.Random(seed_value)
+    db = SessionLocal()
+    started = time.perf_counter()
+    written = 0
+    try:
+        is_postgres = db.get_bind().dialect.driver == "psycopg2"
+        if truncate:
+            db.execute(delete(NormalizedMarketData).where(NormalizedMarketData.source_record_id.like("bench-%")))
+            db.commit()
+
+        for start in range(0, rows, chunk):
+            batch = make_batch(start, min(chunk, rows - start), symbols, rng)
+            if is_postgres:
+                written += copy_merge(
+                    db, NormalizedMarketData.__table__, batch, NORMALIZED_COLUMNS,
+                    NORMALIZED_KEY_COLUMNS, NORMALIZED_UPDATE_COLUMNS, chunk,
+                )
+            else:
+                written += _insert_upsert(db, batch.to_rows(), chunk)
+            db.commit()
+            done = start + len(batch)
+            elapsed = time.perf_counter() - started
+            print(f"\r{done:>12,} / {rows:,} rows ({done / elapsed:,.0f} rows/s)", end="", flush=True)
+        print()
+        load_seconds = time.perf_counter() - started
+
+        if quotes:
+            refresh_consolidated_quotes(db)
+        if is_postgres:
+            # Fresh statistics, so the planner sees the new volume right away
+            db.execute(text("ANALYZE normalized_data"))
+            # New data generation: API caches (and ETags) from before the seed are dropped
+            commit_new_generation(db)
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+    return {
+        "rows": rows,
+        "rows_written": written,
+        "chunk": chunk,
+        "symbols": symbols,
+        "load_seconds": round(load_seconds, 3),
+        "rows_per_second": round(rows / load_seconds, 1) if load_seconds else None,
+        "total_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--chunk", type=int, default=50_000, help="Rows generated, loaded and committed at a time.")
+    parser.add_argument("--symbols", type=int, default=50_000, help="Distinct symbols (rows share them round-robin).")
+    parser.add_argument("--truncate", action="store_true", help="Delete previously seeded 'bench-*' rows first.")
+    parser.add_argument("--quotes", action="store_true", help="Rebuild 'consolidated_quotes' afterwards.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed, same data).")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    results = seed(args.rows, args.chunk, max(args.symbols, 1), args.truncate, args.quotes, args.seed)
+    print(
+        f"Seeded {results['rows']:,} rows in {results['load_seconds']}s "
+        f"({results['rows_per_second']:,} rows/s)"
+    )
+    if args.json:
+        write_results(args.json, "seed_data", results)
+
+
+if __name__ == "__main__":
+    main()
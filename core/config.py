@@ -11,16 +11,129 @@ class Settings:
     POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "db") # 'db' is the service name in docker-compose
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5432")
     
-    # Combined URL for SQLAlchemy
-    DATABASE_URL: str = (
+    # Combined URL for SQLAlchemy (DATABASE_URL from docker-compose / .env wins if set)
+    DATABASE_URL: str = os.getenv(
+        "DATABASE_URL",
         f"postgresql+psycopg2://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
     )
 
+    # --- Connection Pool (core/db.py - one engine per process for API and ETL) ---
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    # Recycle before PostgreSQL / load balancers drop idle connections
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    # Server-side cap per statement (0 = no limit)
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+    # --- Async Database Layer (asyncpg + AsyncSession) ---
+    # When enabled, the API routes await AsyncSession queries instead of running
+    # blocking psycopg2 sessions in the threadpool.
+    USE_ASYNC_DB: bool = os.getenv("USE_ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
     # --- API Key (Used by ETL service) ---
     # The actual API key provided in the assignment (use a secure source like Docker secrets in a real system)
     EXTERNAL_API_KEY: str = os.getenv("EXTERNAL_API_KEY", "your_default_key_here") 
     
+    # --- ETL Extract (services/crypto_service.py) ---
+    # Provider API roots; point both at 'python benchmarks/provider_stub.py' to run offline
+    COINGECKO_BASE_URL: str = os.getenv("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3")
+    COINPAPRIKA_BASE_URL: str = os.getenv("COINPAPRIKA_BASE_URL", "https://api.coinpaprika.com/v1")
+    COINGECKO_PER_PAGE: int = int(os.getenv("COINGECKO_PER_PAGE", "250"))  # API maximum
+    COINGECKO_MAX_PAGES: int = int(os.getenv("COINGECKO_MAX_PAGES", "100"))
+    COINPAPRIKA_PAGE_SIZE: int = int(os.getenv("COINPAPRIKA_PAGE_SIZE", "500"))
+    FETCH_CONCURRENCY: int = int(os.getenv("FETCH_CONCURRENCY", "4"))  # Pages in flight per source
+    FETCH_TIMEOUT_SECONDS: float = float(os.getenv("FETCH_TIMEOUT_SECONDS", "10"))
+    FETCH_MAX_RETRIES: int = int(os.getenv("FETCH_MAX_RETRIES", "5"))
+    FETCH_BACKOFF_BASE_SECONDS: float = float(os.getenv("FETCH_BACKOFF_BASE_SECONDS", "1.0"))
+    # Upper bound on a provider's Retry-After (a misbehaving 'Retry-After: 86400' must not stall the run)
+    FETCH_MAX_RETRY_AFTER_SECONDS: float = float(os.getenv("FETCH_MAX_RETRY_AFTER_SECONDS", "60"))
+    # Per-source overrides (fall back to the FETCH_* defaults above)
+    COINGECKO_TIMEOUT_SECONDS: float = float(os.getenv("COINGECKO_TIMEOUT_SECONDS", str(FETCH_TIMEOUT_SECONDS)))
+    COINGECKO_MAX_RETRIES: int = int(os.getenv("COINGECKO_MAX_RETRIES", str(FETCH_MAX_RETRIES)))
+    COINGECKO_BACKOFF_BASE_SECONDS: float = float(os.getenv("COINGECKO_BACKOFF_BASE_SECONDS", str(FETCH_BACKOFF_BASE_SECONDS)))
+    COINPAPRIKA_TIMEOUT_SECONDS: float = float(os.getenv("COINPAPRIKA_TIMEOUT_SECONDS", str(FETCH_TIMEOUT_SECONDS)))
+    COINPAPRIKA_MAX_RETRIES: int = int(os.getenv("COINPAPRIKA_MAX_RETRIES", str(FETCH_MAX_RETRIES)))
+    COINPAPRIKA_BACKOFF_BASE_SECONDS: float = float(os.getenv("COINPAPRIKA_BACKOFF_BASE_SECONDS", str(FETCH_BACKOFF_BASE_SECONDS)))
+
+    # --- Shared HTTP clients (services/http_client.py) ---
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    # Needs the 'h2' package (httpx[http2]); silently falls back to HTTP/1.1 without it
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    # --- ETL Load ---
+    # Rows per COPY batch into the staging table (services/database_service.copy_merge)
+    ETL_LOAD_BATCH_SIZE: int = int(os.getenv("ETL_LOAD_BATCH_SIZE", "5000"))
+    # Append every loaded price to 'price_history' and maintain the 1m/1h/1d rollups
+    PRICE_HISTORY_ENABLED: bool = os.getenv("PRICE_HISTORY_ENABLED", "true").lower() in ("1", "true", "yes")
+    # Streaming pipeline (ingestion/etl_main.py): pages buffered between stages, parallel loaders
+    ETL_QUEUE_MAXSIZE: int = int(os.getenv("ETL_QUEUE_MAXSIZE", "8"))
+    ETL_LOAD_WORKERS: int = int(os.getenv("ETL_LOAD_WORKERS", "2"))
+
+    # --- ETL Scheduler ('python ingestion/etl_main.py --schedule') ---
+    # Seconds between run starts per source (per-source overrides fall back to ETL_INTERVAL_SECONDS)
+    ETL_INTERVAL_SECONDS: float = float(os.getenv("ETL_INTERVAL_SECONDS", "60"))
+    COINGECKO_INTERVAL_SECONDS: float = float(os.getenv("COINGECKO_INTERVAL_SECONDS", str(ETL_INTERVAL_SECONDS)))
+    COINPAPRIKA_INTERVAL_SECONDS: float = float(os.getenv("COINPAPRIKA_INTERVAL_SECONDS", str(ETL_INTERVAL_SECONDS)))
+    # Random 0..N seconds added to every start, so replicas and sources don't fire in lockstep
+    ETL_JITTER_SECONDS: float = float(os.getenv("ETL_JITTER_SECONDS", "5"))
+    # On SIGTERM/SIGINT in-flight runs get this long to finish before they are cancelled
+    ETL_SHUTDOWN_GRACE_SECONDS: float = float(os.getenv("ETL_SHUTDOWN_GRACE_SECONDS", "60"))
+    # First key of the per-source pg advisory locks (services/lock_service.py)
+    ETL_LOCK_NAMESPACE: int = int(os.getenv("ETL_LOCK_NAMESPACE", "7301"))
+
+    # --- Liveness / Readiness (services/health_service.HealthMonitor) ---
+    # Probes read a snapshot refreshed in the background on a dedicated DB connection
+    HEALTH_REFRESH_SECONDS: float = float(os.getenv("HEALTH_REFRESH_SECONDS", "5"))
+    # A source is stale when its last successful run is older than this; 0 = derived per
+    # source as 3x its *_INTERVAL_SECONDS (+ jitter), i.e. two missed scheduled runs
+    ETL_STALE_AFTER_SECONDS: float = float(os.getenv("ETL_STALE_AFTER_SECONDS", "0"))
+    # Stale ETL data only fails readiness when this is set (otherwise it is just reported)
+    READINESS_REQUIRE_FRESH_ETL: bool = os.getenv("READINESS_REQUIRE_FRESH_ETL", "false").lower() in ("1", "true", "yes")
+
+    # --- Metrics (services/metrics_service.py) ---
+    # The API serves GET /metrics; the ETL process serves its own on this port (0 = off)
+    ETL_METRICS_PORT: int = int(os.getenv("ETL_METRICS_PORT", "9101"))
+
+    # --- Raw Payload Archive (services/archive_service.py) ---
+    # Every raw API response is appended, compressed, to append-only segment files
+    # under ARCHIVE_DIR/<source>/; 'python ingestion/etl_main.py --replay' re-runs them.
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "true").lower() in ("1", "true", "yes")
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "data/archive")
+    ARCHIVE_CODEC: str = os.getenv("ARCHIVE_CODEC", "zstd")  # 'zstd' (needs zstandard) or 'zlib'
+    ARCHIVE_COMPRESSION_LEVEL: int = int(os.getenv("ARCHIVE_COMPRESSION_LEVEL", "6"))
+    # Retention per source, enforced after every run: older segments, then the oldest
+    # beyond the byte budget, are deleted (0 = no limit; the newest segment is always kept)
+    ARCHIVE_RETENTION_DAYS: float = float(os.getenv("ARCHIVE_RETENTION_DAYS", "7"))
+    ARCHIVE_MAX_BYTES: int = int(os.getenv("ARCHIVE_MAX_BYTES", str(1024 ** 3)))  # 1 GiB
+
+    # --- Live Updates (NOTIFY from the ETL load -> WebSocket / SSE, services/notify_service.py) ---
+    NOTIFY_ENABLED: bool = os.getenv("NOTIFY_ENABLED", "true").lower() in ("1", "true", "yes")
+    NOTIFY_CHANNEL: str = os.getenv("NOTIFY_CHANNEL", "market_updates")
+    # Pending messages per subscriber; a slow client loses the oldest ones first
+    NOTIFY_SUBSCRIBER_QUEUE: int = int(os.getenv("NOTIFY_SUBSCRIBER_QUEUE", "100"))
+    # SSE comment line sent when idle, so proxies don't close the stream
+    SSE_KEEPALIVE_SECONDS: float = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+    # --- Bulk Export (GET /api/export, services/export_service.py) ---
+    # Rows per server-side cursor fetch; one encoded chunk (or Parquet row group) each
+    EXPORT_BATCH_ROWS: int = int(os.getenv("EXPORT_BATCH_ROWS", "5000"))
+
     # --- API Service Metadata ---
     API_LATENCY_MS: float = 20.0 # Mock value for GET /data metadata
 
+    # --- HTTP Caching (ETag / Last-Modified / Cache-Control, services/http_cache.py) ---
+    # How long browsers / CDNs may reuse a read response without revalidating
+    HTTP_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "5"))
+    HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS: int = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS", "30"))
+
+    # --- Read Cache (services/cache_service.py) ---
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+    CACHE_HEALTH_TTL_SECONDS: float = float(os.getenv("CACHE_HEALTH_TTL_SECONDS", "2"))
+    # How often the API re-reads the ETL data generation from PostgreSQL
+    CACHE_GENERATION_POLL_SECONDS: float = float(os.getenv("CACHE_GENERATION_POLL_SECONDS", "2"))
+
 settings = Settings()
\ No newline at end of file
@@ -1,40 +1,183 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
-import os
-
-# 1. Define your Database URL
-# This URL is read from the DATABASE_URL environment variable set in docker-compose.yml
-SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL")
-
-# --- Error Check (Good Practice) ---
-if SQLALCHEMY_DATABASE_URL is None:
-    # This block prevents the ArgumentError if the environment variable is not set.
-    # We expect the application to crash later, but this gives a clearer error message.
-    raise EnvironmentError(
-        "DATABASE_URL environment variable is not set. Cannot connect to database."
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from typing import Optional
+import logging
+import threading
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Single connection manager for the whole process (API and ETL).
+# services/database_service.py and models/db.py re-export from here.
+
+# 1. Database URLs
+# DATABASE_URL comes from docker-compose / .env (see core/config.Settings)
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+
+def to_async_url(url: str) -> str:
+    """Rewrites a psycopg2 / plain PostgreSQL URL to the asyncpg driver."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# 2. Engine factory
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    Pool and timeout options shared by the sync and async engines, driven by Settings.
+    Creating an engine does not connect; the first connection is opened on first use.
+    """
+    backend = make_url(url).get_backend_name()
+    options = {"pool_pre_ping": True}
+    if backend == "sqlite":
+        # SQLite (local experiments) doesn't take QueuePool sizing or server settings
+        return options
+
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
     )
-# -----------------------------------
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, pool_size: Optional[int] = None):
+    """pool_size caps a dedicated engine (no overflow), e.g. the health monitor's single connection."""
+    options = engine_options(url)
+    if pool_size is not None and "pool_size" in options:
+        options.update(pool_size=pool_size, max_overflow=0)
+    return create_engine(url, **options)
 
-# 2. Create the engine
-# Set pool_pre_ping=True to handle dropped connections in a long-running service
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    pool_pre_ping=True
-)
 
-# 3. Create a SessionLocal class
+# 3. The process-wide engine and session factory
+# Set pool_pre_ping=True to handle dropped connections in a long-running service
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 3b. Async engine (asyncpg), created on first use so sync-only deployments never import asyncpg
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        async_url = to_async_url(SQLALCHEMY_DATABASE_URL)
+        _async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        _AsyncSessionLocal = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _AsyncSessionLocal
+
+
 # 4. Create a Base class for your models
 # All your SQLAlchemy models will inherit from this Base class
 Base = declarative_base()
 
-# 5. Define the Dependency function 'get_db'
-# This function is used by FastAPI endpoints to inject a database session.
+# 5. Lazy schema creation
+# Nothing touches the database at import time; the ETL (and initialize_db.py) call this once.
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+# create_all() only creates missing tables; columns added to tables that already hold data in
+# deployed databases are added here. Idempotent, run on every start (PostgreSQL only).
+SCHEMA_UPGRADES = [
+    "ALTER TABLE normalized_data ADD COLUMN IF NOT EXISTS content_hash varchar(32)",
+    "ALTER TABLE etl_checkpoints ADD COLUMN IF NOT EXISTS rows_per_second double precision",
+]
+
+
+# Indexes declared on models whose tables predate them, by name. Built CONCURRENTLY so
+# writers are not blocked on large tables (outside a transaction, hence autocommit).
+INDEX_UPGRADES = {
+    "ix_normalized_data_keyset":
+        "ON normalized_data (market_cap_usd, source_record_id, source_name)",
+    "ix_normalized_data_symbol_prefix":
+        "ON normalized_data (symbol varchar_pattern_ops)",
+}
+
+# A CONCURRENTLY build that was interrupted leaves an INVALID index that IF NOT EXISTS skips
+INVALID_INDEXES_SQL = text(
+    "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+    "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+)
+
+
+def upgrade_schema(bind) -> None:
+    """Applies SCHEMA_UPGRADES and INDEX_UPGRADES to an existing PostgreSQL database."""
+    if bind.dialect.name != "postgresql":
+        return
+    with bind.begin() as connection:
+        for statement in SCHEMA_UPGRADES:
+            connection.execute(text(statement))
+    with bind.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        invalid = connection.execute(INVALID_INDEXES_SQL, {"names": list(INDEX_UPGRADES)}).scalars().all()
+        for name in invalid:
+            logger.warning(f"Rebuilding invalid index {name}")
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        for name, definition in INDEX_UPGRADES.items():
+            connection.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}"))
+
+
+def ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            import models.etl_models  # noqa: F401 - registers every table on Base.metadata
+            Base.metadata.create_all(bind=engine)
+            upgrade_schema(engine)
+            _schema_ready = True
+
+
+# 6. Pool utilization metrics
+def _describe_pool(pool) -> dict:
+    stats = {"pool": type(pool).__name__}
+    # QueuePool-style pools expose sizing; NullPool / StaticPool (SQLite) do not
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    return stats
+
+
+def pool_status() -> dict:
+    """Snapshot of the sync (and, if created, async) connection pools."""
+    status = {"sync": _describe_pool(engine.pool)}
+    if _async_engine is not None:
+        status["async"] = _describe_pool(_async_engine.sync_engine.pool)
+    status["max_connections"] = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    return status
+
+
+# 7. Define the Dependency functions
+# These are used by FastAPI endpoints to inject a database session.
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """FastAPI dependency yielding an AsyncSession (used when settings.USE_ASYNC_DB is on)."""
+    async with get_async_sessionmaker()() as db:
+        yield db
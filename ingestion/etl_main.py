@@ -1,13 +1,34 @@
+import argparse
 import asyncio
+import functools
 import logging
 import sys
 import os
+import random
+import signal
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 # 1. Setup path so Python can find 'services' and 'models' folders
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.crypto_service import fetch_coingecko_data, fetch_coinpaprika_data
-from services.database_service import SessionLocal, bulk_upsert_normalized_data
+from core.config import settings
+from services.crypto_service import (
+    ARCHIVE_REPLAYERS, iter_archived_pages, iter_coingecko_pages, iter_coinpaprika_pages, response_bytes
+)
+from services.archive_service import ArchiveWriter
+from services.columnar_service import ColumnBatch
+from services.metrics_service import observe_etl_run, start_metrics_server
+from services.http_client import close_http_clients
+from services.lock_service import AdvisoryLocks
+from services.database_service import (
+    SessionLocal, bulk_upsert_normalized_data, ensure_schema, upsert_checkpoint,
+    NORMALIZED_COLUMNS, content_hashes, load_row_versions, load_watermarks, parse_timestamp,
+    refresh_consolidated_quotes, commit_new_generation, record_etl_run
+)
 
 # 2. Configure Logging
 logging.basicConfig(
@@ -16,64 +37,551 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def run_etl_pipeline():
-    logger.info("--- Starting ETL Pipeline ---")
-    
+# End-of-stream marker passed between stages
+_DONE = object()
+
+
+def default_sources(archive: Optional[bool] = None) -> Dict[str, Callable[[], AsyncIterator[List[dict]]]]:
+    """
+    Source name -> factory returning an async iterator of normalized pages.
+    With archiving on (ARCHIVE_ENABLED), each run appends the raw responses to a new segment.
+    """
+    fetchers = {
+        "coingecko": iter_coingecko_pages,
+        "coinpaprika": iter_coinpaprika_pages,
+    }
+    if not (settings.ARCHIVE_ENABLED if archive is None else archive):
+        return fetchers
+    return {
+        name: (lambda fetch=fetch, name=name: fetch(archive=ArchiveWriter(name)))
+        for name, fetch in fetchers.items()
+    }
+
+
+def replay_sources(
+    names: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Dict[str, Callable[[], AsyncIterator[List[dict]]]]:
+    """Like default_sources(), but re-normalizes archived raw responses instead of fetching."""
+    return {
+        name: functools.partial(iter_archived_pages, name, since, until)
+        for name in (names or list(ARCHIVE_REPLAYERS))
+    }
+
+
+def _stage_summary(stage_seconds: Counter, stage_rows: Counter) -> Dict:
+    stages = {}
+    for stage, seconds in stage_seconds.items():
+        rows = stage_rows[stage]
+        stages[stage] = {
+            "seconds": round(seconds, 3),
+            "rows": rows,
+            "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+        }
+    return stages
+
+
+class PipelineStats:
+    """
+    Per-stage busy time and row counts for one run, plus per-source outcomes.
+    Sources run concurrently, so each one also gets its own start/end time and its share
+    of the stage timings (a load batch mixing sources is split by staged rows).
+    """
+
+    def __init__(self):
+        self.stage_seconds = Counter()
+        self.stage_rows = Counter()
+        self.source_stage_seconds: Dict[str, Counter] = defaultdict(Counter)
+        self.source_stage_rows: Dict[str, Counter] = defaultdict(Counter)
+        self.started_at: Dict[str, datetime] = {}
+        self.ended_at: Dict[str, datetime] = {}
+        self.rows_fetched = Counter()
+        self.rows_skipped = Counter()
+        self.rows_stale = Counter()
+        self.rows_loaded = Counter()
+        self.symbols_loaded = set()
+        self.watermarks: Dict[str, datetime] = {}
+        self.failed_sources = set()
+        self.errors: Dict[str, str] = {}
+        self.bytes_fetched = Counter()
+        self.load_errors = 0
+
+    def fail(self, source_name: str, error: Exception) -> None:
+        self.failed_sources.add(source_name)
+        # Keep the first error: later ones are usually consequences of it
+        self.errors.setdefault(source_name, f"{type(error).__name__}: {error}")
+
+    def record(self, stage: str, seconds: float, rows: int) -> None:
+        self.stage_seconds[stage] += seconds
+        self.stage_rows[stage] += rows
+
+    def record_source(self, source_name: str, stage: str, seconds: float, rows: int) -> None:
+        self.source_stage_seconds[source_name][stage] += seconds
+        self.source_stage_rows[source_name][stage] += rows
+        # A source's run ends with the last stage that worked on its rows
+        self.ended_at[source_name] = datetime.now(timezone.utc)
+
+    def source_stages(self, source_name: str) -> Dict:
+        return _stage_summary(self.source_stage_seconds[source_name], self.source_stage_rows[source_name])
+
+    def summary(self) -> Dict:
+        return {
+            "stages": _stage_summary(self.stage_seconds, self.stage_rows),
+            "rows_fetched": dict(self.rows_fetched),
+            "rows_skipped": dict(self.rows_skipped),
+            "rows_stale": dict(self.rows_stale),
+            "rows_loaded": dict(self.rows_loaded),
+            "bytes_fetched": dict(self.bytes_fetched),
+            "failed_sources": sorted(self.failed_sources),
+            "load_errors": self.load_errors,
+        }
+
+
+# =========================================================
+# Stage 1: EXTRACT (one producer per source)
+# =========================================================
+async def _extract(source_name: str, pages: AsyncIterator[List[dict]], out_queue: asyncio.Queue, stats: PipelineStats):
+    start = time.perf_counter()
+    stats.started_at[source_name] = datetime.now(timezone.utc)
     try:
-        # --- 1. EXTRACT ---
-        logger.info("Fetching data from CoinGecko & CoinPaprika...")
-        
-        # Run fetchers in parallel
-        results = await asyncio.gather(
-            fetch_coingecko_data(),
-            fetch_coinpaprika_data(),
-            return_exceptions=True
-        )
-        
-        all_data = []
-        for res in results:
-            if isinstance(res, list):
-                all_data.extend(res)
-            else:
-                logger.error(f"Provider failed: {res}")
+        async for page in pages:
+            stats.rows_fetched[source_name] += len(page)
+            # Blocks when the transform stage falls behind (backpressure)
+            await out_queue.put((source_name, page))
+    except Exception as e:
+        logger.error(f"Provider {source_name} failed: {e}")
+        stats.fail(source_name, e)
+    finally:
+        seconds = time.perf_counter() - start
+        stats.record(f"extract:{source_name}", seconds, stats.rows_fetched[source_name])
+        stats.record_source(source_name, "extract", seconds, stats.rows_fetched[source_name])
 
-        if not all_data:
-            logger.warning("No data received from any provider.")
+
+# =========================================================
+# Stage 2: TRANSFORM
+# =========================================================
+def _to_row(item) -> Optional[dict]:
+    # Convert Pydantic models to dictionaries for SQLAlchemy
+    if hasattr(item, 'model_dump'):
+        return item.model_dump()
+    if isinstance(item, dict):
+        return item
+    logger.warning(f"Skipping unknown data format: {type(item)}")
+    return None
+
+
+def _to_batch(page) -> ColumnBatch:
+    # The built-in fetchers already emit columnar pages; custom sources may yield rows
+    if isinstance(page, ColumnBatch):
+        return page
+    return ColumnBatch.from_rows(filter(None, map(_to_row, page)), NORMALIZED_COLUMNS)
+
+
+def _transform_page(
+    source_name: str,
+    page,
+    stats: PipelineStats,
+    stored: Dict[Tuple[str, str], Tuple[Optional[str], Optional[datetime]]],
+) -> ColumnBatch:
+    batch = _to_batch(page)
+
+    # Advance the source watermark even for unchanged rows: they were seen up to date
+    timestamps = list(map(parse_timestamp, batch.column("last_updated_at")))
+    updated_at = max(filter(None, timestamps), default=None)
+    if updated_at and (source_name not in stats.watermarks or updated_at > stats.watermarks[source_name]):
+        stats.watermarks[source_name] = updated_at
+
+    # Incremental ingestion: drop rows identical to what is already stored, and rows
+    # older than the stored copy (the merge's newer-only guard would reject them anyway)
+    hashes = content_hashes(batch)
+    batch.columns["content_hash"] = hashes
+    keep = []
+    stale = 0
+    for i, key in enumerate(zip(batch.column("source_record_id"), batch.column("source_name"))):
+        stored_hash, stored_at = stored.get(key, (None, None))
+        if stored_hash == hashes[i]:
+            continue
+        if stored_at and timestamps[i] and timestamps[i] < stored_at:
+            stale += 1
+            continue
+        keep.append(i)
+    stats.rows_skipped[source_name] += len(batch) - len(keep)
+    stats.rows_stale[source_name] += stale
+    return batch.take(keep)
+
+
+async def _transform(
+    in_queue: asyncio.Queue,
+    out_queue: asyncio.Queue,
+    stats: PipelineStats,
+    stored: Dict[Tuple[str, str], Tuple[Optional[str], Optional[datetime]]],
+):
+    while True:
+        item = await in_queue.get()
+        if item is _DONE:
             return
+        source_name, page = item
+        start = time.perf_counter()
+        try:
+            batch = _transform_page(source_name, page, stats, stored)
+        except Exception as e:
+            # Keep draining the queue: a stage that stops reading would block every producer
+            logger.error(f"Transform of a {source_name} page failed: {e}", exc_info=True)
+            stats.fail(source_name, e)
+            continue
+        seconds = time.perf_counter() - start
+        stats.record("transform", seconds, len(batch))
+        stats.record_source(source_name, "transform", seconds, len(batch))
+        if len(batch):
+            await out_queue.put(batch)
 
-        logger.info(f"Extracted {len(all_data)} records total.")
 
-        # --- 2. TRANSFORM ---
-        # Convert Pydantic models to dictionaries for SQLAlchemy
-        clean_data = []
-        for item in all_data:
-            if hasattr(item, 'dict'):
-                clean_data.append(item.dict())
-            elif isinstance(item, dict):
-                clean_data.append(item)
-            else:
-                logger.warning(f"Skipping unknown data format: {type(item)}")
+# =========================================================
+# Stage 3: LOAD (ETL_LOAD_WORKERS batching loaders)
+# =========================================================
+def _flush(batch: ColumnBatch) -> Dict:
+    db = SessionLocal()
+    try:
+        return bulk_upsert_normalized_data(db, batch)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 
-        # --- 3. LOAD ---
-        logger.info("Saving to database (Upsert)...")
-        db = SessionLocal()
+async def _load(in_queue: asyncio.Queue, stats: PipelineStats, batch_size: int):
+    pending: List[ColumnBatch] = []
+
+    async def flush():
+        if not pending:
+            return
+        batch = ColumnBatch.concat(pending)
+        pending.clear()
+        start = time.perf_counter()
         try:
-            bulk_upsert_normalized_data(db, clean_data)
-            logger.info("Data committed to database successfully.")
+            # COPY + merge runs in a worker thread so extraction keeps going meanwhile
+            result = await asyncio.to_thread(_flush, batch)
+            # Rows the merge wrote, not rows staged (the newer-only guard may reject some)
+            stats.rows_loaded.update(result["rows_by_source"])
+            stats.symbols_loaded.update(batch.column("symbol"))
+            seconds = time.perf_counter() - start
+            stats.record("load", seconds, result["rows"])
+            for source_name, staged in Counter(batch.column("source_name")).items():
+                stats.record_source(
+                    source_name, "load", seconds * staged / len(batch), result["rows_by_source"].get(source_name, 0)
+                )
         except Exception as db_err:
             logger.error(f"Database Error: {db_err}")
-            db.rollback()
-        finally:
-            db.close()
+            stats.load_errors += 1
+            for source_name in set(batch.column("source_name")):
+                stats.fail(source_name, db_err)
+
+    while True:
+        batch = await in_queue.get()
+        if batch is _DONE:
+            await flush()
+            return
+        pending.append(batch)
+        if sum(len(item) for item in pending) >= batch_size:
+            await flush()
+
+
+# =========================================================
+# Stage 4: CONSOLIDATE (cross-source quotes for the symbols just loaded)
+# =========================================================
+def _consolidate(symbols) -> int:
+    db = SessionLocal()
+    try:
+        written = refresh_consolidated_quotes(db, symbols)
+        if written:
+            commit_new_generation(db)
+        else:
+            db.commit()
+        return written
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
+
+# =========================================================
+# Pipeline
+# =========================================================
+def _write_checkpoints(stats: PipelineStats, source_names, started_at: datetime, run_id: str) -> None:
+    """
+    Records records, duration and load throughput per source, plus its 'etl_runs' entry,
+    each with that source's own start/end time and stage timings.
+    """
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        for source_name in source_names:
+            status = "FAILURE" if source_name in stats.failed_sources else "SUCCESS"
+            source_started = stats.started_at.get(source_name, started_at)
+            source_ended = stats.ended_at.get(source_name, now)
+            stages = stats.source_stages(source_name)
+            upsert_checkpoint(
+                db, source_name, status, stats.rows_loaded[source_name],
+                int((source_ended - source_started).total_seconds() * 1000), source_started,
+                rows_per_second=stages.get("load", {}).get("rows_per_second"),
+                watermark=stats.watermarks.get(source_name), ended_at=source_ended,
+            )
+            record_etl_run(
+                db, run_id, source_name, status, source_started, source_ended,
+                rows_fetched=stats.rows_fetched[source_name],
+                rows_written=stats.rows_loaded[source_name],
+                rows_skipped=stats.rows_skipped[source_name],
+                bytes_fetched=stats.bytes_fetched[source_name],
+                stage_timings=stages,
+                error=stats.errors.get(source_name),
+            )
+        # No new data generation: /stats and /api/stats key their caches and ETags on the
+        # latest recorded run (services/http_cache.runs_token)
+        db.commit()
+    except Exception as cp_err:
+        logger.error(f"Checkpoint Error: {cp_err}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _load_incremental_state(source_names: List[str]):
+    db = SessionLocal()
+    try:
+        return load_row_versions(db, source_names), load_watermarks(db, source_names)
+    finally:
+        db.close()
+
+
+async def run_etl_pipeline(sources: Optional[Dict[str, Callable[[], AsyncIterator[List[dict]]]]] = None) -> Optional[Dict]:
+    """
+    Streams extract -> transform -> load through bounded asyncio queues:
+    fetchers emit pages, the transform stage converts them, and loader workers flush
+    ETL_LOAD_BATCH_SIZE-row batches while later pages are still downloading.
+    Returns the per-stage timing summary.
+    """
+    logger.info("--- Starting ETL Pipeline ---")
+    started_at = datetime.now(timezone.utc)
+    run_id = str(uuid.uuid4())
+    sources = sources or default_sources()
+    stats = PipelineStats()
+    bytes_before = Counter(response_bytes)
+
+    try:
+        # Tables are created lazily by the ETL, never at API import time
+        ensure_schema()
+
+        # Incremental state: stored content hashes / row timestamps and the previous watermarks
+        stored_versions, previous_watermarks = await asyncio.to_thread(_load_incremental_state, list(sources))
+        for source_name, watermark in previous_watermarks.items():
+            if watermark:
+                logger.info(f"{source_name}: previous watermark {watermark.isoformat()}")
+
+        logger.info(f"Streaming data from {', '.join(sources)}...")
+        raw_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ETL_QUEUE_MAXSIZE)
+        load_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ETL_QUEUE_MAXSIZE)
+        workers = max(settings.ETL_LOAD_WORKERS, 1)
+
+        transformer = asyncio.create_task(_transform(raw_queue, load_queue, stats, stored_versions))
+        loaders = [
+            asyncio.create_task(_load(load_queue, stats, settings.ETL_LOAD_BATCH_SIZE))
+            for _ in range(workers)
+        ]
+
+        # --- 1. EXTRACT (all sources in parallel) ---
+        await asyncio.gather(*(
+            _extract(name, factory(), raw_queue, stats) for name, factory in sources.items()
+        ))
+
+        # --- 2./3. Drain TRANSFORM, then LOAD ---
+        await raw_queue.put(_DONE)
+        await transformer
+        for _ in loaders:
+            await load_queue.put(_DONE)
+        await asyncio.gather(*loaders)
+
+        if not any(stats.rows_fetched.values()):
+            logger.warning("No data received from any provider.")
+        for source_name, skipped in stats.rows_skipped.items():
+            logger.info(
+                f"{source_name}: skipped {skipped} rows "
+                f"({stats.rows_stale[source_name]} older than the stored copy, the rest unchanged)"
+            )
+
+        # --- 4. CONSOLIDATE (one set-based pass, only symbols whose rows changed) ---
+        if stats.symbols_loaded:
+            start = time.perf_counter()
+            try:
+                written = await asyncio.to_thread(_consolidate, stats.symbols_loaded)
+                stats.record("consolidate", time.perf_counter() - start, written)
+            except Exception as db_err:
+                logger.error(f"Consolidation Error: {db_err}")
+
+        # --- 5. CHECKPOINT + run history ---
+        for source_name in sources:
+            stats.bytes_fetched[source_name] = response_bytes[source_name] - bytes_before[source_name]
+        _write_checkpoints(stats, sources, started_at, run_id)
+
+        summary = stats.summary()
+        observe_etl_run(
+            summary, sources, (datetime.now(timezone.utc) - started_at).total_seconds(), stats.failed_sources
+        )
+        for stage, timing in summary["stages"].items():
+            logger.info(f"Stage {stage}: {timing['rows']} rows in {timing['seconds']}s ({timing['rows_per_second']} rows/s)")
         logger.info("--- ETL Pipeline Finished ---")
+        return summary
 
     except Exception as e:
         logger.error(f"Critical ETL Failure: {e}", exc_info=True)
+        return None
+
+
+# =========================================================
+# Overlap protection and the long-running scheduler
+# =========================================================
+# Seconds between run starts per source in --schedule mode
+SOURCE_INTERVALS = {
+    "coingecko": settings.COINGECKO_INTERVAL_SECONDS,
+    "coinpaprika": settings.COINPAPRIKA_INTERVAL_SECONDS,
+}
+
+
+async def run_locked(sources: Dict[str, Callable[[], AsyncIterator[List[dict]]]], locks: AdvisoryLocks) -> Optional[Dict]:
+    """
+    run_etl_pipeline() over the sources whose advisory lock this process got; a source
+    another replica (or an overrunning run) is already on is skipped, not waited for.
+    """
+    acquired = {}
+    try:
+        for name, factory in sources.items():
+            if await asyncio.to_thread(locks.acquire, f"etl:{name}"):
+                acquired[name] = factory
+            else:
+                logger.info(f"{name}: another ETL run holds its lock; skipping")
+        if not acquired:
+            return None
+        return await run_etl_pipeline(acquired)
+    finally:
+        for name in acquired:
+            await asyncio.to_thread(locks.release, f"etl:{name}")
+
+
+async def _schedule_source(
+    name: str,
+    factory: Callable[[], AsyncIterator[List[dict]]],
+    interval: float,
+    locks: AdvisoryLocks,
+    stopping: asyncio.Event,
+) -> None:
+    # Fixed rate measured from run starts; an overrun starts the next run right away (no catch-up burst)
+    next_run = time.monotonic() + random.uniform(0, settings.ETL_JITTER_SECONDS)
+    while not stopping.is_set():
+        delay = next_run - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(stopping.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+        started = time.monotonic()
+        try:
+            await run_locked({name: factory}, locks)
+        except Exception as e:
+            logger.error(f"{name}: scheduled run failed: {e}")
+        next_run = started + interval + random.uniform(0, settings.ETL_JITTER_SECONDS)
+
+
+async def run_scheduler(
+    sources: Optional[Dict[str, Callable[[], AsyncIterator[List[dict]]]]] = None,
+    intervals: Optional[Dict[str, float]] = None,
+) -> None:
+    """
+    Runs every source on its own interval in this process (engine, HTTP clients and
+    metrics server stay up between runs) until SIGTERM/SIGINT. In-flight runs then get
+    ETL_SHUTDOWN_GRACE_SECONDS to finish before they are cancelled.
+    """
+    sources = sources or default_sources()
+    intervals = {**SOURCE_INTERVALS, **(intervals or {})}
+    locks = AdvisoryLocks(pool_size=len(sources))
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+
+    for name in sources:
+        logger.info(f"Scheduling {name} every {intervals.get(name, settings.ETL_INTERVAL_SECONDS)}s")
+    tasks = [
+        asyncio.create_task(_schedule_source(
+            name, factory, intervals.get(name, settings.ETL_INTERVAL_SECONDS), locks, stopping
+        ))
+        for name, factory in sources.items()
+    ]
+    try:
+        await stopping.wait()
+        logger.info("Shutdown requested; waiting for in-flight ETL runs")
+        _, pending = await asyncio.wait(tasks, timeout=settings.ETL_SHUTDOWN_GRACE_SECONDS)
+        for task in pending:
+            logger.warning("ETL run did not finish within the shutdown grace period; cancelling")
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        await asyncio.to_thread(locks.close)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    def timestamp(value: str) -> datetime:
+        parsed = parse_timestamp(value)
+        if parsed is None:
+            raise argparse.ArgumentTypeError(f"not an ISO-8601 timestamp: {value}")
+        return parsed
+
+    parser = argparse.ArgumentParser(description="Kasparro ETL pipeline")
+    parser.add_argument(
+        "--schedule", action="store_true",
+        help="Keep running, fetching each source every *_INTERVAL_SECONDS until SIGTERM/SIGINT."
+    )
+    parser.add_argument(
+        "--replay", action="store_true",
+        help="Re-run normalization and loading from the raw payload archive (no network)."
+    )
+    parser.add_argument("--sources", nargs="+", choices=sorted(ARCHIVE_REPLAYERS), help="Sources to replay (default: all).")
+    parser.add_argument("--since", type=timestamp, help="Replay responses fetched at or after this time (ISO-8601, UTC if no offset).")
+    parser.add_argument("--until", type=timestamp, help="Replay responses fetched at or before this time (ISO-8601, UTC if no offset).")
+    args = parser.parse_args(argv)
+    if args.schedule and args.replay:
+        parser.error("--schedule and --replay are mutually exclusive")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None):
+    args = _parse_args(argv)
+    start_metrics_server(settings.ETL_METRICS_PORT)
+    try:
+        if args.schedule:
+            await run_scheduler()
+            return
+        # One-shot runs take the same per-source locks, so a cron run never overlaps the scheduler
+        locks = AdvisoryLocks()
+        try:
+            if args.replay:
+                await run_locked(replay_sources(args.sources, args.since, args.until), locks)
+            else:
+                await run_locked(default_sources(), locks)
+        finally:
+            locks.close()
+    finally:
+        # The shared HTTP clients live for the whole process; close them on exit
+        await close_http_clients()
 
 if __name__ == "__main__":
     # Windows-specific fix for asyncio loops
     if sys.platform.startswith('win'):
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     
-    asyncio.run(run_etl_pipeline())
\ No newline at end of file
+    asyncio.run(main())
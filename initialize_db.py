@@ -3,8 +3,7 @@
 import sys
 import time
 from sqlalchemy.exc import OperationalError
-from core.database import engine, Base
-from core.models import RawData, NormalizedMarketData, ETLCheckpoint
+from core.db import ensure_schema
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -17,8 +16,8 @@ def init_db():
     logger.info("Attempting to connect to the database and create tables...")
     for i in range(MAX_RETRIES):
         try:
-            # Create all tables defined in Base (RawData, NormalizedMarketData, ETLCheckpoint)
-            Base.metadata.create_all(bind=engine)
+            # Create all tables registered on core.db.Base (models/etl_models.py)
+            ensure_schema()
             logger.info("Database connection successful and tables created.")
             return
         except OperationalError as e:
@@ -1,25 +1,57 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlalchemy.orm import Session
 from typing import Optional, List
 
 # --- Core Imports ---
-from services.database_service import SessionLocal
-from services.crypto_service import get_market_data, get_etl_stats_service
-from models.etl_models import PaginatedResponseSchema, ETLCheckpointSchema
+from core.db import get_db as get_sync_db, get_async_db, pool_status
+from api.routes import router as api_router
+from services.http_client import close_http_clients
+from services.crypto_service import (
+    get_market_data, get_market_data_async, get_etl_stats_service, get_etl_stats_service_async, parse_symbols
+)
+from services.cache_service import cached_query, make_cache_key, response_cache
+from services.http_cache import check_conditional, runs_token
+from services.serialization import DefaultJSONResponse, RawJSONResponse, dumps, rows_to_json
+from services.metrics_service import MetricsMiddleware
+from models.etl_models import PaginatedResponseSchema, ETLCheckpointSchema, MarketDataSchema
+from core.config import settings
 
 # --- NEW Health Imports ---
-from services.health_service import get_health_status 
+from services.health_service import get_health_status, get_health_status_async, health_monitor
+from services.notify_service import market_updates
 from schemas.health import HealthResponse # <-- Imports the new schema
 
-app = FastAPI(title="Kasparro Backend", version="1.0")
+# orjson-backed responses when orjson is installed (services/serialization.py)
+app = FastAPI(title="Kasparro Backend", version="1.0", default_response_class=DefaultJSONResponse)
 
-# Dependency: Get Database Session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Field order of one /market-data row (MarketDataSchema)
+MARKET_DATA_FIELDS = tuple(MarketDataSchema.model_fields)
+
+# Mount the /api router (data, health, stats, debug endpoints)
+app.include_router(api_router)
+
+# Per-route latency histograms for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+@app.on_event("startup")
+async def start_health_monitor():
+    # Background readiness snapshot served by /health/ready
+    health_monitor.start()
+    # This process's single LISTEN connection for /api/ws/updates and /api/stream/updates
+    market_updates.start()
+
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    # Shared source clients used by the /api/coingecko and /api/coinpaprika debug routes
+    await close_http_clients()
+    await health_monitor.stop()
+    await market_updates.stop()
+
+# Dependency: Get Database Session (shared pool from core/db.py)
+# AsyncSession (asyncpg) when USE_ASYNC_DB is set, blocking psycopg2 Session otherwise
+get_db = get_async_db if settings.USE_ASYNC_DB else get_sync_db
 
 @app.get("/")
 def root():
@@ -33,24 +65,55 @@ def root():
     response_model=PaginatedResponseSchema, 
     response_model_exclude_none=True
 )
-def read_market_data(
+async def read_market_data(
+    request: Request,
     limit: int = Query(default=10, ge=1, le=100), 
     offset: int = Query(default=0, ge=0), 
     symbol: Optional[str] = Query(default=None, max_length=10), 
+    symbol_match: str = Query(default="exact", pattern="^(exact|prefix)$", description="Match 'symbol' exactly or as a prefix."),
+    symbols: Optional[str] = Query(default=None, description="Comma-separated list of exact symbols, e.g. BTC,ETH,SOL."),
+    cursor: Optional[str] = Query(default=None, description="Opaque 'next_cursor' from the previous page (keyset pagination)."),
+    count: str = Query(default="exact", pattern="^(exact|estimate|none)$", description="How to compute 'total'."),
     db: Session = Depends(get_db)
 ):
     """ Fetch paginated and filtered market data from the PostgreSQL database. """
     try:
-        data, total_count = get_market_data(db, limit=limit, offset=offset, symbol=symbol)
-        
-        return {
-            "metadata": {
+        # Unchanged since the client's copy (same data generation): 304 before any query runs
+        not_modified, cache_headers = await check_conditional(request, db, "market-data")
+        if not_modified:
+            return not_modified
+
+        symbol_list = parse_symbols(symbols)
+        query_args = dict(
+            limit=limit, offset=offset, symbol=symbol, cursor=cursor, count_mode=count,
+            symbols=symbol_list, symbol_match=symbol_match
+        )
+
+        def to_response(data, total_count, next_cursor):
+            metadata = {
                 "total": total_count,
                 "limit": limit,
-                "offset": offset
-            },
-            "data": data
-        }
+                "offset": offset,
+                "next_cursor": next_cursor
+            }
+            # Encoded once, straight from the DB rows; cached pages are the response bytes
+            # (None fields dropped like response_model_exclude_none would)
+            return b'{"metadata":' + dumps(metadata) + b',"data":' + \
+                rows_to_json(data, MARKET_DATA_FIELDS, exclude_none=True) + b'}'
+
+        async def load_page_async():
+            return to_response(*await get_market_data_async(db, **query_args))
+
+        cache_key = make_cache_key(
+            "market-data", limit=limit, offset=offset, symbol=symbol and symbol.upper(),
+            symbol_match=symbol_match, symbols=symbol_list, cursor=cursor, count=count
+        )
+        body = await cached_query(
+            db, cache_key, lambda: to_response(*get_market_data(db, **query_args)), load_page_async
+        )
+        return RawJSONResponse(body, headers=cache_headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
 
@@ -62,13 +125,26 @@ def read_market_data(
     response_model=List[ETLCheckpointSchema],
     response_model_exclude_none=True
 )
-def read_etl_stats(
+async def read_etl_stats(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """ Get the status and last run details for the ETL process from the ETLCheckpoint table. """
     try:
-        stats = get_etl_stats_service(db)
-        return stats
+        not_modified, cache_headers = await check_conditional(request, db, "stats", include_runs=True)
+        if not_modified:
+            return not_modified
+        response.headers.update(cache_headers)
+
+        async def load_stats_async():
+            return [ETLCheckpointSchema.model_validate(row) for row in await get_etl_stats_service_async(db)]
+
+        return await cached_query(
+            db, make_cache_key("stats", runs=runs_token()),
+            lambda: [ETLCheckpointSchema.model_validate(row) for row in get_etl_stats_service(db)],
+            load_stats_async
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
 
@@ -80,9 +156,50 @@ def read_etl_stats(
     response_model=HealthResponse, # <-- Now works with the new schema
     response_model_exclude_none=True
 )
-def read_health_status(
+async def read_health_status(
     db: Session = Depends(get_db)
 ):
     """ Provides a comprehensive health check for the API, database, and ETL pipeline. """
-    # Uses the new service function
-    return get_health_status(db)
\ No newline at end of file
+    # Uses the new service function (short TTL so outages surface within seconds)
+    return await cached_query(
+        db, make_cache_key("health"), lambda: get_health_status(db), lambda: get_health_status_async(db),
+        ttl_seconds=settings.CACHE_HEALTH_TTL_SECONDS
+    )
+
+@app.get("/health/live", include_in_schema=False)
+async def read_liveness():
+    """ Liveness probe: the process is up and its event loop responds. No I/O. """
+    return {"status": "alive"}
+
+@app.get("/health/ready", include_in_schema=False)
+async def read_readiness():
+    """
+    Readiness probe: served from the background snapshot (DB ping, pool state, ETL staleness),
+    so probes never touch the database or the connection pool. 503 when not ready.
+    """
+    snapshot = health_monitor.readiness()
+    return DefaultJSONResponse(jsonable_encoder(snapshot), status_code=200 if snapshot["ready"] else 503)
+
+# =========================================================
+# 4. Cache Statistics Endpoint
+# =========================================================
+@app.get("/cache/stats")
+def read_cache_stats():
+    """ Hit/miss counters and size of the in-process response cache. """
+    return response_cache.stats()
+
+# =========================================================
+# 5. Connection Pool Endpoint
+# =========================================================
+@app.get("/db/pool")
+def read_pool_status():
+    """ Utilization of the process-wide connection pool(s) from core/db.py. """
+    return pool_status()
+
+# =========================================================
+# 6. Prometheus Metrics Endpoint
+# =========================================================
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """ Request latency, DB statement timings, pool gauges and cache counters (Prometheus text format). """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
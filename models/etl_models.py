@@ -1,27 +1,76 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, func, PrimaryKeyConstraint
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, Text, JSON, func, PrimaryKeyConstraint, Index, Sequence
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import List, Optional  # <-- CRITICAL: Optional is imported here
 
-# Base class for SQLAlchemy models
-Base = declarative_base()
+# Base class for SQLAlchemy models (shared with core/db.py)
+from core.db import Base
+
+# Data generation: bumped by every committed load so API caches know when to invalidate
+data_generation_seq = Sequence('data_generation_seq', metadata=Base.metadata)
 
 # --- 1. ETL Checkpoint Model (Database Table) ---
 class ETLCheckpoint(Base):
     __tablename__ = 'etl_checkpoints'
     
     source_name = Column(String, primary_key=True)
+    # Watermark: newest source 'last_updated_at' loaded by a successful run
     last_successful_timestamp = Column(DateTime(timezone=True), nullable=True)
     last_run_status = Column(String, default="FAILURE")
     records_processed = Column(Integer, default=0)
     duration_ms = Column(Integer, default=0)
+    rows_per_second = Column(Float, nullable=True)  # Load throughput of the last run
     last_start_time = Column(DateTime(timezone=True), default=func.now())
     last_end_time = Column(DateTime(timezone=True), nullable=True)
 
     def __repr__(self):
         return f"<ETLCheckpoint(source='{self.source_name}')>"
 
+# --- 1b. ETL Run History (one row per source per pipeline run) ---
+class ETLRun(Base):
+    __tablename__ = 'etl_runs'
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    run_id = Column(String(36), nullable=False)  # Shared by all sources of one pipeline run
+    source_name = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # 'SUCCESS' / 'FAILURE'
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    ended_at = Column(DateTime(timezone=True), nullable=False)
+    duration_ms = Column(Integer, nullable=False)
+    rows_fetched = Column(Integer, default=0)
+    rows_written = Column(Integer, default=0)
+    rows_skipped = Column(Integer, default=0)
+    bytes_fetched = Column(BigInteger, default=0)
+    stage_timings = Column(JSON, nullable=True)  # PipelineStats.summary()["stages"]
+    error = Column(Text, nullable=True)
+    __table_args__ = (
+        Index('ix_etl_runs_source_started', 'source_name', 'started_at'),
+    )
+
+# Running totals per source, updated in the same transaction as each 'etl_runs' insert,
+# so /api/stats reads one row per source however long the history gets
+class ETLRunSummary(Base):
+    __tablename__ = 'etl_run_summaries'
+    source_name = Column(String, primary_key=True)
+    total_runs = Column(Integer, nullable=False, default=0)
+    successful_runs = Column(Integer, nullable=False, default=0)
+    total_duration_ms = Column(BigInteger, nullable=False, default=0)
+    total_rows_fetched = Column(BigInteger, nullable=False, default=0)
+    total_rows_written = Column(BigInteger, nullable=False, default=0)
+    total_rows_skipped = Column(BigInteger, nullable=False, default=0)
+    total_bytes_fetched = Column(BigInteger, nullable=False, default=0)
+    last_run_status = Column(String, nullable=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    last_successful_run = Column(DateTime(timezone=True), nullable=True)
+    last_failed_run = Column(DateTime(timezone=True), nullable=True)
+
+# Latest data generation and its commit time (a single row, id=1), written in the same
+# transaction as the load: every API replica derives Last-Modified from it
+class DataGeneration(Base):
+    __tablename__ = 'data_generation'
+    id = Column(Integer, primary_key=True)
+    generation = Column(BigInteger, nullable=False)
+    committed_at = Column(DateTime(timezone=True), nullable=False)
+
 # --- 2. Raw Data Models (Database Tables - used by ETL ingestion) ---
 class RawCoinGecko(Base):
     __tablename__ = 'raw_coingecko'
@@ -52,7 +101,84 @@ class NormalizedMarketData(Base):
     percent_change_24h = Column(Float)
     last_updated_at = Column(DateTime(timezone=True), nullable=True)
     ingestion_timestamp = Column(DateTime(timezone=True), default=func.now())
-    __table_args__ = (PrimaryKeyConstraint('source_record_id', 'source_name'),)
+    # Digest of the loaded values; the ETL skips incoming rows whose digest is unchanged
+    content_hash = Column(String(32), nullable=True)
+    __table_args__ = (
+        PrimaryKeyConstraint('source_record_id', 'source_name'),
+        # Keyset pagination index: matches ORDER BY (market_cap_usd, source_record_id, source_name) DESC,
+        # so every page is an index range scan no matter how deep the cursor is.
+        Index('ix_normalized_data_keyset', 'market_cap_usd', 'source_record_id', 'source_name'),
+        # Symbols are stored upper-cased by the ETL. Prefix matches are sent as a byte-order
+        # range (symbol ~>=~ 'BT' AND symbol ~<~ 'BU', see crypto_service.SymbolPrefix) that this
+        # varchar_pattern_ops index serves regardless of the database collation; the planner
+        # picks it over the keyset index when the prefix is selective.
+        Index('ix_normalized_data_symbol_prefix', 'symbol', postgresql_ops={'symbol': 'varchar_pattern_ops'}),
+    )
+
+
+# --- 3b. Price History Models (append-only time series + OHLCV rollups) ---
+class PriceHistory(Base):
+    """
+    One row per observed price of a coin, appended by the ETL load stage.
+    Range-partitioned by month on observed_at (partitions are created on demand by
+    services/database_service.ensure_history_partitions).
+    """
+    __tablename__ = 'price_history'
+    source_record_id = Column(String, nullable=False)
+    source_name = Column(String, nullable=False)
+    symbol = Column(String(10), nullable=False)
+    observed_at = Column(DateTime(timezone=True), nullable=False)
+    price_usd = Column(Float, nullable=False)
+    market_cap_usd = Column(Float)
+    volume_24h_usd = Column(Float)
+    __table_args__ = (
+        # The partition key has to be part of the primary key
+        PrimaryKeyConstraint('source_record_id', 'source_name', 'observed_at'),
+        {'postgresql_partition_by': 'RANGE (observed_at)'},
+    )
+
+class PriceRollup(Base):
+    """
+    Precomputed OHLCV candles per coin for the '1m', '1h' and '1d' resolutions,
+    maintained incrementally from each loaded batch of PriceHistory rows.
+    """
+    __tablename__ = 'price_rollups'
+    source_record_id = Column(String, nullable=False)
+    source_name = Column(String, nullable=False)
+    resolution = Column(String(2), nullable=False)  # '1m', '1h' or '1d'
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    symbol = Column(String(10), nullable=False)
+    open_usd = Column(Float, nullable=False)
+    high_usd = Column(Float, nullable=False)
+    low_usd = Column(Float, nullable=False)
+    close_usd = Column(Float, nullable=False)
+    volume_24h_usd = Column(Float)  # Last reported 24h volume in the bucket
+    samples = Column(Integer, nullable=False, default=1)
+    # Observation times of open/close, so late rows merge into the candle correctly
+    first_observed_at = Column(DateTime(timezone=True), nullable=False)
+    last_observed_at = Column(DateTime(timezone=True), nullable=False)
+    __table_args__ = (
+        PrimaryKeyConstraint('source_record_id', 'source_name', 'resolution', 'bucket_start'),
+    )
+
+
+# --- 3c. Consolidated Quotes (cross-source merge, refreshed by the ETL after loading) ---
+class ConsolidatedQuote(Base):
+    __tablename__ = 'consolidated_quotes'
+    symbol = Column(String(10), primary_key=True)
+    name = Column(String(100), nullable=False)
+    price_usd = Column(Float, nullable=False)          # 24h-volume-weighted across sources
+    min_price_usd = Column(Float, nullable=False)
+    max_price_usd = Column(Float, nullable=False)
+    price_divergence_pct = Column(Float)               # (max - min) / price_usd * 100
+    market_cap_usd = Column(Float, nullable=False)     # Largest reported market cap
+    volume_24h_usd = Column(Float)                     # Sum over sources
+    source_count = Column(Integer, nullable=False)
+    sources = Column(String, nullable=False)           # e.g. 'coingecko,coinpaprika'
+    updated_at = Column(DateTime(timezone=True), default=func.now())
+    __table_args__ = (
+        Index('ix_consolidated_quotes_market_cap', 'market_cap_usd'),
+    )
 
 
 # --- 4. Pydantic Schemas (For API Validation and Documentation) ---
@@ -80,6 +206,7 @@ class ETLCheckpointSchema(BaseModel):
     last_run_status: str
     records_processed: int
     duration_ms: int
+    rows_per_second: Optional[float] = None
     last_start_time: datetime
     last_end_time: Optional[datetime]
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
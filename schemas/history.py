@@ -0,0 +1,26 @@
+# schemas/history.py
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from datetime import datetime
+
+class HistoryPoint(BaseModel):
+    """One OHLCV candle from the 'price_rollups' table."""
+    bucket_start: datetime
+    open_usd: float
+    high_usd: float
+    low_usd: float
+    close_usd: float
+    volume_24h_usd: Optional[float] = None
+    samples: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class HistoryResponse(BaseModel):
+    """Response of GET /api/history/{symbol}."""
+    symbol: str
+    source_name: Optional[str] = None
+    source_record_id: Optional[str] = None
+    resolution: str  # '1m', '1h' or '1d'
+    start: datetime
+    end: datetime
+    points: List[HistoryPoint]
@@ -12,8 +12,8 @@ class MarketData(BaseModel):
     name: str
     current_price_usd: float
     market_cap_usd: float
-    volume_24h_usd: float
-    percent_change_24h: float
+    volume_24h_usd: Optional[float] = None
+    percent_change_24h: Optional[float] = None
     last_updated_at: Optional[datetime]
 
     # critical: allows pydantic to read sqlalchemy objects
@@ -22,9 +22,10 @@ class MarketData(BaseModel):
 class PaginationMetadata(BaseModel):
     request_id: str
     api_latency_ms: int
-    total_records: int
+    total_records: Optional[int] = None  # None when count='none'
     limit: int
     offset: int
+    next_cursor: Optional[str] = None  # Pass back as 'cursor' to fetch the next page
     filter_applied: Dict[str, Optional[Any]] = {}
 
 class PaginatedResponse(BaseModel):
@@ -0,0 +1,29 @@
+# schemas/quotes.py
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from datetime import datetime
+
+class ConsolidatedQuote(BaseModel):
+    """One row of the 'consolidated_quotes' table (all sources merged per symbol)."""
+    symbol: str
+    name: str
+    price_usd: float
+    min_price_usd: float
+    max_price_usd: float
+    price_divergence_pct: Optional[float] = None
+    market_cap_usd: float
+    volume_24h_usd: Optional[float] = None
+    source_count: int
+    sources: str
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class QuotesMetadata(BaseModel):
+    limit: int
+    offset: int
+
+class QuotesResponse(BaseModel):
+    """Response of GET /api/quotes."""
+    metadata: QuotesMetadata
+    data: List[ConsolidatedQuote]
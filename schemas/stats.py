@@ -11,6 +11,12 @@ class StatsResponse(BaseModel):
     total_records_processed: int
     avg_run_duration_seconds: float
     success_rate: float # 0.0 to 1.0
+    # From the 'etl_run_summaries' running totals
+    total_runs: int = 0
+    last_run_status: Optional[str] = None
+    total_rows_skipped: int = 0
+    total_bytes_fetched: int = 0
+    avg_rows_per_second: Optional[float] = None  # Rows written per second of run time
 
 # Note: If your /stats endpoint returns a *list* of these, 
 # then the import `from schemas.stats import StatsResponse` is correct.
\ No newline at end of file
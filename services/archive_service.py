@@ -0,0 +1,216 @@
+# services/archive_service.py
+
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+import importlib.util
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Optional: 'zstandard' compresses API JSON ~2x better and decodes ~3x faster than zlib
+_ZSTD_AVAILABLE = importlib.util.find_spec("zstandard") is not None
+if _ZSTD_AVAILABLE:
+    import zstandard
+
+# A corrupt compressed payload: the frame is skipped, later frames are still read
+_DECOMPRESS_ERRORS = (zlib.error, ValueError) + ((zstandard.ZstdError,) if _ZSTD_AVAILABLE else ())
+
+# Segment file layout: FILE_MAGIC, then one frame per archived response:
+#   <codec:u8> <fetched_at:f64 epoch seconds> <crc32 of payload:u32> <compressed length:u32> <compressed bytes>
+FILE_MAGIC = b"KRAW1\n"
+FRAME_HEADER = struct.Struct("<BdII")
+CODECS = {"zlib": 1, "zstd": 2}
+SEGMENT_SUFFIX = ".seg"
+
+
+def _codec_name() -> str:
+    codec = settings.ARCHIVE_CODEC.lower()
+    if codec == "zstd" and not _ZSTD_AVAILABLE:
+        logger.warning("ARCHIVE_CODEC=zstd but 'zstandard' is not installed; using zlib")
+        return "zlib"
+    if codec not in CODECS:
+        raise ValueError(f"Unknown ARCHIVE_CODEC '{codec}' (expected one of {', '.join(CODECS)})")
+    return codec
+
+
+def _decompress(codec_id: int, data) -> bytes:
+    # 'data' is a memoryview slice of the mapped file: both codecs read it without a copy
+    if codec_id == CODECS["zlib"]:
+        return zlib.decompress(data)
+    if codec_id == CODECS["zstd"]:
+        if not _ZSTD_AVAILABLE:
+            raise RuntimeError("Segment uses zstd but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown codec id {codec_id}")
+
+
+def source_dir(source_name: str, root: Optional[str] = None) -> str:
+    return os.path.join(root or settings.ARCHIVE_DIR, source_name)
+
+
+class ArchiveWriter:
+    """
+    Appends compressed raw API responses of one source to a new segment file.
+    The file is created on the first append, so runs that fetch nothing leave no segment.
+    Frames are only ever appended; a crash mid-frame is detected (and skipped) on replay.
+    """
+
+    def __init__(self, source_name: str, root: Optional[str] = None):
+        self.source_name = source_name
+        self.codec = _codec_name()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self.path = os.path.join(source_dir(source_name, root), f"{stamp}-{os.getpid()}{SEGMENT_SUFFIX}")
+        self._file = None
+        self._compressor = (
+            zstandard.ZstdCompressor(level=settings.ARCHIVE_COMPRESSION_LEVEL) if self.codec == "zstd" else None
+        )
+        self.frames = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def append(self, payload: bytes, fetched_at: Optional[datetime] = None) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "ab")
+            self._file.write(FILE_MAGIC)
+        if self._compressor is not None:
+            compressed = self._compressor.compress(payload)
+        else:
+            compressed = zlib.compress(payload, min(settings.ARCHIVE_COMPRESSION_LEVEL, 9))
+        fetched_at = (fetched_at or datetime.now(timezone.utc)).timestamp()
+        self._file.write(FRAME_HEADER.pack(CODECS[self.codec], fetched_at, zlib.crc32(payload), len(compressed)))
+        self._file.write(compressed)
+        self.frames += 1
+        self.raw_bytes += len(payload)
+        self.stored_bytes += len(compressed)
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        ratio = self.raw_bytes / self.stored_bytes if self.stored_bytes else 0
+        logger.info(
+            f"{self.source_name}: archived {self.frames} responses to {self.path} "
+            f"({self.raw_bytes} -> {self.stored_bytes} bytes, {ratio:.1f}x {self.codec})"
+        )
+        prune_archive(self.source_name, root=os.path.dirname(os.path.dirname(self.path)))
+
+
+def iter_segment(path: str) -> Iterator[Tuple[datetime, bytes]]:
+    """
+    Yields (fetched_at, raw payload) for every frame of a segment file.
+    The file is memory-mapped and frames are decompressed straight from memoryview
+    slices of the mapping, so reading is bounded by decompression, not by copies.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size <= len(FILE_MAGIC):
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                if view[:len(FILE_MAGIC)] != FILE_MAGIC:
+                    raise ValueError(f"{path} is not an archive segment")
+                offset = len(FILE_MAGIC)
+                while offset + FRAME_HEADER.size <= len(view):
+                    codec_id, fetched_at, crc, length = FRAME_HEADER.unpack_from(view, offset)
+                    start = offset + FRAME_HEADER.size
+                    if start + length > len(view):
+                        logger.warning(f"{path}: truncated frame at byte {offset}, stopping")
+                        break
+                    offset, frame_offset = start + length, offset
+                    compressed = view[start:start + length]
+                    try:
+                        payload = _decompress(codec_id, compressed)
+                    except _DECOMPRESS_ERRORS as e:
+                        logger.warning(f"{path}: undecodable frame at byte {frame_offset} ({e}), skipping frame")
+                        continue
+                    finally:
+                        compressed.release()
+                    if zlib.crc32(payload) != crc:
+                        logger.warning(f"{path}: checksum mismatch at byte {frame_offset}, skipping frame")
+                        continue
+                    yield datetime.fromtimestamp(fetched_at, tz=timezone.utc), payload
+            finally:
+                # The mapping can't close while a memoryview still references it
+                view.release()
+
+
+def list_segments(source_name: str, root: Optional[str] = None) -> List[str]:
+    """Segment files of a source, oldest first (names start with the UTC creation time)."""
+    directory = source_dir(source_name, root)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def iter_archive(
+    source_name: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    root: Optional[str] = None,
+) -> Iterator[Tuple[datetime, bytes]]:
+    """
+    Every archived response of a source in fetch order, optionally within [since, until].
+    Naive bounds are taken as UTC (frame timestamps are UTC).
+    """
+    since = since.replace(tzinfo=timezone.utc) if since and since.tzinfo is None else since
+    until = until.replace(tzinfo=timezone.utc) if until and until.tzinfo is None else until
+    for path in list_segments(source_name, root):
+        for fetched_at, payload in iter_segment(path):
+            if since and fetched_at < since:
+                continue
+            if until and fetched_at > until:
+                continue
+            yield fetched_at, payload
+
+
+def prune_archive(
+    source_name: str,
+    max_age_days: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+    root: Optional[str] = None,
+) -> List[str]:
+    """
+    Deletes a source's segments last written more than max_age_days ago, then the oldest
+    ones until the rest fit in max_bytes (defaults: ARCHIVE_RETENTION_DAYS / ARCHIVE_MAX_BYTES,
+    0 = no limit). The newest segment is never deleted. Returns the deleted paths.
+    """
+    max_age_days = settings.ARCHIVE_RETENTION_DAYS if max_age_days is None else max_age_days
+    max_bytes = settings.ARCHIVE_MAX_BYTES if max_bytes is None else max_bytes
+    segments = []
+    for path in list_segments(source_name, root):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # pruned concurrently by another replica
+        segments.append((path, stat.st_mtime, stat.st_size))
+    if len(segments) < 2:
+        return []
+
+    total = sum(size for _, _, size in segments)
+    cutoff = time.time() - max_age_days * 86400
+    deleted = []
+    for path, mtime, size in segments[:-1]:
+        expired = max_age_days > 0 and mtime < cutoff
+        over_budget = max_bytes > 0 and total > max_bytes
+        if not (expired or over_budget):
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        deleted.append(path)
+    if deleted:
+        logger.info(f"{source_name}: pruned {len(deleted)} archive segments ({total} bytes kept)")
+    return deleted
@@ -0,0 +1,250 @@
+# services/cache_service.py
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+import logging
+import threading
+import time
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned by ResponseCache.get() on a miss (None is a valid cached value)
+MISSING = object()
+
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    return moment.replace(tzinfo=timezone.utc) if moment is not None and moment.tzinfo is None else moment
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with a per-entry TTL for read endpoints.
+
+    Entries are dropped wholesale whenever the data generation changes. The generation is
+    bumped locally by bulk_upsert_normalized_data() and, for ETL runs in another process,
+    on their NOTIFY (services/notify_service.py) or from the 'data_generation_seq' sequence
+    polled every few seconds.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, generation_poll_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation_poll_seconds = generation_poll_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._remote_generation: Optional[int] = None
+        self._next_generation_poll = 0.0
+        self._remote_modified_at: Optional[datetime] = None
+        self._remote_runs_at: Optional[datetime] = None
+        # Wall-clock time the current generation was first seen here: Last-Modified fallback
+        # when no shared commit time is stored (e.g. SQLite)
+        self.generation_seen_at = time.time()
+        # Counters (exposed via stats())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Tuple, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def bump_generation(self) -> int:
+        """Invalidates every entry. Called after new data is committed."""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+            self.generation_seen_at = time.time()
+            return self.generation
+
+    def needs_generation_check(self) -> bool:
+        return time.monotonic() >= self._next_generation_poll
+
+    def expire_generation_check(self) -> None:
+        """Makes the next request re-read the generation (new data is known to be committed)."""
+        self._next_generation_poll = 0.0
+
+    @property
+    def data_generation(self) -> Optional[int]:
+        """Last 'data_generation_seq' value read from PostgreSQL (shared by every process); None if unknown."""
+        return self._remote_generation
+
+    @property
+    def data_modified_at(self) -> Optional[datetime]:
+        """Commit time of the latest data generation ('data_generation'); None if unknown."""
+        return self._remote_modified_at
+
+    @property
+    def runs_recorded_at(self) -> Optional[datetime]:
+        """
+        Latest ETL run recorded in 'etl_run_summaries'. Runs that load nothing leave the data
+        generation alone but still change the run statistics keyed on this.
+        """
+        return self._remote_runs_at
+
+    def observe_generation(
+        self,
+        remote_generation: Optional[int],
+        modified_at: Optional[datetime] = None,
+        runs_at: Optional[datetime] = None,
+    ) -> None:
+        """Records the generation read from PostgreSQL and invalidates if it moved."""
+        self._next_generation_poll = time.monotonic() + self.generation_poll_seconds
+        if remote_generation is None:
+            return
+        self._remote_modified_at = _as_utc(modified_at)
+        self._remote_runs_at = _as_utc(runs_at)
+        if self._remote_generation is not None and remote_generation != self._remote_generation:
+            self.bump_generation()
+        self._remote_generation = remote_generation
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+    generation_poll_seconds=settings.CACHE_GENERATION_POLL_SECONDS,
+)
+
+
+def make_cache_key(route: str, **params) -> Tuple:
+    """Normalized cache key: route name plus the sorted query parameters."""
+    normalized = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, str):
+            value = value.strip()
+        elif isinstance(value, list):
+            value = tuple(value)
+        normalized.append((name, value))
+    return (route, tuple(normalized))
+
+
+GENERATION_SQL = text(
+    "SELECT s.last_value, g.committed_at, (SELECT max(last_run_at) FROM etl_run_summaries) "
+    "FROM data_generation_seq s LEFT JOIN data_generation g ON g.id = 1"
+)
+NO_GENERATION = (None, None, None)
+
+
+def read_data_generation(db: Session) -> Tuple[Optional[int], Optional[datetime], Optional[datetime]]:
+    """
+    Reads the data generation bumped by every ETL load that wrote rows, its commit time (see
+    commit_new_generation) and the latest recorded ETL run; all None if unavailable.
+    """
+    try:
+        row = db.execute(GENERATION_SQL).first()
+    except Exception as e:
+        logger.warning(f"Could not read data generation: {e}")
+        db.rollback()
+        return NO_GENERATION
+    return tuple(row) if row is not None else NO_GENERATION
+
+
+async def read_data_generation_async(db: AsyncSession) -> Tuple[Optional[int], Optional[datetime], Optional[datetime]]:
+    """Async variant of read_data_generation()."""
+    try:
+        row = (await db.execute(GENERATION_SQL)).first()
+    except Exception as e:
+        logger.warning(f"Could not read data generation: {e}")
+        await db.rollback()
+        return NO_GENERATION
+    return tuple(row) if row is not None else NO_GENERATION
+
+
+def refresh_generation(db: Session) -> None:
+    """Polls the data generation if CACHE_GENERATION_POLL_SECONDS have passed since the last read."""
+    if response_cache.needs_generation_check():
+        response_cache.observe_generation(*read_data_generation(db))
+
+
+async def refresh_generation_async(db: AsyncSession) -> None:
+    """Async variant of refresh_generation()."""
+    if response_cache.needs_generation_check():
+        response_cache.observe_generation(*await read_data_generation_async(db))
+
+
+def cached_call(db: Session, key: Tuple, loader: Callable[[], Any], ttl_seconds: Optional[float] = None) -> Any:
+    """
+    Returns the cached value for 'key', or runs loader() and caches its result.
+    Polls the data generation first (at most every CACHE_GENERATION_POLL_SECONDS).
+    """
+    refresh_generation(db)
+
+    value = response_cache.get(key)
+    if value is MISSING:
+        generation = response_cache.generation
+        value = loader()
+        # Don't cache a result that may predate an invalidation that raced with the loader
+        if response_cache.generation == generation:
+            response_cache.set(key, value, ttl_seconds)
+    return value
+
+
+async def cached_call_async(
+    db: AsyncSession, key: Tuple, loader: Callable[[], Awaitable[Any]], ttl_seconds: Optional[float] = None
+) -> Any:
+    """Async variant of cached_call(); 'loader' is a coroutine function."""
+    await refresh_generation_async(db)
+
+    value = response_cache.get(key)
+    if value is MISSING:
+        generation = response_cache.generation
+        value = await loader()
+        if response_cache.generation == generation:
+            response_cache.set(key, value, ttl_seconds)
+    return value
+
+
+async def cached_query(
+    db,
+    key: Tuple,
+    sync_loader: Callable[[], Any],
+    async_loader: Callable[[], Awaitable[Any]],
+    ttl_seconds: Optional[float] = None,
+) -> Any:
+    """
+    Route helper: awaits 'async_loader' when the request got an AsyncSession (USE_ASYNC_DB),
+    otherwise runs the blocking 'sync_loader' in the threadpool. Both paths share the cache.
+    """
+    if isinstance(db, AsyncSession):
+        return await cached_call_async(db, key, async_loader, ttl_seconds)
+    return await run_in_threadpool(cached_call, db, key, sync_loader, ttl_seconds)
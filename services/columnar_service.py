@@ -0,0 +1,165 @@
+# services/columnar_service.py
+
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+import importlib.util
+import math
+
+# Optional: numeric columns are coerced with one NumPy call per column when it is installed
+_NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+if _NUMPY_AVAILABLE:
+    import numpy as np
+
+
+class ColumnBatch:
+    """
+    A page of normalized rows stored column-wise: {column name: list of values}, all columns
+    the same length. The ETL transform and load stages work on whole columns (hashing,
+    filtering, COPY) instead of building and re-copying one dict per row.
+    Iterating yields dict rows for the code paths that still work row by row.
+    """
+
+    __slots__ = ("columns", "length")
+
+    def __init__(self, columns: Dict[str, list], length: Optional[int] = None):
+        self.columns = columns
+        if length is None:
+            length = len(next(iter(columns.values()))) if columns else 0
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Dict]:
+        names = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(names, values))
+
+    def column(self, name: str) -> list:
+        """Values of a column; a column the batch doesn't carry reads as all None."""
+        values = self.columns.get(name)
+        return values if values is not None else [None] * self.length
+
+    def tuples(self, names: Sequence[str]) -> Iterator[tuple]:
+        """Row tuples in the order of 'names' (what COPY and INSERT consume)."""
+        return zip(*(self.columns.get(name) or repeat(None, self.length) for name in names))
+
+    def take(self, indices: List[int]) -> "ColumnBatch":
+        """The rows at 'indices', in that order."""
+        if len(indices) == self.length:
+            return self
+        return ColumnBatch({name: [values[i] for i in indices] for name, values in self.columns.items()}, len(indices))
+
+    def slices(self, size: int) -> Iterator["ColumnBatch"]:
+        if self.length <= size:
+            yield self
+            return
+        for start in range(0, self.length, size):
+            yield ColumnBatch(
+                {name: values[start:start + size] for name, values in self.columns.items()},
+                min(size, self.length - start),
+            )
+
+    def to_rows(self) -> List[Dict]:
+        return list(self)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict], names: Sequence[str]) -> "ColumnBatch":
+        rows = list(rows)
+        return cls({name: [row.get(name) for row in rows] for name in names}, len(rows))
+
+    @classmethod
+    def concat(cls, batches: Sequence["ColumnBatch"]) -> "ColumnBatch":
+        batches = [batch for batch in batches if len(batch)]
+        if len(batches) == 1:
+            return batches[0]
+        names = []
+        for batch in batches:
+            names.extend(name for name in batch.columns if name not in names)
+        columns = {name: [] for name in names}
+        for batch in batches:
+            for name in names:
+                columns[name].extend(batch.column(name))
+        return cls(columns, sum(len(batch) for batch in batches))
+
+
+# =========================================================
+# Bulk coercion helpers
+# =========================================================
+def _to_float(value, fill: Optional[float]) -> Optional[float]:
+    if value is None:
+        return fill
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return fill
+    return number if math.isfinite(number) else fill
+
+
+def float_column(values: list, fill: Optional[float] = None) -> list:
+    """
+    Coerces a column to floats: None, NaN, +-inf and unparsable values become 'fill'
+    (0 for NOT NULL columns, None otherwise). With NumPy the clean case is a single
+    array conversion; columns holding strings or other odd types take the per-value path.
+    """
+    if _NUMPY_AVAILABLE and values:
+        try:
+            array = np.array(values, dtype=float)  # None -> nan
+        except (TypeError, ValueError):
+            pass
+        else:
+            invalid = ~np.isfinite(array)
+            if not invalid.any():
+                return array.tolist()
+            if fill is not None:
+                array[invalid] = fill
+                return array.tolist()
+            result = array.astype(object)
+            result[invalid] = None
+            return result.tolist()
+    try:
+        floats = [fill if value is None else float(value) for value in values]
+    except (TypeError, ValueError):
+        return [_to_float(value, fill) for value in values]
+    present = floats if fill is not None else [value for value in floats if value is not None]
+    if all(map(math.isfinite, present)):
+        return floats
+    return [_to_float(value, fill) for value in floats]
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """
+    Parses provider ISO-8601 timestamps ('...Z' included); None if missing or malformed.
+    Values without an offset (e.g. a date-only '2024-01-01') are taken as UTC, so every
+    result compares with the timezone-aware timestamps stored and archived.
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif not value:
+        return None
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def timestamp_column(values: list) -> list:
+    """
+    Validates an ISO-8601 column: malformed values become None, valid ones keep their
+    original text (COPY parses it server-side; stringifying datetimes again for the CSV
+    and the content hash would cost more than the parse).
+    """
+    result = []
+    append = result.append
+    fromisoformat = datetime.fromisoformat
+    for value in values:
+        try:
+            # Python 3.11+ parses the common ISO forms ('Z' included) in one C call
+            fromisoformat(value)
+        except (TypeError, ValueError):
+            value = value if parse_timestamp(value) is not None else None
+        append(value)
+    return result
@@ -1,48 +1,334 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import Optional, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Boolean, Row, bindparam, func, desc, select, text, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from typing import AsyncIterator, Iterator, Optional, List, Tuple
 from fastapi import HTTPException
 import httpx 
+import asyncio
 import logging
+from collections import Counter
+import random
+import base64
+import json
+import sys
+import time
 from datetime import datetime
 
 # --- CRITICAL IMPORTS ---
 from models.etl_models import NormalizedMarketData, ETLCheckpoint # DB Models
+from core.config import settings
+from services.http_client import get_http_client, get_source_config
+from services.archive_service import ArchiveWriter, iter_archive
+from services.columnar_service import ColumnBatch, float_column, timestamp_column
+from services.serialization import loads
 
 logger = logging.getLogger(__name__)
 
 # --- Configuration for ETL (External API URLs) ---
-COINPAPRIKA_API_URL = "https://api.coinpaprika.com/v1/tickers" 
-COINGECKO_API_URL = "https://api.coingecko.com/api/v3/coins/markets"
+# Endpoints under the configurable COINPAPRIKA_BASE_URL / COINGECKO_BASE_URL (core/config.Settings)
+COINPAPRIKA_TICKERS_PATH = "/tickers"
+COINGECKO_MARKETS_PATH = "/coins/markets"
+
+
+def coinpaprika_tickers_url() -> str:
+    return settings.COINPAPRIKA_BASE_URL.rstrip("/") + COINPAPRIKA_TICKERS_PATH
+
+
+def coingecko_markets_url() -> str:
+    return settings.COINGECKO_BASE_URL.rstrip("/") + COINGECKO_MARKETS_PATH
 
 # =========================================================
 # 1. Internal Data Service (Reads from DB for API)
 # =========================================================
-def get_market_data(db: Session, limit: int, offset: int, symbol: Optional[str]) -> Tuple[List[NormalizedMarketData], int]:
+
+# Page order for /market-data and /api/data. All three keys sort the same way so the
+# composite index 'ix_normalized_data_keyset' can serve it with a single backward scan.
+KEYSET_ORDER = (
+    desc(NormalizedMarketData.market_cap_usd),
+    desc(NormalizedMarketData.source_record_id),
+    desc(NormalizedMarketData.source_name),
+)
+
+# How long the pg_class row estimate is reused before asking PostgreSQL again
+TOTAL_ESTIMATE_TTL_SECONDS = 60.0
+_total_estimate_cache = {"value": None, "expires_at": 0.0}
+
+# Columns the read endpoints return (MarketData / MarketDataSchema fields). Selected as a
+# Core projection: plain Row tuples, no ORM identity map or attribute instrumentation.
+MARKET_DATA_COLUMNS = (
+    NormalizedMarketData.source_record_id,
+    NormalizedMarketData.source_name,
+    NormalizedMarketData.symbol,
+    NormalizedMarketData.name,
+    NormalizedMarketData.current_price_usd,
+    NormalizedMarketData.market_cap_usd,
+    NormalizedMarketData.volume_24h_usd,
+    NormalizedMarketData.percent_change_24h,
+    NormalizedMarketData.last_updated_at,
+)
+
+COUNT_MODES = ("exact", "estimate", "none")
+SYMBOL_MATCH_MODES = ("exact", "prefix")
+
+
+def parse_symbols(symbols: Optional[str]) -> List[str]:
+    """Splits a 'BTC,ETH,SOL' filter into a de-duplicated list of upper-case symbols."""
+    if not symbols:
+        return []
+    parsed = []
+    for part in symbols.split(","):
+        part = part.strip().upper()
+        if part and part not in parsed:
+            parsed.append(part)
+    return parsed
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string above every string that starts with 'prefix' (code point order)."""
+    while prefix:
+        last = ord(prefix[-1])
+        if last < sys.maxunicode:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+
+class SymbolPrefix(ColumnElement):
     """
-    Retrieves paginated and filtered market data directly from PostgreSQL.
-    Used by your FastAPI endpoint (/market-data).
+    'column starts with prefix' as an explicit range, prefix <= column < next prefix.
+    On PostgreSQL it compiles to the byte-order operators (~>=~ / ~<~) of
+    ix_normalized_data_symbol_prefix (varchar_pattern_ops), so the planner costs the
+    range from the column histogram like any other index range: a rare prefix scans that
+    index and sorts the few matches, a prefix matching most rows keeps the keyset scan.
+    Elsewhere (SQLite, binary collation) it is a plain >= / < range.
     """
-    
-    # 1. Build the Query
-    query = db.query(NormalizedMarketData)
 
-    # 2. Apply Filter 
+    type = Boolean()
+    inherit_cache = True
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("lower", InternalTraversal.dp_clauseelement),
+        ("upper", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, column, prefix: str):
+        self.column = column
+        self.lower = bindparam("symbol_prefix_lower", prefix, unique=True)
+        upper = _prefix_upper_bound(prefix)
+        self.upper = bindparam("symbol_prefix_upper", upper, unique=True) if upper is not None else None
+
+
+def _compile_prefix(element: SymbolPrefix, compiler, ge: str, lt: str, **kw) -> str:
+    column = compiler.process(element.column, **kw)
+    sql = f"{column} {ge} {compiler.process(element.lower, **kw)}"
+    if element.upper is not None:
+        sql += f" AND {column} {lt} {compiler.process(element.upper, **kw)}"
+    return f"({sql})"
+
+
+@compiles(SymbolPrefix)
+def _compile_prefix_default(element, compiler, **kw):
+    return _compile_prefix(element, compiler, ">=", "<", **kw)
+
+
+@compiles(SymbolPrefix, "postgresql")
+def _compile_prefix_postgresql(element, compiler, **kw):
+    return _compile_prefix(element, compiler, "~>=~", "~<~", **kw)
+
+
+def apply_symbol_filter(query, symbol: Optional[str], symbols: Optional[List[str]] = None, match: str = "exact"):
+    """
+    Adds the symbol filter in a form the symbol indexes can serve.
+    Symbols are stored upper-case, so the input is normalized instead of using ILIKE.
+    """
+    if symbols:
+        # One indexed lookup for the whole set: symbol IN ('BTC', 'ETH', ...)
+        query = query.filter(NormalizedMarketData.symbol.in_(symbols))
     if symbol:
-        # Filter for the symbol (case-insensitive)
-        query = query.filter(NormalizedMarketData.symbol.ilike(f"%{symbol}%"))
-
-    # 3. Get Total Count (Required for pagination metadata)
-    total_count = query.count()
-
-    # 4. Fetch the Data
-    # Sort by Market Cap (descending) 
-    data_list = query.order_by(desc(NormalizedMarketData.market_cap_usd)) \
-                      .offset(offset) \
-                      .limit(limit) \
-                      .all()
-    
-    return data_list, total_count
+        symbol = symbol.strip().upper()
+        if match == "prefix":
+            query = query.filter(SymbolPrefix(NormalizedMarketData.symbol, symbol))
+        else:
+            query = query.filter(NormalizedMarketData.symbol == symbol)
+    return query
+
+
+def encode_cursor(row: Row) -> str:
+    """Builds the opaque cursor pointing just after the given row."""
+    payload = json.dumps([row.market_cap_usd, row.source_record_id, row.source_name])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str, str]:
+    """Decodes a cursor produced by encode_cursor(). Raises HTTP 400 if it was tampered with."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        market_cap, record_id, source_name = json.loads(base64.urlsafe_b64decode(padded))
+        return float(market_cap), str(record_id), str(source_name)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+
+ESTIMATE_TOTAL_SQL = text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'normalized_data'::regclass")
+EXACT_TOTAL_STMT = select(func.count()).select_from(NormalizedMarketData)
+# Below this estimate COUNT(*) is cheap and exact. Covers reltuples = -1 (never analyzed)
+# and the stale near-zero estimates of a freshly loaded table.
+ESTIMATE_EXACT_BELOW = 100_000
+
+
+def _cached_estimate() -> Optional[int]:
+    if _total_estimate_cache["value"] is None or time.monotonic() >= _total_estimate_cache["expires_at"]:
+        return None
+    return _total_estimate_cache["value"]
+
+
+def _usable_estimate(estimate) -> Optional[int]:
+    if estimate is None or estimate < ESTIMATE_EXACT_BELOW:
+        return None
+    return int(estimate)
+
+
+def _store_estimate(estimate) -> int:
+    _total_estimate_cache["value"] = max(int(estimate or 0), 0)
+    _total_estimate_cache["expires_at"] = time.monotonic() + TOTAL_ESTIMATE_TTL_SECONDS
+    return _total_estimate_cache["value"]
+
+
+def estimate_total_count(db: Session) -> int:
+    """
+    Returns the planner's row estimate for 'normalized_data' (pg_class.reltuples).
+    Cached in-process so large tables never pay for a full COUNT(*); small or
+    never-analyzed tables are counted exactly instead.
+    """
+    cached = _cached_estimate()
+    if cached is not None:
+        return cached
+    estimate = _usable_estimate(db.execute(ESTIMATE_TOTAL_SQL).scalar())
+    if estimate is None:
+        estimate = db.execute(EXACT_TOTAL_STMT).scalar()
+    return _store_estimate(estimate)
+
+
+async def estimate_total_count_async(db: AsyncSession) -> int:
+    """Async variant of estimate_total_count()."""
+    cached = _cached_estimate()
+    if cached is not None:
+        return cached
+    estimate = _usable_estimate((await db.execute(ESTIMATE_TOTAL_SQL)).scalar())
+    if estimate is None:
+        estimate = (await db.execute(EXACT_TOTAL_STMT)).scalar()
+    return _store_estimate(estimate)
+
+
+def build_market_data_query(
+    limit: int,
+    offset: int,
+    symbol: Optional[str],
+    cursor: Optional[str] = None,
+    symbols: Optional[List[str]] = None,
+    symbol_match: str = "exact",
+):
+    """
+    Builds the (page, filtered) SELECT statements shared by the sync and async readers.
+    The page statement fetches limit + 1 rows so the caller can tell if another page exists.
+    """
+    filtered = apply_symbol_filter(select(*MARKET_DATA_COLUMNS), symbol, symbols, symbol_match)
+
+    # Sort by Market Cap (descending), tie-broken by the primary key for a stable order
+    page = filtered.order_by(*KEYSET_ORDER)
+    if cursor:
+        page = page.where(
+            tuple_(
+                NormalizedMarketData.market_cap_usd,
+                NormalizedMarketData.source_record_id,
+                NormalizedMarketData.source_name,
+            ) < tuple_(*decode_cursor(cursor))
+        )
+    else:
+        page = page.offset(offset)
+
+    return page.limit(limit + 1), filtered
+
+
+def _count_strategy(count_mode: str, is_filtered: bool) -> Optional[str]:
+    # The estimate only describes the whole table, so filtered queries stay exact
+    if count_mode == "exact" or (count_mode == "estimate" and is_filtered):
+        return "exact"
+    if count_mode == "estimate":
+        return "estimate"
+    return None
+
+
+def _split_page(data_list: list, limit: int) -> Tuple[list, Optional[str]]:
+    next_cursor = None
+    if len(data_list) > limit:
+        data_list = data_list[:limit]
+        next_cursor = encode_cursor(data_list[-1])
+    return data_list, next_cursor
+
+
+def get_market_data(
+    db: Session,
+    limit: int,
+    offset: int,
+    symbol: Optional[str],
+    cursor: Optional[str] = None,
+    count_mode: str = "exact",
+    symbols: Optional[List[str]] = None,
+    symbol_match: str = "exact",
+) -> Tuple[List[Row], Optional[int], Optional[str]]:
+    """
+    Retrieves paginated and filtered market data directly from PostgreSQL.
+    Used by your FastAPI endpoints (/market-data and /api/data).
+
+    - cursor: opaque keyset cursor from a previous page ('next_cursor'). When given,
+      'offset' is ignored and the page starts right after the cursor row.
+    - count_mode: 'exact' runs COUNT(*), 'estimate' uses the cached planner estimate
+      (unfiltered queries only), 'none' skips the total entirely.
+    - symbol / symbol_match: exact ('BTC') or prefix ('BT' -> BTC, BTT, ...) symbol match.
+    - symbols: list of exact symbols, resolved in a single IN lookup.
+
+    Returns (rows, total_count, next_cursor); rows are Core Row tuples of MARKET_DATA_COLUMNS.
+    """
+    page_stmt, filtered_stmt = build_market_data_query(limit, offset, symbol, cursor, symbols, symbol_match)
+
+    # Get Total Count (Optional - COUNT(*) scans every matching row)
+    total_count = None
+    strategy = _count_strategy(count_mode, bool(symbol or symbols))
+    if strategy == "exact":
+        total_count = db.execute(filtered_stmt.with_only_columns(func.count(), maintain_column_froms=True)).scalar()
+    elif strategy == "estimate":
+        total_count = estimate_total_count(db)
+
+    data_list, next_cursor = _split_page(db.execute(page_stmt).all(), limit)
+    return data_list, total_count, next_cursor
+
+
+async def get_market_data_async(
+    db: AsyncSession,
+    limit: int,
+    offset: int,
+    symbol: Optional[str],
+    cursor: Optional[str] = None,
+    count_mode: str = "exact",
+    symbols: Optional[List[str]] = None,
+    symbol_match: str = "exact",
+) -> Tuple[List[Row], Optional[int], Optional[str]]:
+    """Async variant of get_market_data() for AsyncSession (USE_ASYNC_DB)."""
+    page_stmt, filtered_stmt = build_market_data_query(limit, offset, symbol, cursor, symbols, symbol_match)
+
+    total_count = None
+    strategy = _count_strategy(count_mode, bool(symbol or symbols))
+    if strategy == "exact":
+        total_count = (await db.execute(filtered_stmt.with_only_columns(func.count(), maintain_column_froms=True))).scalar()
+    elif strategy == "estimate":
+        total_count = await estimate_total_count_async(db)
+
+    data_list, next_cursor = _split_page((await db.execute(page_stmt)).all(), limit)
+    return data_list, total_count, next_cursor
 
 
 # =========================================================
@@ -54,83 +340,356 @@ def get_etl_stats_service(db: Session) -> List[ETLCheckpoint]:
     Used by your FastAPI endpoint (/stats).
     """
     # Query all records from the ETLCheckpoint table
-    stats = db.query(ETLCheckpoint).all()
+    stats = db.execute(select(ETLCheckpoint)).scalars().all()
     
     return stats
 
 
+async def get_etl_stats_service_async(db: AsyncSession) -> List[ETLCheckpoint]:
+    """Async variant of get_etl_stats_service()."""
+    return (await db.execute(select(ETLCheckpoint))).scalars().all()
+
+
 # =========================================================
-# 3. CoinPaprika Service (Async Fetch + Normalize - Used by ETL script)
+# 3. Shared HTTP helpers (Used by the fetchers below)
 # =========================================================
-async def fetch_coinpaprika_data() -> List[dict]:
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Provider payload bytes received by this process per source (live fetches and replays);
+# the ETL records the per-run difference in 'etl_runs.bytes_fetched'
+response_bytes = Counter()
+
+# Column limits of 'normalized_data' (rows that don't fit would abort the whole COPY)
+MAX_SYMBOL_LENGTH = NormalizedMarketData.__table__.c.symbol.type.length
+MAX_NAME_LENGTH = NormalizedMarketData.__table__.c.name.type.length
+
+
+def _retry_delay(response: Optional[httpx.Response], attempt: int, backoff_base_seconds: float) -> float:
     """
-    Asynchronously fetches and NORMALIZES data from CoinPaprika.
+    Honors Retry-After on 429/503 (capped at FETCH_MAX_RETRY_AFTER_SECONDS), otherwise
+    exponential backoff with jitter.
     """
-    # ... (Keep the rest of your original CoinPaprika fetch/normalize logic here) ...
-    params = {"limit": 10}
-    
-    async with httpx.AsyncClient() as client:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), settings.FETCH_MAX_RETRY_AFTER_SECONDS)
+            except ValueError:
+                pass
+    return backoff_base_seconds * (2 ** attempt) + random.uniform(0, 0.5)
+
+
+async def _get_json(
+    client: httpx.AsyncClient, url: str, params: dict, source_name: str, archive: Optional[ArchiveWriter] = None
+):
+    """
+    GET with the source's rate-limit-aware retry policy (429 / 5xx / transport errors).
+    The successful response body is appended to 'archive' before it is decoded.
+    """
+    policy = get_source_config(source_name)
+    max_retries = policy["max_retries"]
+    for attempt in range(max_retries + 1):
+        response = None
         try:
-            response = await client.get(COINPAPRIKA_API_URL, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            normalized_data = []
-            for coin in data:
-                normalized_data.append({
-                    "source_record_id": coin["id"],
-                    "source_name": "coinpaprika",
-                    "symbol": coin["symbol"].upper(),
-                    "name": coin["name"],
-                    "current_price_usd": coin.get("quotes", {}).get("USD", {}).get("price", 0),
-                    "market_cap_usd": coin.get("quotes", {}).get("USD", {}).get("market_cap", 0),
-                    "volume_24h_usd": coin.get("quotes", {}).get("USD", {}).get("volume_24h", 0),
-                    "percent_change_24h": coin.get("quotes", {}).get("USD", {}).get("percent_change_24h", 0),
-                    "last_updated_at": coin["last_updated"]
-                })
-            return normalized_data
-
-        except Exception as e:
-            logger.error(f"Error fetching CoinPaprika data: {e}")
-            return []
+            response = await client.get(url, params=params)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                response.raise_for_status()
+                response_bytes[source_name] += len(response.content)
+                if archive is not None:
+                    archive.append(response.content)
+                # orjson (when installed) straight from the body bytes, no str decode first
+                return loads(response.content)
+        except httpx.TransportError as e:
+            logger.warning(f"{source_name}: transport error on {params}: {e}")
+
+        if attempt == max_retries:
+            break
+        delay = _retry_delay(response, attempt, policy["backoff_base_seconds"])
+        status = response.status_code if response is not None else "n/a"
+        logger.warning(f"{source_name}: HTTP {status}, retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    if response is not None:
+        response.raise_for_status()
+    raise httpx.TransportError(f"{source_name}: giving up after {max_retries} retries")
+
+
+def _fits_columns(record: dict) -> bool:
+    return bool(record["symbol"]) and len(record["symbol"]) <= MAX_SYMBOL_LENGTH
+
+
+def _columnar_page(
+    source_name: str,
+    ids: list,
+    symbols: list,
+    names: list,
+    prices: list,
+    market_caps: list,
+    volumes: list,
+    changes: list,
+    updated: list,
+) -> ColumnBatch:
+    """
+    Builds a typed 'normalized_data' page from raw provider columns: numbers are coerced
+    column by column (bad/missing values -> 0 for NOT NULL columns, None otherwise),
+    timestamps parsed, and rows that can't be stored are dropped with one index mask.
+    """
+    # str(): a provider occasionally sends a number where text belongs
+    symbols = [str(symbol).upper() if symbol else "" for symbol in symbols]
+    names = [str(name or record_id or "")[:MAX_NAME_LENGTH] for name, record_id in zip(names, ids)]
+    batch = ColumnBatch({
+        "source_record_id": ids,
+        "source_name": [source_name] * len(ids),
+        "symbol": symbols,
+        "name": names,
+        "current_price_usd": float_column(prices, fill=0.0),
+        "market_cap_usd": float_column(market_caps, fill=0.0),
+        "volume_24h_usd": float_column(volumes),
+        "percent_change_24h": float_column(changes),
+        "last_updated_at": timestamp_column(updated),
+    }, len(ids))
+    keep = [
+        i for i, (record_id, symbol) in enumerate(zip(ids, symbols))
+        if record_id and symbol and len(symbol) <= MAX_SYMBOL_LENGTH
+    ]
+    return batch.take(keep)
+
 
 # =========================================================
-# 4. CoinGecko Service (Async Fetch + Normalize - Used by ETL script)
+# 4. CoinPaprika Service (Async Fetch + Normalize - Used by ETL script)
 # =========================================================
-async def fetch_coingecko_data() -> List[dict]:
-    """
-    Asynchronously fetches and NORMALIZES data from CoinGecko.
-    """
-    # ... (Keep the rest of your original CoinGecko fetch/normalize logic here) ...
-    params = {
-        "vs_currency": "usd",
-        "order": "market_cap_desc",
-        "per_page": 10,
-        "page": 1,
-        "sparkline": "false"
-    }
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(COINGECKO_API_URL, params=params, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            normalized_data = []
-            for coin in data:
-                normalized_data.append({
-                    "source_record_id": coin["id"],
-                    "source_name": "coingecko",
-                    "symbol": coin["symbol"].upper(),
-                    "name": coin["name"],
-                    "current_price_usd": coin["current_price"],
-                    "market_cap_usd": coin["market_cap"],
-                    "volume_24h_usd": coin["total_volume"],
-                    "percent_change_24h": coin["price_change_percentage_24h"],
-                    "last_updated_at": coin["last_updated"]
-                })
-            return normalized_data
+def normalize_coinpaprika_page(data: List[dict]) -> List[dict]:
+    """
+    Maps raw /v1/tickers items to 'normalized_data' rows, one dict per coin.
+    Row-at-a-time reference for coinpaprika_columns() (debug endpoints, benchmarks).
+    """
+    normalized_data = []
+    for coin in data:
+        usd = coin.get("quotes", {}).get("USD", {})
+        record = {
+            "source_record_id": coin["id"],
+            "source_name": "coinpaprika",
+            "symbol": (coin.get("symbol") or "").upper(),
+            "name": (coin.get("name") or coin["id"])[:MAX_NAME_LENGTH],
+            "current_price_usd": usd.get("price") or 0,
+            "market_cap_usd": usd.get("market_cap") or 0,
+            "volume_24h_usd": usd.get("volume_24h", 0),
+            "percent_change_24h": usd.get("percent_change_24h", 0),
+            "last_updated_at": coin.get("last_updated")
+        }
+        if _fits_columns(record):
+            normalized_data.append(record)
+    return normalized_data
+
+
+def coinpaprika_columns(data: List[dict]) -> ColumnBatch:
+    """Columnar normalization of raw /v1/tickers items (what the ETL loads)."""
+    usd = [(coin.get("quotes") or {}).get("USD") or {} for coin in data]
+    return _columnar_page(
+        "coinpaprika",
+        ids=[coin.get("id") for coin in data],
+        symbols=[coin.get("symbol") for coin in data],
+        names=[coin.get("name") for coin in data],
+        prices=[quote.get("price") for quote in usd],
+        market_caps=[quote.get("market_cap") for quote in usd],
+        volumes=[quote.get("volume_24h", 0) for quote in usd],
+        changes=[quote.get("percent_change_24h", 0) for quote in usd],
+        updated=[coin.get("last_updated") for coin in data],
+    )
+
+
+def _coinpaprika_chunks(data: List[dict]) -> Iterator[ColumnBatch]:
+    # /v1/tickers without 'limit' returns the full universe in one response; it is
+    # re-chunked so the transform/load stages can start before the last row.
+    page_size = settings.COINPAPRIKA_PAGE_SIZE
+    for start in range(0, len(data), page_size):
+        yield coinpaprika_columns(data[start:start + page_size])
+
+
+async def iter_coinpaprika_pages(
+    client: Optional[httpx.AsyncClient] = None,
+    base_url: Optional[str] = None,
+    archive: Optional[ArchiveWriter] = None,
+) -> AsyncIterator[ColumnBatch]:
+    """
+    Yields normalized CoinPaprika rows in pages of COINPAPRIKA_PAGE_SIZE.
+    'base_url' is the tickers endpoint (default: under COINPAPRIKA_BASE_URL).
+    The raw response is appended to 'archive' (and the archive closed) when one is given.
+    """
+    # Shared keep-alive client from services/http_client.py unless one is passed in
+    client = client or get_http_client("coinpaprika")
+    base_url = base_url or coinpaprika_tickers_url()
+    try:
+        data = await _get_json(client, base_url, {}, "coinpaprika", archive)
+    finally:
+        if archive is not None:
+            archive.close()
+    for page in _coinpaprika_chunks(data):
+        yield page
+
+
+async def fetch_coinpaprika_data(max_pages: Optional[int] = None) -> List[dict]:
+    """
+    Asynchronously fetches and NORMALIZES the CoinPaprika market list
+    (the first max_pages pages of COINPAPRIKA_PAGE_SIZE rows, or all of it).
+    """
+    try:
+        normalized_data = []
+        pages = 0
+        async for page in iter_coinpaprika_pages():
+            normalized_data.extend(page)
+            pages += 1
+            if max_pages and pages >= max_pages:
+                break
+        return normalized_data
+
+    except Exception as e:
+        logger.error(f"Error fetching CoinPaprika data: {e}")
+        return []
+
+# =========================================================
+# 5. CoinGecko Service (Async Fetch + Normalize - Used by ETL script)
+# =========================================================
+def normalize_coingecko_page(data: List[dict]) -> List[dict]:
+    """
+    Maps raw /coins/markets items to 'normalized_data' rows, one dict per coin.
+    Row-at-a-time reference for coingecko_columns() (debug endpoints, benchmarks).
+    """
+    normalized_data = []
+    for coin in data:
+        record = {
+            "source_record_id": coin["id"],
+            "source_name": "coingecko",
+            "symbol": (coin.get("symbol") or "").upper(),
+            "name": (coin.get("name") or coin["id"])[:MAX_NAME_LENGTH],
+            # Long-tail coins report null prices / caps; the columns are NOT NULL
+            "current_price_usd": coin.get("current_price") or 0,
+            "market_cap_usd": coin.get("market_cap") or 0,
+            "volume_24h_usd": coin.get("total_volume"),
+            "percent_change_24h": coin.get("price_change_percentage_24h"),
+            "last_updated_at": coin.get("last_updated")
+        }
+        if _fits_columns(record):
+            normalized_data.append(record)
+    return normalized_data
+
+
+def coingecko_columns(data: List[dict]) -> ColumnBatch:
+    """Columnar normalization of raw /coins/markets items (what the ETL loads)."""
+    return _columnar_page(
+        "coingecko",
+        ids=[coin.get("id") for coin in data],
+        symbols=[coin.get("symbol") for coin in data],
+        names=[coin.get("name") for coin in data],
+        prices=[coin.get("current_price") for coin in data],
+        market_caps=[coin.get("market_cap") for coin in data],
+        volumes=[coin.get("total_volume") for coin in data],
+        changes=[coin.get("price_change_percentage_24h") for coin in data],
+        updated=[coin.get("last_updated") for coin in data],
+    )
+
+
+async def iter_coingecko_pages(
+    client: Optional[httpx.AsyncClient] = None,
+    base_url: Optional[str] = None,
+    per_page: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    archive: Optional[ArchiveWriter] = None,
+) -> AsyncIterator[ColumnBatch]:
+    """
+    Walks /coins/markets page by page with at most 'concurrency' requests in flight and
+    yields each normalized page as soon as it arrives (not necessarily in page order).
+    Stops at the first short page or after max_pages. Raw pages go to 'archive' if given.
+    'base_url' is the markets endpoint (default: under COINGECKO_BASE_URL).
+    """
+    base_url = base_url or coingecko_markets_url()
+    per_page = per_page or settings.COINGECKO_PER_PAGE
+    last_page = max_pages or settings.COINGECKO_MAX_PAGES
+    concurrency = concurrency or settings.FETCH_CONCURRENCY
+
+    # Shared keep-alive client: every page (and run) reuses the same connections
+    client = client or get_http_client("coingecko")
+    in_flight = {}
+    next_page = 1
+
+    def params_for(page: int) -> dict:
+        return {
+            "vs_currency": "usd",
+            "order": "market_cap_desc",
+            "per_page": per_page,
+            "page": page,
+            "sparkline": "false"
+        }
+
+    try:
+        while in_flight or next_page <= last_page:
+            # Keep the window full until the end of the list is known
+            while len(in_flight) < concurrency and next_page <= last_page:
+                task = asyncio.create_task(_get_json(client, base_url, params_for(next_page), "coingecko", archive))
+                in_flight[task] = next_page
+                next_page += 1
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page = in_flight.pop(task)
+                data = task.result()
+                if len(data) < per_page:
+                    # Short page = end of the market list; pages after it will come back empty
+                    last_page = min(last_page, page)
+                if data and page <= last_page:
+                    yield coingecko_columns(data)
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if archive is not None:
+            archive.close()
+
+
+async def fetch_coingecko_data(max_pages: Optional[int] = None) -> List[dict]:
+    """
+    Asynchronously fetches and NORMALIZES the CoinGecko market list
+    (the first max_pages pages, or up to COINGECKO_MAX_PAGES).
+    """
+    try:
+        normalized_data = []
+        async for page in iter_coingecko_pages(max_pages=max_pages):
+            normalized_data.extend(page)
+        return normalized_data
             
-        except Exception as e:
-            logger.error(f"Error fetching CoinGecko data: {e}")
-            return []
\ No newline at end of file
+    except Exception as e:
+        logger.error(f"Error fetching CoinGecko data: {e}")
+        return []
+
+
+# =========================================================
+# 6. Archive Replay (re-normalize archived raw responses, no network)
+# =========================================================
+def _replay_coingecko(data: List[dict]) -> Iterator[ColumnBatch]:
+    # Archived pages (short last page included) are replayed as they were fetched
+    if data:
+        yield coingecko_columns(data)
+
+
+ARCHIVE_REPLAYERS = {
+    "coingecko": _replay_coingecko,
+    "coinpaprika": _coinpaprika_chunks,
+}
+
+
+async def iter_archived_pages(
+    source_name: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> AsyncIterator[ColumnBatch]:
+    """
+    Yields normalized pages re-built from the source's archived raw responses
+    (services/archive_service.py), oldest first, optionally within [since, until].
+    """
+    replay = ARCHIVE_REPLAYERS[source_name]
+    for _, payload in iter_archive(source_name, since, until):
+        response_bytes[source_name] += len(payload)
+        for page in replay(loads(payload)):
+            yield page
+            # Let the transform/load stages run between pages, as with a live fetch
+            await asyncio.sleep(0)
@@ -0,0 +1,191 @@
+# services/export_service.py
+
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List, Optional, Sequence
+import csv
+import importlib.util
+import io
+
+from sqlalchemy import select
+
+from core.config import settings
+from core.db import engine, get_async_engine
+from models.etl_models import NormalizedMarketData
+from services.crypto_service import MARKET_DATA_COLUMNS, apply_symbol_filter
+from services.serialization import dumps
+
+# Parquet output needs pyarrow (requirements.txt); NDJSON and CSV still work in trees without it
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+if PARQUET_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+EXPORT_FIELDS = tuple(column.key for column in MARKET_DATA_COLUMNS)
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def build_export_query(
+    source_name: Optional[str] = None,
+    symbols: Optional[List[str]] = None,
+    updated_since: Optional[datetime] = None,
+):
+    """
+    The whole (optionally filtered) 'normalized_data' table as MARKET_DATA_COLUMNS rows.
+    No ORDER BY: PostgreSQL can stream a plain scan without sorting the table first.
+    """
+    query = apply_symbol_filter(select(*MARKET_DATA_COLUMNS), None, symbols)
+    if source_name:
+        query = query.where(NormalizedMarketData.source_name == source_name)
+    if updated_since:
+        query = query.where(NormalizedMarketData.last_updated_at >= updated_since)
+    return query
+
+
+# =========================================================
+# Encoders: one call per fetched partition of rows
+# =========================================================
+class _NDJSONEncoder:
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: Sequence) -> bytes:
+        return b"".join(dumps(dict(zip(EXPORT_FIELDS, row))) + b"\n" for row in rows)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _CSVEncoder:
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(EXPORT_FIELDS)
+        return self._drain()
+
+    def encode(self, rows: Sequence) -> bytes:
+        self._writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+        )
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ChunkSink:
+    """Write-only file for ParquetWriter: keeps the running offset, hands out what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_type(column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return pa.timestamp("us", tz="UTC")
+    if python_type is float:
+        return pa.float64()
+    return pa.string()
+
+
+class _ParquetEncoder:
+    """Every partition becomes one row group; the footer is written by finish()."""
+
+    def __init__(self):
+        self._sink = _ChunkSink()
+        self._schema = pa.schema([(column.key, _arrow_type(column)) for column in MARKET_DATA_COLUMNS])
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def header(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, rows: Sequence) -> bytes:
+        columns = list(zip(*rows))
+        self._writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self._schema)],
+            schema=self._schema,
+        ))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def make_encoder(fmt: str):
+    if fmt == "ndjson":
+        return _NDJSONEncoder()
+    if fmt == "csv":
+        return _CSVEncoder()
+    if fmt == "parquet":
+        if not PARQUET_AVAILABLE:
+            raise ValueError("Parquet export needs the 'pyarrow' package")
+        return _ParquetEncoder()
+    raise ValueError(f"Unknown export format '{fmt}'")
+
+
+# =========================================================
+# Streaming readers (server-side cursor, own connection)
+# =========================================================
+# The generators open their own connection: a StreamingResponse body is sent after the
+# request's session dependency has already been closed.
+def iter_export(fmt: str, query) -> Iterator[bytes]:
+    """Encoded chunks of the export, fetched EXPORT_BATCH_ROWS rows at a time (constant memory)."""
+    encoder = make_encoder(fmt)
+    yield encoder.header()
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=settings.EXPORT_BATCH_ROWS
+        ).execute(query)
+        for rows in result.partitions():
+            yield encoder.encode(rows)
+    yield encoder.finish()
+
+
+async def iter_export_async(fmt: str, query) -> AsyncIterator[bytes]:
+    """Async variant of iter_export() over the asyncpg engine."""
+    encoder = make_encoder(fmt)
+    yield encoder.header()
+    async with get_async_engine().connect() as connection:
+        result = await connection.stream(
+            query.execution_options(yield_per=settings.EXPORT_BATCH_ROWS)
+        )
+        async for rows in result.partitions():
+            yield encoder.encode(rows)
+    yield encoder.finish()
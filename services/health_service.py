@@ -1,14 +1,22 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from datetime import datetime
-from typing import List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
 import time
 
+from core.config import settings
+from core.db import create_db_engine, pool_status
 # Import your DB Model for the query
-from models.etl_models import ETLCheckpoint 
+from models.etl_models import ETLCheckpoint, ETLRunSummary
 # Import the schemas for type hinting
 from schemas.health import HealthResponse, ETLStatus 
 
+logger = logging.getLogger(__name__)
+
+
 def check_db_connectivity(db: Session) -> Tuple[str, Optional[int]]:
     """Checks database connection and reports latency."""
     try:
@@ -20,13 +28,30 @@ def check_db_connectivity(db: Session) -> Tuple[str, Optional[int]]:
     except Exception as e:
         return f"Failed: {str(e)}", None
 
+async def check_db_connectivity_async(db: AsyncSession) -> Tuple[str, Optional[int]]:
+    """Async variant of check_db_connectivity()."""
+    try:
+        start_time = time.time()
+        await db.execute(text("SELECT 1"))
+        db_latency_ms = int((time.time() - start_time) * 1000)
+        return "Connected", db_latency_ms
+    except Exception as e:
+        return f"Failed: {str(e)}", None
+
 def get_etl_checkpoints(db: Session) -> List[ETLStatus]:
     """
     Fetches the actual ETL run status from the database.
     """
     # Query all records from the ETLCheckpoint table
-    db_stats = db.query(ETLCheckpoint).all()
+    db_stats = db.execute(select(ETLCheckpoint)).scalars().all()
+    return _to_etl_statuses(db_stats)
+
+async def get_etl_checkpoints_async(db: AsyncSession) -> List[ETLStatus]:
+    """Async variant of get_etl_checkpoints()."""
+    db_stats = (await db.execute(select(ETLCheckpoint))).scalars().all()
+    return _to_etl_statuses(db_stats)
 
+def _to_etl_statuses(db_stats: List[ETLCheckpoint]) -> List[ETLStatus]:
     # Map the SQLAlchemy models to the Pydantic Schema (ETLStatus)
     etl_list = []
     for stat in db_stats:
@@ -48,10 +73,17 @@ def get_health_status(db: Session) -> HealthResponse:
     Gathers DB status and ETL checkpoints.
     """
     db_status, db_latency = check_db_connectivity(db)
-    
+    etl_list = get_etl_checkpoints(db) if db_status.startswith("Connected") else []
+    return _build_health_response(db_status, db_latency, etl_list)
+
+async def get_health_status_async(db: AsyncSession) -> HealthResponse:
+    """Async variant of get_health_status()."""
+    db_status, db_latency = await check_db_connectivity_async(db)
+    etl_list = await get_etl_checkpoints_async(db) if db_status.startswith("Connected") else []
+    return _build_health_response(db_status, db_latency, etl_list)
+
+def _build_health_response(db_status: str, db_latency: Optional[int], etl_list: List[ETLStatus]) -> HealthResponse:
     if db_status.startswith("Connected"):
-        etl_list = get_etl_checkpoints(db)
-        
         # Check if all ETLs were successful for overall system status
         overall_status = "OK" 
         for e in etl_list:
@@ -61,7 +93,6 @@ def get_health_status(db: Session) -> HealthResponse:
         
     else:
         # If DB is down, we cannot check ETL status
-        etl_list = []
         overall_status = "Critical"
 
     return HealthResponse(
@@ -69,4 +100,121 @@ def get_health_status(db: Session) -> HealthResponse:
         database_latency_ms=db_latency,
         etl_checkpoints=etl_list,
         system_status=overall_status
-    )
\ No newline at end of file
+    )
+
+
+# =========================================================
+# Liveness / Readiness (background-refreshed snapshot)
+# =========================================================
+def stale_after_seconds(source_name: str) -> float:
+    """ETL_STALE_AFTER_SECONDS, or 3x the source's scheduler interval (+ jitter) when unset."""
+    if settings.ETL_STALE_AFTER_SECONDS > 0:
+        return settings.ETL_STALE_AFTER_SECONDS
+    # Same per-source settings the scheduler reads (ingestion/etl_main.SOURCE_INTERVALS)
+    interval = getattr(settings, f"{source_name.upper()}_INTERVAL_SECONDS", settings.ETL_INTERVAL_SECONDS)
+    return 3 * interval + settings.ETL_JITTER_SECONDS
+
+
+class HealthMonitor:
+    """
+    Refreshes a readiness snapshot every HEALTH_REFRESH_SECONDS: DB ping latency over its
+    own single-connection engine (never the request pool), pool utilization, and ETL
+    staleness from 'etl_run_summaries'. Probes only read the snapshot.
+    """
+
+    def __init__(self, refresh_seconds: float = settings.HEALTH_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.snapshot: Dict = {"ready": False, "reasons": ["no health snapshot yet"], "checked_at": None}
+        self._engine = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_engine(self):
+        if self._engine is None:
+            self._engine = create_db_engine(pool_size=1)
+        return self._engine
+
+    def refresh(self) -> Dict:
+        """Takes a new snapshot (blocking; run in a worker thread)."""
+        now = datetime.now(timezone.utc)
+        reasons = []
+        database = {"status": "Connected", "ping_ms": None}
+        etl = {}
+        try:
+            with self._get_engine().connect() as connection:
+                start = time.perf_counter()
+                connection.execute(text("SELECT 1"))
+                database["ping_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                summaries = connection.execute(select(
+                    ETLRunSummary.source_name, ETLRunSummary.last_run_status, ETLRunSummary.last_successful_run
+                )).all()
+            for source_name, last_status, last_success in summaries:
+                if last_success is not None and last_success.tzinfo is None:
+                    last_success = last_success.replace(tzinfo=timezone.utc)
+                age = (now - last_success).total_seconds() if last_success else None
+                stale_after = stale_after_seconds(source_name)
+                stale = age is None or age > stale_after
+                etl[source_name] = {
+                    "last_run_status": last_status,
+                    "last_successful_run": last_success,
+                    "age_seconds": round(age, 1) if age is not None else None,
+                    "stale_after_seconds": stale_after,
+                    "stale": stale,
+                }
+                if stale and settings.READINESS_REQUIRE_FRESH_ETL:
+                    reasons.append(f"ETL data for {source_name} is stale")
+        except Exception as e:
+            database["status"] = f"Failed: {e}"
+            reasons.append("database unreachable")
+
+        # Both engines: requests use the async pool when USE_ASYNC_DB is on
+        pools = pool_status()
+        for name in ("sync", "async"):
+            if pools.get(name, {}).get("checkedout", 0) >= pools["max_connections"]:
+                reasons.append(f"{name} connection pool exhausted")
+
+        self.snapshot = {
+            "ready": not reasons,
+            "reasons": reasons,
+            "checked_at": now,
+            "database": database,
+            "pool": pools,
+            "etl": etl,
+        }
+        return self.snapshot
+
+    def readiness(self) -> Dict:
+        """The latest snapshot; not ready if the refresher has stopped producing new ones."""
+        snapshot = self.snapshot
+        checked_at = snapshot["checked_at"]
+        if checked_at is not None:
+            age = (datetime.now(timezone.utc) - checked_at).total_seconds()
+            if age > 3 * self.refresh_seconds:
+                return {**snapshot, "ready": False, "reasons": snapshot["reasons"] + ["health snapshot is stale"]}
+        return snapshot
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Health snapshot refresh failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+
+health_monitor = HealthMonitor()
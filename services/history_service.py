@@ -0,0 +1,126 @@
+# services/history_service.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from models.etl_models import NormalizedMarketData, PriceRollup
+from schemas.history import HistoryPoint, HistoryResponse
+
+# Finest rollup that keeps a chart at a few hundred points
+RESOLUTION_LIMITS = (
+    (timedelta(hours=6), "1m"),
+    (timedelta(days=14), "1h"),
+)
+DEFAULT_WINDOW = timedelta(hours=24)
+
+# Only the candle fields (HistoryPoint) are selected, as plain Core rows
+CANDLE_COLUMNS = tuple(PriceRollup.__table__.c[field] for field in HistoryPoint.model_fields)
+
+
+def choose_resolution(start: datetime, end: datetime) -> str:
+    """Picks the rollup to read for a time range ('1m' up to 6h, '1h' up to 14d, else '1d')."""
+    span = end - start
+    for limit, resolution in RESOLUTION_LIMITS:
+        if span <= limit:
+            return resolution
+    return "1d"
+
+
+def resolve_window(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """Defaults to the last 24 hours; naive datetimes are treated as UTC."""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - DEFAULT_WINDOW
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start, end
+
+
+def _coin_query(symbol: str, source_name: Optional[str]):
+    # A symbol can belong to several coins; chart the one with the largest market cap
+    query = select(NormalizedMarketData.source_record_id, NormalizedMarketData.source_name) \
+        .where(NormalizedMarketData.symbol == symbol.strip().upper())
+    if source_name:
+        query = query.where(NormalizedMarketData.source_name == source_name)
+    return query.order_by(desc(NormalizedMarketData.market_cap_usd)).limit(1)
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """
+    Start of the rollup bucket containing 'moment': the same UTC date_trunc the load
+    applies (database_service.ROLLUP_RESOLUTIONS), done here so the range stays sargable.
+    """
+    moment = moment.astimezone(timezone.utc)
+    if resolution == "1m":
+        return moment.replace(second=0, microsecond=0)
+    if resolution == "1h":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _candles_query(source_record_id: str, source_name: str, resolution: str, start: datetime, end: datetime):
+    # The candle whose bucket contains 'start' is included even when 'start' isn't bucket-aligned
+    return select(*CANDLE_COLUMNS).where(
+        PriceRollup.source_record_id == source_record_id,
+        PriceRollup.source_name == source_name,
+        PriceRollup.resolution == resolution,
+        PriceRollup.bucket_start >= bucket_start(start, resolution),
+        PriceRollup.bucket_start <= end,
+    ).order_by(PriceRollup.bucket_start)
+
+
+def _response(symbol, coin, resolution, start, end, candles) -> HistoryResponse:
+    return HistoryResponse(
+        symbol=symbol.strip().upper(),
+        source_record_id=coin[0] if coin else None,
+        source_name=coin[1] if coin else None,
+        resolution=resolution,
+        start=start,
+        end=end,
+        points=[HistoryPoint.model_validate(candle) for candle in candles],
+    )
+
+
+def get_price_history(
+    db: Session,
+    symbol: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source_name: Optional[str] = None,
+    resolution: Optional[str] = None,
+) -> HistoryResponse:
+    """
+    Returns OHLCV candles for a symbol from the precomputed rollup that fits the range.
+    One primary-key range scan on 'price_rollups'; the raw history is never touched.
+    """
+    start, end = resolve_window(start, end)
+    resolution = resolution or choose_resolution(start, end)
+
+    coin = db.execute(_coin_query(symbol, source_name)).first()
+    candles = []
+    if coin:
+        candles = db.execute(_candles_query(coin[0], coin[1], resolution, start, end)).all()
+    return _response(symbol, coin, resolution, start, end, candles)
+
+
+async def get_price_history_async(
+    db: AsyncSession,
+    symbol: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source_name: Optional[str] = None,
+    resolution: Optional[str] = None,
+) -> HistoryResponse:
+    """Async variant of get_price_history()."""
+    start, end = resolve_window(start, end)
+    resolution = resolution or choose_resolution(start, end)
+
+    coin = (await db.execute(_coin_query(symbol, source_name))).first()
+    candles = []
+    if coin:
+        candles = (await db.execute(_candles_query(coin[0], coin[1], resolution, start, end))).all()
+    return _response(symbol, coin, resolution, start, end, candles)
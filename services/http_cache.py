@@ -0,0 +1,98 @@
+# services/http_cache.py
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+import uuid
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from services.cache_service import refresh_generation, refresh_generation_async, response_cache
+
+# Without a shared generation (no 'data_generation_seq', e.g. SQLite) ETags and Last-Modified
+# are only valid for this process's lifetime
+_PROCESS_EPOCH = uuid.uuid4().hex[:8]
+
+
+def cache_control() -> str:
+    return (
+        f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}, "
+        f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE_SECONDS}"
+    )
+
+
+def runs_token() -> Optional[str]:
+    """Identifies the latest recorded ETL run, for responses built from run statistics."""
+    runs_at = response_cache.runs_recorded_at
+    return runs_at.strftime("%Y%m%d%H%M%S%f") if runs_at is not None else None
+
+
+def validators(route: str, include_runs: bool = False) -> Dict[str, str]:
+    """
+    ETag / Last-Modified / Cache-Control for a read endpoint. Data only changes when an ETL
+    load bumps the generation, so the weak ETag is just route + generation and Last-Modified
+    is that generation's commit time: every replica reading the same 'data_generation_seq' /
+    'data_generation' values hands out the same validators. Run statistics also change on
+    runs that load nothing: with 'include_runs' the latest recorded run is part of both.
+    """
+    generation = response_cache.data_generation
+    token = str(generation) if generation is not None else f"{_PROCESS_EPOCH}.{response_cache.generation}"
+    last_modified = response_cache.data_modified_at
+    if generation is None or last_modified is None:
+        last_modified = datetime.fromtimestamp(response_cache.generation_seen_at, tz=timezone.utc)
+    runs_at = response_cache.runs_recorded_at
+    if include_runs and generation is not None and runs_at is not None:
+        token = f"{token}.{runs_token()}"
+        last_modified = max(last_modified, runs_at)
+    last_modified = last_modified.replace(microsecond=0)
+    return {
+        "ETag": f'W/"{route}-{token}"',
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": cache_control(),
+    }
+
+
+def _etag_value(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """RFC 9110 conditional GET: If-None-Match (weak comparison) wins over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = _etag_value(headers["ETag"])
+        return any(_etag_value(tag) == current for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+    return False
+
+
+async def check_conditional(
+    request: Request, db, route: str, include_runs: bool = False
+) -> Tuple[Optional[Response], Dict[str, str]]:
+    """
+    Route helper, called before any query runs: returns (304 response, headers) when the
+    client's copy is current, else (None, headers) for the caller to attach to its 200.
+    """
+    if isinstance(db, AsyncSession):
+        await refresh_generation_async(db)
+    else:
+        await run_in_threadpool(refresh_generation, db)
+    headers = validators(route, include_runs)
+    if is_not_modified(request, headers):
+        return Response(status_code=304, headers=headers), headers
+    return None, headers
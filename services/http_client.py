@@ -0,0 +1,63 @@
+# services/http_client.py
+
+from typing import Dict
+import asyncio
+import importlib.util
+import logging
+import weakref
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One AsyncClient per source (and event loop), reused across every page and run so
+# keep-alive connections skip the TCP + TLS handshake after the first request. Keyed on the
+# loop object itself: a new loop can reuse a closed one's id() but never gets its clients.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def get_source_config(source_name: str) -> Dict:
+    """Timeout and retry policy of a source, from core/config.Settings."""
+    prefix = source_name.upper()
+    return {
+        "timeout_seconds": getattr(settings, f"{prefix}_TIMEOUT_SECONDS", settings.FETCH_TIMEOUT_SECONDS),
+        "max_retries": getattr(settings, f"{prefix}_MAX_RETRIES", settings.FETCH_MAX_RETRIES),
+        "backoff_base_seconds": getattr(settings, f"{prefix}_BACKOFF_BASE_SECONDS", settings.FETCH_BACKOFF_BASE_SECONDS),
+    }
+
+
+def _build_client(source_name: str) -> httpx.AsyncClient:
+    config = get_source_config(source_name)
+    http2 = settings.HTTP2_ENABLED and _HTTP2_AVAILABLE
+    if settings.HTTP2_ENABLED and not _HTTP2_AVAILABLE:
+        logger.info("HTTP2_ENABLED is set but the 'h2' package is missing; using HTTP/1.1")
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(config["timeout_seconds"]),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        headers={"Accept": "application/json", "User-Agent": "kasparro-etl/1.0"},
+    )
+
+
+def get_http_client(source_name: str) -> httpx.AsyncClient:
+    """Returns the shared client for a source, creating it on first use in this event loop."""
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(source_name)
+    if client is None or client.is_closed:
+        client = clients[source_name] = _build_client(source_name)
+    return client
+
+
+async def close_http_clients() -> None:
+    """Closes every client created in the running event loop (call on shutdown)."""
+    for client in _clients.pop(asyncio.get_running_loop(), {}).values():
+        await client.aclose()
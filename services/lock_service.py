@@ -0,0 +1,85 @@
+# services/lock_service.py
+
+from typing import Dict, Optional
+import logging
+
+from sqlalchemy import text
+
+from core.config import settings
+from core.db import create_db_engine
+
+logger = logging.getLogger(__name__)
+
+
+class AdvisoryLocks:
+    """
+    Named, non-blocking PostgreSQL session advisory locks (pg_try_advisory_lock) that keep
+    ETL replicas from running the same source at the same time. Each held lock pins one
+    connection of a small dedicated engine: the lock lives exactly as long as that session,
+    so a crashed process releases it with its connection.
+    Other databases have no cross-process locks; there every acquire succeeds.
+    """
+
+    def __init__(self, namespace: int = settings.ETL_LOCK_NAMESPACE, pool_size: int = 4):
+        self.namespace = namespace
+        self.pool_size = pool_size
+        self._engine = None
+        self._held: Dict[str, Optional[object]] = {}
+
+    def _get_engine(self):
+        if self._engine is None:
+            self._engine = create_db_engine(pool_size=self.pool_size)
+        return self._engine
+
+    def acquire(self, name: str) -> bool:
+        """True if the lock is now held by this process; False if anyone (this process included) holds it."""
+        if name in self._held:
+            return False
+        engine = self._get_engine()
+        if engine.dialect.name != "postgresql":
+            self._held[name] = None
+            return True
+
+        connection = engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:namespace, hashtext(:name))"),
+                {"namespace": self.namespace, "name": name},
+            ).scalar()
+            # Session-level lock: end the implicit transaction so the connection isn't left idle in it
+            connection.commit()
+        except Exception:
+            connection.invalidate()
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._held[name] = connection
+        return True
+
+    def release(self, name: str) -> None:
+        if name not in self._held:
+            return
+        connection = self._held.pop(name)
+        if connection is None:
+            return
+        try:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:namespace, hashtext(:name))"),
+                {"namespace": self.namespace, "name": name},
+            )
+            connection.commit()
+        except Exception as e:
+            # Never hand a session that may still hold the lock back to the pool
+            logger.warning(f"Advisory unlock of '{name}' failed ({e}); dropping its connection")
+            connection.invalidate()
+        finally:
+            connection.close()
+
+    def close(self) -> None:
+        for name in list(self._held):
+            self.release(name)
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
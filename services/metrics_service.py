@@ -0,0 +1,172 @@
+# services/metrics_service.py
+
+from typing import Dict, Optional
+import logging
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.db import pool_status
+from services.cache_service import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Sub-millisecond buckets: most keyset pages and cache hits finish well under 5 ms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# =========================================================
+# 1. HTTP requests (MetricsMiddleware)
+# =========================================================
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route template.",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served.")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request. The 'route' label is the matched
+    path template ('/api/history/{symbol}'), so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status["code"])
+            ).observe(time.perf_counter() - start)
+
+
+# =========================================================
+# 2. Database statements (every engine, sync and async)
+# =========================================================
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Statement execution time by SQL verb.",
+    ["operation"], buckets=LATENCY_BUCKETS,
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - starts.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+# =========================================================
+# 3. Pool and cache state (read at scrape time)
+# =========================================================
+class _StateCollector:
+    """Exports connection pool utilization and response cache counters on every scrape."""
+
+    def collect(self):
+        pools = GaugeMetricFamily("db_pool_connections", "Connections per pool and state.", labels=["engine", "state"])
+        for engine_name, stats in pool_status().items():
+            if not isinstance(stats, dict):
+                continue
+            for state in ("size", "checkedin", "checkedout", "overflow"):
+                if state in stats:
+                    pools.add_metric([engine_name, state], stats[state])
+        yield pools
+
+        cache = response_cache.stats()
+        lookups = CounterMetricFamily("response_cache_lookups", "Response cache lookups by result.", labels=["result"])
+        lookups.add_metric(["hit"], cache["hits"])
+        lookups.add_metric(["miss"], cache["misses"])
+        yield lookups
+        yield GaugeMetricFamily("response_cache_hit_ratio", "Hits / lookups since start.", value=cache["hit_ratio"])
+        yield GaugeMetricFamily("response_cache_entries", "Entries in the response cache.", value=cache["entries"])
+        yield CounterMetricFamily("response_cache_evictions", "LRU evictions.", value=cache["evictions"])
+        yield CounterMetricFamily("response_cache_invalidations", "Generation bumps.", value=cache["invalidations"])
+
+
+REGISTRY.register(_StateCollector())
+
+# =========================================================
+# 4. ETL pipeline (ingestion/etl_main.py)
+# =========================================================
+ETL_STAGE_SECONDS = Gauge("etl_stage_duration_seconds", "Busy time per stage in the last run.", ["stage"])
+ETL_STAGE_ROWS_PER_SECOND = Gauge("etl_stage_rows_per_second", "Throughput per stage in the last run.", ["stage"])
+ETL_ROWS = Counter("etl_rows", "Rows per source and outcome.", ["source", "outcome"])
+ETL_BYTES = Counter("etl_fetched_bytes", "Provider payload bytes per source.", ["source"])
+ETL_RUNS = Counter("etl_runs", "Finished runs per source and status.", ["source", "status"])
+ETL_LAST_SUCCESS = Gauge("etl_last_success_timestamp_seconds", "End of the last successful run.", ["source"])
+ETL_RUN_SECONDS = Histogram(
+    "etl_run_duration_seconds", "Wall time of whole pipeline runs.",
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+
+
+def observe_etl_run(summary: Dict, source_names, seconds: float, failed_sources=()) -> None:
+    """Publishes one PipelineStats.summary() (plus the run's wall time) as ETL metrics."""
+    ETL_RUN_SECONDS.observe(seconds)
+    for stage, timing in summary["stages"].items():
+        ETL_STAGE_SECONDS.labels(stage).set(timing["seconds"])
+        if timing["rows_per_second"] is not None:
+            ETL_STAGE_ROWS_PER_SECOND.labels(stage).set(timing["rows_per_second"])
+    for outcome, key in (("fetched", "rows_fetched"), ("skipped", "rows_skipped"), ("loaded", "rows_loaded")):
+        for source_name, rows in summary[key].items():
+            ETL_ROWS.labels(source_name, outcome).inc(rows)
+    for source_name, size in summary.get("bytes_fetched", {}).items():
+        ETL_BYTES.labels(source_name).inc(size)
+    now = time.time()
+    for source_name in source_names:
+        status = "FAILURE" if source_name in failed_sources else "SUCCESS"
+        ETL_RUNS.labels(source_name, status).inc()
+        if status == "SUCCESS":
+            ETL_LAST_SUCCESS.labels(source_name).set(now)
+
+
+def start_metrics_server(port: Optional[int]) -> bool:
+    """Serves /metrics on 'port' from a background thread (processes without FastAPI)."""
+    if not port:
+        return False
+    from prometheus_client import start_http_server
+
+    try:
+        start_http_server(port)
+    except OSError as e:
+        logger.warning(f"Metrics server not started on port {port}: {e}")
+        return False
+    logger.info(f"Serving Prometheus metrics on :{port}/metrics")
+    return True
@@ -0,0 +1,145 @@
+# services/notify_service.py
+
+from typing import Dict, Iterable, List, Optional, Set
+import asyncio
+import importlib.util
+import logging
+
+from sqlalchemy.engine import make_url
+
+from core.config import settings
+from core.db import SQLALCHEMY_DATABASE_URL
+from services.cache_service import response_cache
+from services.database_service import NOTIFY_FIELDS
+from services.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+_ASYNCPG_AVAILABLE = importlib.util.find_spec("asyncpg") is not None
+
+RECONNECT_MAX_SECONDS = 30.0
+
+
+class Subscription:
+    """One WebSocket / SSE client: its symbol filter (empty = everything) and pending messages."""
+
+    __slots__ = ("symbols", "queue", "dropped")
+
+    def __init__(self, symbols: Iterable[str], queue_size: int):
+        self.symbols: Set[str] = set(symbols)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def put(self, rows: List[Dict]) -> None:
+        if self.symbols:
+            rows = [row for row in rows if row["symbol"] in self.symbols]
+            if not rows:
+                return
+        if self.queue.full():
+            # Slow consumer: newer prices supersede the oldest pending ones
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(rows)
+
+
+class MarketUpdateBroker:
+    """
+    The process's single LISTEN connection (asyncpg) on NOTIFY_CHANNEL. Every notification
+    the ETL load commits is decoded once and fanned out to the subscribers whose symbols it
+    touches; it also invalidates the response cache right away instead of waiting for the
+    next data generation poll.
+    """
+
+    def __init__(self, channel: str = settings.NOTIFY_CHANNEL, queue_size: int = settings.NOTIFY_SUBSCRIBER_QUEUE):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.connected = False
+        self._subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._invalidation_scheduled = False
+
+    @property
+    def enabled(self) -> bool:
+        backend = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name()
+        return settings.NOTIFY_ENABLED and backend == "postgresql" and _ASYNCPG_AVAILABLE
+
+    def subscribe(self, symbols: Iterable[str] = ()) -> Subscription:
+        subscription = Subscription(symbols, self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, rows: List[Dict]) -> None:
+        for subscription in list(self._subscribers):
+            subscription.put(rows)
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        try:
+            rows = [dict(zip(NOTIFY_FIELDS, values)) for values in loads(payload)]
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed '{channel}' notification: {e}")
+            return
+        self._schedule_invalidation()
+        self.publish(rows)
+
+    def _schedule_invalidation(self) -> None:
+        # One load commits many notifications at once; invalidate once per burst
+        if not self._invalidation_scheduled:
+            self._invalidation_scheduled = True
+            asyncio.get_running_loop().call_soon(self._invalidate)
+
+    def _invalidate(self) -> None:
+        self._invalidation_scheduled = False
+        response_cache.bump_generation()
+        # Re-read the shared generation on the next request, so ETags move with the data now
+        response_cache.expire_generation_check()
+
+    async def _run(self) -> None:
+        import asyncpg
+
+        dsn = make_url(SQLALCHEMY_DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._on_notification)
+                self.connected = True
+                delay = 1.0
+                logger.info(f"Listening for '{self.channel}' notifications")
+                # Anything committed while we weren't listening was missed: drop cached reads
+                self._schedule_invalidation()
+                await lost.wait()
+                logger.warning(f"'{self.channel}' listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"'{self.channel}' listener failed: {e}; retrying in {delay:.0f}s")
+            finally:
+                self.connected = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+market_updates = MarketUpdateBroker()
@@ -0,0 +1,50 @@
+# services/quote_service.py
+
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc
+from typing import List, Optional
+
+from models.etl_models import ConsolidatedQuote
+from schemas.quotes import ConsolidatedQuote as QuoteSchema
+
+
+# Core projection of the response fields: plain rows, no ORM hydration
+QUOTE_COLUMNS = tuple(ConsolidatedQuote.__table__.c[field] for field in QuoteSchema.model_fields)
+
+
+def _quotes_query(limit: int, offset: int, symbols: Optional[List[str]]):
+    # Served straight from 'ix_consolidated_quotes_market_cap'; nothing is merged per request
+    query = select(*QUOTE_COLUMNS)
+    if symbols:
+        query = query.where(ConsolidatedQuote.symbol.in_(symbols))
+    return query.order_by(desc(ConsolidatedQuote.market_cap_usd), ConsolidatedQuote.symbol) \
+        .offset(offset).limit(limit)
+
+
+def _quote_query(symbol: str):
+    return select(*QUOTE_COLUMNS).where(ConsolidatedQuote.symbol == symbol.strip().upper())
+
+
+def get_quotes(db: Session, limit: int, offset: int, symbols: Optional[List[str]] = None) -> List[QuoteSchema]:
+    """Consolidated quotes ordered by market cap (largest first)."""
+    rows = db.execute(_quotes_query(limit, offset, symbols)).all()
+    return [QuoteSchema.model_validate(row) for row in rows]
+
+
+async def get_quotes_async(db: AsyncSession, limit: int, offset: int, symbols: Optional[List[str]] = None) -> List[QuoteSchema]:
+    """Async variant of get_quotes()."""
+    rows = (await db.execute(_quotes_query(limit, offset, symbols))).all()
+    return [QuoteSchema.model_validate(row) for row in rows]
+
+
+def get_quote(db: Session, symbol: str) -> Optional[QuoteSchema]:
+    """The consolidated quote for one symbol, or None."""
+    row = db.execute(_quote_query(symbol)).one_or_none()
+    return QuoteSchema.model_validate(row) if row else None
+
+
+async def get_quote_async(db: AsyncSession, symbol: str) -> Optional[QuoteSchema]:
+    """Async variant of get_quote()."""
+    row = (await db.execute(_quote_query(symbol))).one_or_none()
+    return QuoteSchema.model_validate(row) if row else None
@@ -0,0 +1,64 @@
+# services/serialization.py
+
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence
+import importlib.util
+import json
+
+from fastapi.responses import JSONResponse, Response
+
+# Optional: orjson decodes provider pages and encodes API rows several times faster than
+# the stdlib; everything below falls back to 'json' with the same output when it is missing.
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+if ORJSON_AVAILABLE:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+
+    # 'Z' for UTC, like pydantic's JSON output
+    _ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+# Default response class of the app: used for every route that doesn't return bytes itself
+DefaultJSONResponse = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def loads(data) -> Any:
+    """Decodes JSON from bytes/str (a provider response body or an archived payload)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value) -> bytes:
+    """Compact JSON bytes; datetimes as ISO-8601 with 'Z' for UTC."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=_ORJSON_OPTIONS)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def rows_to_json(rows: Iterable, fields: Sequence[str], exclude_none: bool = False) -> bytes:
+    """
+    Serializes rows (ORM instances or Core rows) straight to a JSON array of objects with
+    the given fields, skipping per-row pydantic models and the second encoding pass.
+    """
+    if exclude_none:
+        records = [
+            {field: value for field in fields if (value := getattr(row, field)) is not None}
+            for row in rows
+        ]
+    else:
+        records = [{field: getattr(row, field) for field in fields} for row in rows]
+    return dumps(records)
+
+
+class RawJSONResponse(Response):
+    """Response for a body that is already encoded JSON bytes."""
+    media_type = "application/json"
@@ -1,34 +1,43 @@
 # services/stats_service.py
 
 from sqlalchemy.orm import Session
-from typing import List, Dict
-# Note: You may also need 'from datetime import datetime' if you use datetime.now() here
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List
 
-# ... any other imports (e.g., db.models)
+from models.etl_models import ETLRunSummary
+from schemas.stats import StatsResponse
 
-def get_etl_summary(db: Session) -> List[Dict]:
+# One row per source: the running totals maintained by database_service.record_etl_run()
+SUMMARY_QUERY = select(ETLRunSummary.__table__).order_by(ETLRunSummary.source_name)
+
+
+def _to_stats(row) -> StatsResponse:
+    runs = row.total_runs or 0
+    seconds = (row.total_duration_ms or 0) / 1000
+    return StatsResponse(
+        source_name=row.source_name,
+        last_successful_run=row.last_successful_run,
+        last_failed_run=row.last_failed_run,
+        total_records_processed=row.total_rows_written,
+        avg_run_duration_seconds=round(seconds / runs, 3) if runs else 0.0,
+        success_rate=round(row.successful_runs / runs, 4) if runs else 0.0,
+        total_runs=runs,
+        last_run_status=row.last_run_status,
+        total_rows_skipped=row.total_rows_skipped,
+        total_bytes_fetched=row.total_bytes_fetched,
+        avg_rows_per_second=round(row.total_rows_written / seconds, 1) if seconds > 0 else None,
+    )
+
+
+def get_etl_summary(db: Session) -> List[StatsResponse]:
     """
-    Retrieves the summary statistics for the ETL pipeline.
-    
-    db: The SQLAlchemy session dependency.
+    Retrieves the summary statistics for the ETL pipeline (avg duration, success rate,
+    throughput per source). Reads the precomputed totals: O(sources), not O(runs).
     """
-    
-    # ------------------------------------------------------------------------
-    # FIX: Updated TEMPORARY Mock Data (Add the missing fields)
-    # ------------------------------------------------------------------------
-    mock_data = [
-        {
-            "source_name": "CoinPaprika", 
-            "last_successful_run": "2025-12-10T10:00:00Z", 
-            "total_records_processed": 1500,
-            # ADD THESE TWO MISSING FIELDS:
-            "avg_run_duration_seconds": 35.5, # Mock duration
-            "success_rate": 0.999 # Mock rate (99.9%)
-        },
-        # You might have another entry for CoinGecko if your original code had it
-    ]
-    
-    # ------------------------------------------------------------------------
-    
-    # REMINDER: Replace this mock data with your actual SQLAlchemy query later.
-    return mock_data
\ No newline at end of file
+    return [_to_stats(row) for row in db.execute(SUMMARY_QUERY).all()]
+
+
+async def get_etl_summary_async(db: AsyncSession) -> List[StatsResponse]:
+    """Async variant of get_etl_summary()."""
+    return [_to_stats(row) for row in (await db.execute(SUMMARY_QUERY)).all()]
@@ -0,0 +1,93 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from ingestion.etl_main import _parse_args
+from services import archive_service
+from services.archive_service import FILE_MAGIC, FRAME_HEADER, ArchiveWriter, iter_archive, iter_segment
+
+
+@pytest.fixture(autouse=True)
+def zlib_codec(monkeypatch):
+    monkeypatch.setattr(archive_service.settings, "ARCHIVE_CODEC", "zlib")
+
+
+def write_segment(root, frames):
+    writer = ArchiveWriter("coingecko", root=str(root))
+    for fetched_at, payload in frames:
+        writer.append(payload, fetched_at)
+    writer.close()
+    return writer.path
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_frames_round_trip(tmp_path):
+    frames = [(utc(2024, 1, 1, 12), b'[{"id": "bitcoin"}]'), (utc(2024, 1, 2), b"[]")]
+    path = write_segment(tmp_path, frames)
+    assert list(iter_segment(path)) == frames
+
+
+def test_truncated_frame_is_dropped(tmp_path):
+    path = write_segment(tmp_path, [(utc(2024, 1, 1), b"first"), (utc(2024, 1, 2), b"second")])
+    os.truncate(path, os.path.getsize(path) - 2)
+    assert [payload for _, payload in iter_segment(path)] == [b"first"]
+
+
+def test_checksum_mismatch_skips_only_that_frame(tmp_path):
+    path = write_segment(tmp_path, [(utc(2024, 1, 1), b"first"), (utc(2024, 1, 2), b"second")])
+    with open(path, "r+b") as file:
+        data = bytearray(file.read())
+        # crc32 field of the first frame
+        crc_offset = len(FILE_MAGIC) + FRAME_HEADER.size - 8
+        data[crc_offset] ^= 0xFF
+        file.seek(0)
+        file.write(data)
+    assert [payload for _, payload in iter_segment(path)] == [b"second"]
+
+
+def test_corrupt_payload_skips_only_that_frame(tmp_path):
+    frames = [(utc(2024, 1, 1), b"first" * 50), (utc(2024, 1, 2), b"second"), (utc(2024, 1, 3), b"third")]
+    path = write_segment(tmp_path, frames)
+    with open(path, "r+b") as file:
+        data = bytearray(file.read())
+        # zlib header byte of the first frame's compressed payload
+        data[len(FILE_MAGIC) + FRAME_HEADER.size] ^= 0xFF
+        file.seek(0)
+        file.write(data)
+    assert [payload for _, payload in iter_segment(path)] == [b"second", b"third"]
+
+
+def test_not_a_segment(tmp_path):
+    path = tmp_path / "bogus.seg"
+    path.write_bytes(b"something else entirely")
+    with pytest.raises(ValueError):
+        list(iter_segment(str(path)))
+
+
+def test_date_only_since_filters_aware_frames(tmp_path):
+    write_segment(tmp_path, [(utc(2023, 12, 31, 23), b"old"), (utc(2024, 1, 1, 0, 30), b"new")])
+    args = _parse_args(["--replay", "--since", "2024-01-01"])
+    assert args.since == utc(2024, 1, 1)
+    assert [payload for _, payload in iter_archive("coingecko", args.since, root=str(tmp_path))] == [b"new"]
+    naive = datetime(2024, 1, 1)
+    assert [payload for _, payload in iter_archive("coingecko", until=naive, root=str(tmp_path))] == [b"old"]
+
+
+def test_prune_by_age_and_size_keeps_newest(tmp_path):
+    paths = [write_segment(tmp_path, [(utc(2024, 1, day), b"x" * 1000)]) for day in (1, 2, 3, 4)]
+    # Distinct creation stamps order the segments; make the first one old
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()
+    os.utime(paths[0], (old, old))
+    sizes = os.path.getsize(paths[1])
+
+    deleted = archive_service.prune_archive("coingecko", max_age_days=7, max_bytes=2 * sizes, root=str(tmp_path))
+    assert deleted == paths[:2]
+    assert archive_service.list_segments("coingecko", str(tmp_path)) == paths[2:]
+
+    # Whatever the budget, the newest segment stays
+    archive_service.prune_archive("coingecko", max_age_days=0, max_bytes=1, root=str(tmp_path))
+    assert archive_service.list_segments("coingecko", str(tmp_path)) == paths[3:]
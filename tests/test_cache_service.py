@@ -0,0 +1,56 @@
+from services import cache_service
+from services.cache_service import MISSING, ResponseCache, make_cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(monkeypatch, max_entries=3, ttl_seconds=10.0):
+    clock = Clock()
+    monkeypatch.setattr(cache_service.time, "monotonic", clock)
+    return ResponseCache(max_entries=max_entries, ttl_seconds=ttl_seconds, generation_poll_seconds=5.0), clock
+
+
+def test_least_recently_used_entry_is_evicted_first(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == "A"
+    cache.set("d", "D")
+    assert cache.get("b") is MISSING
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["A", "C", "D"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl_seconds=1.0)
+    clock.now += 1.0
+    assert cache.get("short") is MISSING
+    assert cache.get("default") == 1
+    clock.now += 9.0
+    assert cache.get("default") is MISSING
+    assert cache.stats()["entries"] == 0
+
+
+def test_generation_bump_invalidates_everything(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+    cache.observe_generation(7)
+    cache.set(make_cache_key("coins", symbol="btc"), ["BTC"])
+    # Same remote generation: entries survive
+    cache.observe_generation(7)
+    assert cache.get(make_cache_key("coins", symbol=" btc ")) == ["BTC"]
+    # Another process committed new data
+    cache.observe_generation(8)
+    assert cache.get(make_cache_key("coins", symbol="btc")) is MISSING
+    assert (cache.generation, cache.data_generation, cache.stats()["invalidations"]) == (1, 8, 1)
+    assert not cache.needs_generation_check()
+    clock.now += 5.0
+    assert cache.needs_generation_check()
@@ -0,0 +1,140 @@
+import csv
+import io
+import math
+from datetime import datetime, timezone
+
+import pytest
+
+from services import columnar_service
+from services.columnar_service import ColumnBatch, float_column, parse_timestamp, timestamp_column
+from services.database_service import COPY_NULL, _csv_buffer, append_price_history, ensure_history_partitions
+
+VALUES = [1, "2.5", None, float("nan"), float("inf"), "n/a", {"x": 1}, -3.0]
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def numpy_mode(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(columnar_service, "_NUMPY_AVAILABLE", False)
+    return request.param
+
+
+def test_float_column_with_fill(numpy_mode):
+    assert float_column(VALUES, fill=0.0) == [1.0, 2.5, 0.0, 0.0, 0.0, 0.0, 0.0, -3.0]
+
+
+def test_float_column_without_fill(numpy_mode):
+    assert float_column(VALUES) == [1.0, 2.5, None, None, None, None, None, -3.0]
+
+
+def test_float_column_clean_fast_path(numpy_mode):
+    result = float_column([1, 2, 3.5])
+    assert result == [1.0, 2.0, 3.5] and all(isinstance(value, float) for value in result)
+    assert float_column([]) == []
+    assert not any(isinstance(value, float) and math.isnan(value) for value in float_column([None]))
+
+
+def test_timestamps():
+    assert parse_timestamp("2024-05-01T12:00:00.000Z") == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    assert parse_timestamp("2024-05-01") == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert timestamp_column(["2024-05-01T12:00:00Z", "yesterday", None]) == ["2024-05-01T12:00:00Z", None, None]
+
+
+def test_batch_take_and_concat():
+    batch = ColumnBatch({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    assert batch.take([2, 0]).columns == {"a": [3, 1], "b": ["z", "x"]}
+    merged = ColumnBatch.concat([batch.take([0]), ColumnBatch({"a": [9]})])
+    assert merged.columns == {"a": [1, 9], "b": ["x", None]} and len(merged) == 2
+
+
+class RecordingCursor:
+    def __init__(self, existing_partitions=()):
+        self.statements, self.copied = [], []
+        self.existing_partitions = list(existing_partitions)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def fetchall(self):
+        return [(name,) for name in self.existing_partitions]
+
+    def fetchone(self):
+        return (1,)  # rows appended by the history insert
+
+    def copy_expert(self, sql, buffer):
+        self.copied.append(buffer.read())
+
+
+class RecordingSession:
+    def __init__(self):
+        self.cursor = RecordingCursor()
+
+    def connection(self):
+        session = self
+
+        class Connection:
+            connection = type("Raw", (), {"cursor": lambda _: session.cursor})()
+        return Connection
+
+
+def test_price_history_is_staged_column_wise():
+    batch = ColumnBatch({
+        "source_record_id": ["bitcoin"], "source_name": ["coingecko"], "symbol": ["BTC"],
+        "current_price_usd": [65000.5], "market_cap_usd": [1.2e12], "volume_24h_usd": [None],
+        "last_updated_at": ["2024-05-01T12:00:00.000Z"],
+    })
+    session = RecordingSession()
+    assert append_price_history(session, batch) == 1
+    assert session.cursor.copied == ["bitcoin,coingecko,BTC,2024-05-01T12:00:00+00:00,65000.5,1200000000000.0,\\N\r\n"]
+    assert any("price_history_p2024_05 PARTITION OF" in sql for sql in session.cursor.statements)
+
+
+def test_columnar_csv_matches_csv_writer():
+    columns = {
+        "plain": ["bitcoin", "", None, "\\N"],
+        "quoted": ['has "quotes"', "a,b", "two\nlines", "cr\rhere"],
+        "numbers": [65000.5, 1e-07, None, 12345678901234],
+    }
+    batch = ColumnBatch(columns)
+    expected = io.StringIO()
+    writer = csv.writer(expected)
+    for values in batch.tuples(list(columns)):
+        writer.writerow([COPY_NULL if value is None else value for value in values])
+    assert _csv_buffer(batch, list(columns)).getvalue() == expected.getvalue()
+
+
+def test_timestamp_column_keeps_valid_text_only():
+    moment = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    values = ["2024-05-01T12:00:00.000Z", "2024-05-01", moment, "", "soon", 1714564800, None]
+    assert timestamp_column(values) == ["2024-05-01T12:00:00.000Z", "2024-05-01", moment, None, None, None, None]
+
+
+def created_partitions(cursor):
+    return [sql.split()[5] for sql in cursor.statements if sql.startswith("CREATE TABLE")]
+
+
+def test_partitions_are_created_under_a_lock_with_next_month_ahead():
+    cursor = RecordingCursor()
+    now = datetime.now(timezone.utc)
+    next_month = datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+    ensure_history_partitions(cursor, [datetime(2024, 5, 31, 23, tzinfo=timezone.utc)])
+    lock = next(i for i, sql in enumerate(cursor.statements) if "pg_advisory_xact_lock" in sql)
+    assert lock < cursor.statements.index(next(sql for sql in cursor.statements if sql.startswith("CREATE TABLE")))
+    assert created_partitions(cursor) == ["price_history_p2024_05", f"price_history_p{next_month:%Y_%m}"]
+
+
+def test_existing_partitions_take_no_lock():
+    now = datetime.now(timezone.utc)
+    next_month = datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+    cursor = RecordingCursor(["price_history_p2024_05", f"price_history_p{next_month:%Y_%m}"])
+    ensure_history_partitions(cursor, [datetime(2024, 5, 1, tzinfo=timezone.utc)])
+    assert not any("pg_advisory_xact_lock" in sql for sql in cursor.statements)
+    assert created_partitions(cursor) == []
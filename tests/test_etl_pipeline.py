@@ -0,0 +1,120 @@
+import asyncio
+
+from ingestion import etl_main
+from ingestion.etl_main import _DONE, PipelineStats, _load
+from services.columnar_service import ColumnBatch
+
+
+def staged(source_names):
+    return ColumnBatch({
+        "source_record_id": [f"coin-{i}" for i in range(len(source_names))],
+        "source_name": list(source_names),
+        "symbol": ["BTC"] * len(source_names),
+    })
+
+
+def run_load(monkeypatch, batches, written_by_source):
+    monkeypatch.setattr(
+        etl_main, "_flush",
+        lambda batch: {"rows": sum(written_by_source.values()), "rows_by_source": written_by_source},
+    )
+
+    async def main():
+        queue = asyncio.Queue()
+        stats = PipelineStats()
+        for batch in batches:
+            await queue.put(batch)
+        await queue.put(_DONE)
+        await _load(queue, stats, batch_size=10_000)
+        return stats
+
+    return asyncio.run(main())
+
+
+def test_rows_loaded_counts_written_rows_not_staged_rows(monkeypatch):
+    # 4 staged rows, but the newer-only guard let only one coinpaprika row through
+    stats = run_load(monkeypatch, [staged(["coingecko", "coingecko", "coinpaprika", "coinpaprika"])], {"coinpaprika": 1})
+    assert stats.rows_loaded["coingecko"] == 0
+    assert stats.rows_loaded["coinpaprika"] == 1
+    assert stats.summary()["stages"]["load"]["rows"] == 1
+
+
+def test_load_time_is_split_between_sources_by_staged_rows(monkeypatch):
+    stats = run_load(monkeypatch, [staged(["coingecko"] * 3 + ["coinpaprika"])], {"coingecko": 3, "coinpaprika": 1})
+    gecko, paprika = stats.source_stages("coingecko")["load"], stats.source_stages("coinpaprika")["load"]
+    assert (gecko["rows"], paprika["rows"]) == (3, 1)
+    total = stats.summary()["stages"]["load"]["seconds"]
+    assert abs(gecko["seconds"] + paprika["seconds"] - total) < 0.01
+
+
+def test_checkpoints_use_each_sources_own_times(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    run_start = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    stats = PipelineStats()
+    stats.started_at = {"coingecko": run_start, "coinpaprika": run_start + timedelta(seconds=1)}
+    stats.ended_at = {"coingecko": run_start + timedelta(seconds=30), "coinpaprika": run_start + timedelta(seconds=3)}
+    stats.record_source("coingecko", "extract", 25.0, 5000)
+    stats.ended_at["coingecko"] = run_start + timedelta(seconds=30)
+    stats.fail("coinpaprika", RuntimeError("HTTP 429"))
+
+    runs, checkpoints, commits = [], [], []
+    db = type("Db", (), {"close": lambda self: None, "commit": lambda self: commits.append("commit")})()
+    monkeypatch.setattr(etl_main, "SessionLocal", lambda: db)
+    # Run metadata alone is not new data: the generation (and every ETag) stays put
+    monkeypatch.setattr(etl_main, "commit_new_generation", lambda db: commits.append("generation"))
+    monkeypatch.setattr(etl_main, "upsert_checkpoint", lambda db, *args, **kwargs: checkpoints.append((args, kwargs)))
+    monkeypatch.setattr(etl_main, "record_etl_run", lambda db, *args, **kwargs: runs.append((args, kwargs)))
+
+    etl_main._write_checkpoints(stats, ["coingecko", "coinpaprika"], run_start, "run-1")
+
+    (gecko_args, gecko_kwargs), (paprika_args, paprika_kwargs) = runs
+    assert gecko_args[2:] == ("SUCCESS", run_start, run_start + timedelta(seconds=30))
+    assert gecko_kwargs["stage_timings"] == {"extract": {"seconds": 25.0, "rows": 5000, "rows_per_second": 200.0}}
+    assert paprika_args[2:] == ("FAILURE", run_start + timedelta(seconds=1), run_start + timedelta(seconds=3))
+    assert paprika_kwargs["stage_timings"] == {}
+    assert [args[3] for args, _ in checkpoints] == [30000, 2000]
+    assert commits == ["commit"]
+
+
+def test_transform_failure_does_not_stall_the_pipeline(monkeypatch):
+    good = ColumnBatch({
+        "source_record_id": ["bitcoin"], "source_name": ["coingecko"], "symbol": ["BTC"], "name": ["Bitcoin"],
+        "current_price_usd": [65000.0], "market_cap_usd": [1.2e12], "volume_24h_usd": [None],
+        "percent_change_24h": [None], "last_updated_at": [None],
+    })
+    bad = [{"source_record_id": "broken"}]  # a page the transform chokes on
+    flushed = []
+
+    real_to_batch = etl_main._to_batch
+
+    def to_batch(page):
+        if page is bad:
+            raise ValueError("malformed page")
+        return real_to_batch(page)
+
+    async def pages(source_name):
+        # More pages than the queues hold: a stalled transform would block this producer
+        for _ in range(3):
+            yield bad
+        for _ in range(3):
+            yield good
+
+    monkeypatch.setattr(etl_main.settings, "ETL_QUEUE_MAXSIZE", 1)
+    monkeypatch.setattr(etl_main, "_to_batch", to_batch)
+    monkeypatch.setattr(etl_main, "ensure_schema", lambda: None)
+    monkeypatch.setattr(etl_main, "_load_incremental_state", lambda names: ({}, {}))
+
+    def flush(batch):
+        flushed.append(len(batch))
+        return {"rows": len(batch), "rows_by_source": {"coingecko": len(batch)}}
+
+    monkeypatch.setattr(etl_main, "_flush", flush)
+    monkeypatch.setattr(etl_main, "_consolidate", lambda symbols: 0)
+    monkeypatch.setattr(etl_main, "_write_checkpoints", lambda *args: None)
+
+    summary = asyncio.run(asyncio.wait_for(
+        etl_main.run_etl_pipeline({"coingecko": lambda: pages("coingecko")}), timeout=10
+    ))
+    assert summary["failed_sources"] == ["coingecko"]
+    assert sum(flushed) == 3
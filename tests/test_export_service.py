@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from services.export_service import EXPORT_FIELDS, make_encoder
+
+ROWS = [
+    ("bitcoin", "coingecko", "BTC", "Bitcoin", 65000.5, 1.28e12, 3.1e10, -1.25,
+     datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)),
+    # Providers leave numerics and timestamps out for thin listings
+    ("obscure", "coinpaprika", "OBS", "Obscure", None, None, None, None, None),
+]
+
+
+def encode(fmt, partitions):
+    encoder = make_encoder(fmt)
+    return encoder.header() + b"".join(encoder.encode(rows) for rows in partitions) + encoder.finish()
+
+
+def test_ndjson_round_trip():
+    lines = encode("ndjson", [ROWS[:1], ROWS[1:]]).decode().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [list(record) for record in records] == [list(EXPORT_FIELDS)] * 2
+    assert records[0]["current_price_usd"] == 65000.5
+    assert records[0]["last_updated_at"] == "2024-05-01T12:30:00Z"
+    assert records[1] == dict(zip(EXPORT_FIELDS, ROWS[1]))
+
+
+def test_csv_round_trip():
+    data = encode("csv", [ROWS[:1], ROWS[1:]]).decode()
+    header, first, second = csv.reader(io.StringIO(data))
+    assert tuple(header) == EXPORT_FIELDS
+    assert [float(value) for value in first[4:8]] == [65000.5, 1.28e12, 3.1e10, -1.25]
+    assert datetime.fromisoformat(first[8]) == ROWS[0][8]
+    # NULLs become empty fields
+    assert second == ["obscure", "coinpaprika", "OBS", "Obscure", "", "", "", "", ""]
+
+
+def test_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(encode("parquet", [ROWS[:1], ROWS[1:]])))
+    assert tuple(table.column_names) == EXPORT_FIELDS
+    assert table.num_rows == 2
+    assert [tuple(row.values()) for row in table.to_pylist()] == ROWS
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv", "parquet"])
+def test_empty_result_set(fmt):
+    if fmt == "parquet":
+        pq = pytest.importorskip("pyarrow.parquet")
+    data = encode(fmt, [])
+    if fmt == "ndjson":
+        assert data == b""
+    elif fmt == "csv":
+        assert list(csv.reader(io.StringIO(data.decode()))) == [list(EXPORT_FIELDS)]
+    else:
+        table = pq.read_table(io.BytesIO(data))
+        assert (tuple(table.column_names), table.num_rows) == (EXPORT_FIELDS, 0)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        make_encoder("xlsx")
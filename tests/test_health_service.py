@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+
+from core.config import settings
+from core.db import Base
+from models.etl_models import ETLRunSummary
+from services import health_service
+from services.health_service import HealthMonitor, stale_after_seconds
+
+
+@pytest.fixture
+def intervals(monkeypatch):
+    monkeypatch.setattr(settings, "ETL_STALE_AFTER_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "COINGECKO_INTERVAL_SECONDS", 60.0)
+    monkeypatch.setattr(settings, "COINPAPRIKA_INTERVAL_SECONDS", 300.0)
+    monkeypatch.setattr(settings, "ETL_JITTER_SECONDS", 5.0)
+
+
+def test_stale_after_follows_each_source_interval(intervals):
+    assert stale_after_seconds("coingecko") == 185.0
+    assert stale_after_seconds("coinpaprika") == 905.0
+
+
+def test_explicit_stale_after_wins(intervals, monkeypatch):
+    monkeypatch.setattr(settings, "ETL_STALE_AFTER_SECONDS", 7200.0)
+    assert stale_after_seconds("coingecko") == 7200.0
+
+
+def monitor_with(summaries, pools, monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'health.db'}")
+    Base.metadata.create_all(engine, tables=[ETLRunSummary.__table__])
+    with engine.begin() as connection:
+        for row in summaries:
+            connection.execute(ETLRunSummary.__table__.insert().values(**row))
+    monkeypatch.setattr(health_service, "pool_status", lambda: pools)
+    monitor = HealthMonitor()
+    monitor._engine = engine
+    return monitor
+
+
+def test_etl_older_than_two_missed_runs_is_stale(intervals, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "READINESS_REQUIRE_FRESH_ETL", True)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    monitor = monitor_with(
+        [
+            {"source_name": "coingecko", "last_run_status": "SUCCESS", "last_successful_run": now - timedelta(minutes=10)},
+            {"source_name": "coinpaprika", "last_run_status": "SUCCESS", "last_successful_run": now - timedelta(minutes=10)},
+        ],
+        {"sync": {"checkedout": 0}, "max_connections": 30},
+        monkeypatch, tmp_path,
+    )
+    snapshot = monitor.refresh()
+    assert snapshot["etl"]["coingecko"]["stale"] and not snapshot["etl"]["coinpaprika"]["stale"]
+    assert snapshot["reasons"] == ["ETL data for coingecko is stale"]
+
+
+def test_async_pool_exhaustion_fails_readiness(monkeypatch, tmp_path):
+    monitor = monitor_with(
+        [], {"sync": {"checkedout": 0}, "async": {"checkedout": 30}, "max_connections": 30}, monkeypatch, tmp_path,
+    )
+    snapshot = monitor.refresh()
+    assert not snapshot["ready"]
+    assert snapshot["reasons"] == ["async connection pool exhausted"]
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.history_service import _candles_query, bucket_start, choose_resolution
+
+UTC = timezone.utc
+
+
+@pytest.mark.parametrize("resolution, expected", [
+    ("1m", datetime(2024, 5, 1, 13, 47, tzinfo=UTC)),
+    ("1h", datetime(2024, 5, 1, 13, tzinfo=UTC)),
+    ("1d", datetime(2024, 5, 1, tzinfo=UTC)),
+])
+def test_bucket_start(resolution, expected):
+    assert bucket_start(datetime(2024, 5, 1, 13, 47, 31, 500, tzinfo=UTC), resolution) == expected
+
+
+def test_bucket_start_is_utc():
+    cest = timezone(timedelta(hours=2))
+    assert bucket_start(datetime(2024, 5, 2, 1, 30, tzinfo=cest), "1d") == datetime(2024, 5, 1, tzinfo=UTC)
+
+
+def test_candles_query_includes_the_bucket_containing_start():
+    start = datetime(2024, 5, 1, 13, 47, tzinfo=UTC)
+    query = _candles_query("bitcoin", "coingecko", "1h", start, start + timedelta(hours=5))
+    params = query.compile().params
+    assert datetime(2024, 5, 1, 13, tzinfo=UTC) in params.values()
+
+
+def test_choose_resolution():
+    start = datetime(2024, 5, 1, tzinfo=UTC)
+    assert choose_resolution(start, start + timedelta(hours=6)) == "1m"
+    assert choose_resolution(start, start + timedelta(days=7)) == "1h"
+    assert choose_resolution(start, start + timedelta(days=90)) == "1d"
@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from services import http_cache
+from services.cache_service import ResponseCache
+from services.http_cache import is_not_modified, validators
+
+
+def request_with(**headers):
+    return SimpleNamespace(headers={name.replace("_", "-"): value for name, value in headers.items()})
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, generation_poll_seconds=5)
+    monkeypatch.setattr(http_cache, "response_cache", cache)
+    return cache
+
+
+def test_validators_come_from_the_stored_generation(cache):
+    cache.observe_generation(42, datetime(2026, 10, 1, 12, 30, 15, 999, tzinfo=timezone.utc))
+    headers = validators("market-data")
+    assert headers["ETag"] == 'W/"market-data-42"'
+    assert headers["Last-Modified"] == "Thu, 01 Oct 2026 12:30:15 GMT"
+
+
+def test_replicas_agree_on_validators(monkeypatch):
+    seen = []
+    for _ in range(2):  # separate processes: different local generation counters and start times
+        cache = ResponseCache(max_entries=10, ttl_seconds=60, generation_poll_seconds=5)
+        cache.generation_seen_at -= len(seen) * 3600
+        cache.observe_generation(7, datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc))
+        monkeypatch.setattr(http_cache, "response_cache", cache)
+        seen.append(validators("api-data"))
+    assert seen[0] == seen[1]
+
+
+def test_naive_commit_time_is_utc(cache):
+    cache.observe_generation(1, datetime(2026, 10, 1, 12, 0))
+    assert validators("stats")["Last-Modified"] == "Thu, 01 Oct 2026 12:00:00 GMT"
+
+
+def test_without_shared_generation_falls_back_to_process_state(cache):
+    cache.observe_generation(None)
+    headers = validators("stats")
+    assert headers["ETag"].startswith('W/"stats-') and headers["ETag"].endswith(f'.{cache.generation}"')
+    assert headers["Last-Modified"].endswith("GMT")
+
+
+HEADERS = {"ETag": 'W/"api-data-42"', "Last-Modified": "Thu, 01 Oct 2026 12:30:15 GMT"}
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    ('W/"api-data-42"', True),
+    ('"api-data-42"', True),  # weak comparison ignores W/
+    ('W/"api-data-41", W/"api-data-42"', True),
+    ("*", True),
+    ('W/"api-data-41"', False),
+    ('W/"market-data-42"', False),
+])
+def test_if_none_match(if_none_match, expected):
+    assert is_not_modified(request_with(if_none_match=if_none_match), HEADERS) is expected
+
+
+@pytest.mark.parametrize("if_modified_since, expected", [
+    ("Thu, 01 Oct 2026 12:30:15 GMT", True),
+    ("Thu, 01 Oct 2026 13:00:00 GMT", True),
+    ("Thu, 01 Oct 2026 12:30:14 GMT", False),
+    ("not a date", False),
+])
+def test_if_modified_since(if_modified_since, expected):
+    assert is_not_modified(request_with(if_modified_since=if_modified_since), HEADERS) is expected
+
+
+def test_if_none_match_wins_over_if_modified_since():
+    request = request_with(if_none_match='W/"api-data-41"', if_modified_since="Thu, 01 Oct 2026 13:00:00 GMT")
+    assert not is_not_modified(request, HEADERS)
+
+
+def test_no_conditional_headers():
+    assert not is_not_modified(request_with(), HEADERS)
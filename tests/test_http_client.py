@@ -0,0 +1,37 @@
+import asyncio
+import gc
+
+from services import http_client
+from services.http_client import close_http_clients, get_http_client, get_source_config
+
+
+def test_backoff_is_per_source(monkeypatch):
+    monkeypatch.setattr(http_client.settings, "FETCH_BACKOFF_BASE_SECONDS", 1.0)
+    monkeypatch.setattr(http_client.settings, "COINGECKO_BACKOFF_BASE_SECONDS", 5.0)
+    monkeypatch.setattr(http_client.settings, "COINPAPRIKA_BACKOFF_BASE_SECONDS", 0.5)
+    assert get_source_config("coingecko")["backoff_base_seconds"] == 5.0
+    assert get_source_config("coinpaprika")["backoff_base_seconds"] == 0.5
+    assert get_source_config("newsource")["backoff_base_seconds"] == 1.0
+
+
+def test_client_is_shared_within_a_loop_and_closed_on_shutdown():
+    async def main():
+        first = get_http_client("coingecko")
+        assert get_http_client("coingecko") is first
+        assert get_http_client("coinpaprika") is not first
+        await close_http_clients()
+        return first
+
+    client = asyncio.run(main())
+    assert client.is_closed
+
+
+def test_freed_loop_leaves_no_client_behind():
+    async def client_of_this_loop():
+        return get_http_client("coingecko")
+
+    # A closed loop's id() can be reused by the next loop; its entry must be gone with it
+    first = asyncio.run(client_of_this_loop())
+    gc.collect()
+    assert len(http_client._clients) == 0
+    assert asyncio.run(client_of_this_loop()) is not first
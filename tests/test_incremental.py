@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timezone
+
+from ingestion.etl_main import _DONE, PipelineStats, _transform
+from services.columnar_service import ColumnBatch
+from services.database_service import NORMALIZED_COLUMNS, content_hash, content_hashes
+
+ROWS = [
+    {
+        "source_record_id": "bitcoin", "source_name": "coingecko", "symbol": "BTC", "name": "Bitcoin",
+        "current_price_usd": 65000.5, "market_cap_usd": 1.2e12, "volume_24h_usd": None,
+        "percent_change_24h": -1.25, "last_updated_at": "2024-05-01T12:00:00.000Z",
+    },
+    {
+        "source_record_id": "ethereum", "source_name": "coingecko", "symbol": "ETH", "name": "Ethereum",
+        "current_price_usd": 3000.0, "market_cap_usd": 3.6e11, "volume_24h_usd": 1.5e10,
+        "percent_change_24h": None, "last_updated_at": "2024-05-01T12:00:00.000Z",
+    },
+]
+
+
+def batch(rows=ROWS):
+    return ColumnBatch.from_rows([dict(row) for row in rows], NORMALIZED_COLUMNS)
+
+
+def test_columnar_hashes_match_row_hashes():
+    assert content_hashes(batch()) == [content_hash(row) for row in ROWS]
+
+
+def test_hash_changes_with_any_loaded_value():
+    changed = dict(ROWS[0], current_price_usd=65000.75)
+    assert content_hash(changed) != content_hash(ROWS[0])
+    # Values outside HASHED_COLUMNS (the key) do not affect the digest
+    assert content_hash(dict(ROWS[0], source_record_id="other")) == content_hash(ROWS[0])
+
+
+def run_transform(page, stored):
+    async def main():
+        raw, out = asyncio.Queue(), asyncio.Queue()
+        stats = PipelineStats()
+        await raw.put(("coingecko", page))
+        await raw.put(_DONE)
+        await _transform(raw, out, stats, stored)
+        loaded = []
+        while not out.empty():
+            loaded.extend(out.get_nowait().column("source_record_id"))
+        return loaded, stats
+
+    return asyncio.run(main())
+
+
+def test_transform_skips_unchanged_and_older_rows():
+    newer = datetime(2024, 5, 2, tzinfo=timezone.utc)
+    stored = {
+        ("bitcoin", "coingecko"): (content_hash(ROWS[0]), None),   # unchanged
+        ("ethereum", "coingecko"): ("stale-digest", newer),       # stored copy is newer
+    }
+    loaded, stats = run_transform(batch(), stored)
+    assert loaded == []
+    assert stats.rows_skipped["coingecko"] == 2
+    assert stats.rows_stale["coingecko"] == 1
+    assert stats.watermarks["coingecko"] == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+
+
+def test_transform_passes_changed_rows():
+    older = datetime(2024, 4, 30, tzinfo=timezone.utc)
+    loaded, stats = run_transform(batch(), {("ethereum", "coingecko"): ("old-digest", older)})
+    assert loaded == ["bitcoin", "ethereum"]
+    assert stats.rows_skipped["coingecko"] == 0
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from core.db import SCHEMA_UPGRADES
+from services import database_service, http_cache
+from services.cache_service import ResponseCache
+from services.http_cache import validators
+
+
+class SqliteSession:
+    def __init__(self):
+        self.commits = 0
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(driver="pysqlite"))
+
+    def commit(self):
+        self.commits += 1
+
+
+ROW = {"source_record_id": "bitcoin", "source_name": "coingecko"}
+
+
+@pytest.mark.parametrize("written, bumped", [([], False), ([("bitcoin", "coingecko")], True)])
+def test_generation_moves_only_when_rows_were_written(monkeypatch, written, bumped):
+    generations = []
+    monkeypatch.setattr(database_service, "_insert_upsert", lambda *args, **kwargs: written)
+    monkeypatch.setattr(database_service, "commit_new_generation", lambda session: generations.append(session))
+    session = SqliteSession()
+
+    result = database_service.bulk_upsert_normalized_data(session, [ROW])
+    assert result["rows"] == len(written)
+    assert (generations == [session]) is bumped
+    assert session.commits == (0 if bumped else 1)
+
+
+def test_stats_validators_follow_recorded_runs(monkeypatch):
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, generation_poll_seconds=5)
+    monkeypatch.setattr(http_cache, "response_cache", cache)
+    data_at = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+    cache.observe_generation(7, data_at, datetime(2026, 10, 1, 12, 5, tzinfo=timezone.utc))
+    before = validators("api-stats", include_runs=True)
+    data_only = validators("api-data")
+
+    # A run that loaded nothing: same generation, newer run
+    cache.observe_generation(7, data_at, datetime(2026, 10, 1, 12, 10, tzinfo=timezone.utc))
+    after = validators("api-stats", include_runs=True)
+    assert after["ETag"] != before["ETag"]
+    assert after["Last-Modified"] == "Thu, 01 Oct 2026 12:10:00 GMT"
+    assert validators("api-data") == data_only
+
+
+def test_checkpoint_throughput_column_is_added_on_upgrade():
+    assert "ALTER TABLE etl_checkpoints ADD COLUMN IF NOT EXISTS rows_per_second double precision" in SCHEMA_UPGRADES
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import signal
+from types import SimpleNamespace
+
+from ingestion import etl_main
+from services.lock_service import AdvisoryLocks
+
+
+class FakeServer:
+    """Session advisory locks of one PostgreSQL server, shared by every fake connection."""
+
+    def __init__(self):
+        self.held = {}
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+
+    def execute(self, statement, params):
+        key = (params["namespace"], params["name"])
+        if "pg_try_advisory_lock" in str(statement):
+            acquired = self.server.held.setdefault(key, self) is self
+            return SimpleNamespace(scalar=lambda: acquired)
+        if self.server.held.get(key) is self:
+            del self.server.held[key]
+        return SimpleNamespace(scalar=lambda: True)
+
+    def commit(self):
+        pass
+
+    def invalidate(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def postgres_locks(server):
+    locks = AdvisoryLocks(namespace=7301)
+    locks._engine = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"), connect=lambda: FakeConnection(server), dispose=lambda: None
+    )
+    return locks
+
+
+def test_second_holder_is_refused_until_release():
+    server = FakeServer()
+    first, second = postgres_locks(server), postgres_locks(server)
+    assert first.acquire("etl:coingecko")
+    assert not second.acquire("etl:coingecko")
+    # Re-entry from the holding process is refused as well
+    assert not first.acquire("etl:coingecko")
+    assert second.acquire("etl:coinpaprika")
+
+    first.release("etl:coingecko")
+    assert second.acquire("etl:coingecko")
+    second.close()
+    assert server.held == {}
+
+
+class RecordingLocks:
+    def __init__(self):
+        self.held, self.released, self.closed = set(), [], False
+
+    def acquire(self, name):
+        if name in self.held:
+            return False
+        self.held.add(name)
+        return True
+
+    def release(self, name):
+        self.held.discard(name)
+        self.released.append(name)
+
+    def close(self):
+        self.closed = True
+
+
+def test_each_source_runs_on_its_own_interval_with_jitter(monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    jitter = {"coingecko": 0.5, "coinpaprika": 2.0}
+    current = {}
+    runs = []
+
+    async def wait_for(awaitable, timeout):
+        awaitable.close()
+        clock.now += timeout
+        raise asyncio.TimeoutError
+
+    def uniform(low, high):
+        assert (low, high) == (0, etl_main.settings.ETL_JITTER_SECONDS)
+        return jitter[current["name"]]
+
+    async def run_locked(sources, locks):
+        (name,) = sources
+        runs.append((name, clock.now))
+        if sum(run[0] == name for run in runs) == 3:
+            stopping[name].set()
+
+    monkeypatch.setattr(etl_main, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    monkeypatch.setattr(etl_main, "random", SimpleNamespace(uniform=uniform))
+    monkeypatch.setattr(asyncio, "wait_for", wait_for)
+    monkeypatch.setattr(etl_main, "run_locked", run_locked)
+
+    stopping = {}
+    for name, interval in (("coingecko", 60.0), ("coinpaprika", 300.0)):
+        clock.now, current["name"] = 0.0, name
+        stopping[name] = asyncio.Event()
+        asyncio.run(etl_main._schedule_source(name, None, interval, RecordingLocks(), stopping[name]))
+
+    assert [at for name, at in runs if name == "coingecko"] == [0.5, 61.0, 121.5]
+    assert [at for name, at in runs if name == "coinpaprika"] == [2.0, 304.0, 606.0]
+
+
+def test_lock_held_at_shutdown_is_released(monkeypatch):
+    locks = RecordingLocks()
+    started = []
+
+    async def pipeline(sources):
+        started.extend(sources)
+        await asyncio.sleep(3600)  # overruns the shutdown grace period
+
+    monkeypatch.setattr(etl_main, "AdvisoryLocks", lambda pool_size: locks)
+    monkeypatch.setattr(etl_main, "run_etl_pipeline", pipeline)
+    monkeypatch.setattr(etl_main.settings, "ETL_JITTER_SECONDS", 0)
+    monkeypatch.setattr(etl_main.settings, "ETL_SHUTDOWN_GRACE_SECONDS", 0.05)
+
+    async def main():
+        scheduler = asyncio.create_task(etl_main.run_scheduler({"coingecko": None}, {"coingecko": 60}))
+        while not started:
+            await asyncio.sleep(0.01)
+        assert locks.held == {"etl:coingecko"}
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(scheduler, timeout=5)
+
+    asyncio.run(main())
+    assert locks.held == set()
+    assert locks.released == ["etl:coingecko"]
+    assert locks.closed
@@ -0,0 +1,43 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from services.metrics_service import MetricsMiddleware
+
+METRIC = "http_request_duration_seconds"
+
+
+def samples(route):
+    return {
+        (sample.name, sample.labels.get("le"), sample.labels["status"]): sample.value
+        for family in REGISTRY.collect() if family.name == METRIC
+        for sample in family.samples if sample.labels.get("route") == route
+    }
+
+
+def requests_seen(route, status="200"):
+    return samples(route).get((f"{METRIC}_count", None, status), 0.0)
+
+
+def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/history/{symbol}")
+    def history(symbol: str):
+        return {"symbol": symbol}
+
+    template = "/metrics-test/history/{symbol}"
+    before, unmatched_before = requests_seen(template), requests_seen("unmatched", "404")
+    with TestClient(app) as client:
+        for symbol in ("BTC", "ETH", "DOGE"):
+            assert client.get(f"/metrics-test/history/{symbol}").status_code == 200
+        assert client.get("/metrics-test/nowhere").status_code == 404
+
+    # The count and every histogram bucket share the template label
+    assert requests_seen(template) - before == 3
+    assert samples(template)[(f"{METRIC}_bucket", "+Inf", "200")] >= 3
+    assert requests_seen("unmatched", "404") - unmatched_before == 1
+    # Raw paths never become label values
+    assert not any(samples(f"/metrics-test/history/{symbol}") for symbol in ("BTC", "ETH", "DOGE"))
+    assert not samples("/metrics-test/nowhere")
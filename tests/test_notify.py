@@ -0,0 +1,80 @@
+import json
+
+from models.etl_models import NormalizedMarketData
+from services.columnar_service import ColumnBatch
+from services.database_service import (
+    NORMALIZED_COLUMNS, NORMALIZED_KEY_COLUMNS, NORMALIZED_UPDATE_COLUMNS, NOTIFY_FIELDS,
+    copy_merge, notify_payloads, written_rows
+)
+
+
+def rows(count):
+    return [
+        (f"S{n}", "coingecko", f"coin-{n}", 1.5 * n, 1e9, None, -0.5, "2024-05-01T12:00:00.000Z")
+        for n in range(count)
+    ]
+
+
+def test_payloads_stay_under_the_limit_and_keep_every_row():
+    payloads = list(notify_payloads(rows(500), limit=1000))
+    assert len(payloads) > 1
+    assert all(len(payload.encode("utf-8")) < 1000 for payload in payloads)
+    decoded = [row for payload in payloads for row in json.loads(payload)]
+    assert [tuple(row) for row in decoded] == rows(500)
+    assert all(len(row) == len(NOTIFY_FIELDS) for row in decoded)
+
+
+def test_no_rows_no_payload():
+    assert list(notify_payloads([])) == []
+
+
+def test_written_rows_keeps_only_returned_keys():
+    batch = ColumnBatch({
+        "source_record_id": ["bitcoin", "ethereum", "bitcoin"],
+        "source_name": ["coingecko", "coingecko", "coinpaprika"],
+        "symbol": ["BTC", "ETH", "BTC"],
+    })
+    kept = written_rows(batch, [("bitcoin", "coinpaprika"), ("ethereum", "coingecko")])
+    assert kept.column("symbol") == ["ETH", "BTC"]
+    assert kept.column("source_name") == ["coingecko", "coinpaprika"]
+    assert len(written_rows(batch, [])) == 0
+
+
+class MergeCursor:
+    def __init__(self, returned):
+        self.returned, self.statements = returned, []
+        self.rowcount = len(returned)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    def copy_expert(self, sql, buffer):
+        pass
+
+    def fetchall(self):
+        return self.returned
+
+
+class MergeSession:
+    def __init__(self, cursor):
+        self.connection = lambda: type("Connection", (), {"connection": type("Raw", (), {"cursor": lambda _: cursor})()})
+
+
+def test_merge_returns_only_written_keys():
+    cursor = MergeCursor([("ethereum", "coingecko")])
+    batch = ColumnBatch({"source_record_id": ["bitcoin", "ethereum"], "source_name": ["coingecko"] * 2})
+    keys = copy_merge(
+        MergeSession(cursor), NormalizedMarketData.__table__, batch, NORMALIZED_COLUMNS,
+        NORMALIZED_KEY_COLUMNS, NORMALIZED_UPDATE_COLUMNS, newer_column="last_updated_at",
+        returning=NORMALIZED_KEY_COLUMNS,
+    )
+    assert keys == [("ethereum", "coingecko")]
+    merge = cursor.statements[-1]
+    assert "EXCLUDED.last_updated_at >= normalized_data.last_updated_at" in merge
+    assert merge.endswith("RETURNING source_record_id, source_name")
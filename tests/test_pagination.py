@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from services import crypto_service
+from services.crypto_service import decode_cursor, encode_cursor, estimate_total_count
+
+
+def test_cursor_round_trip():
+    row = SimpleNamespace(market_cap_usd=123456.5, source_record_id="bitcoin", source_name="coingecko")
+    assert decode_cursor(encode_cursor(row)) == (123456.5, "bitcoin", "coingecko")
+
+
+def test_cursor_is_url_safe_without_padding():
+    row = SimpleNamespace(market_cap_usd=1.0, source_record_id="a/b+c?", source_name="coinpaprika")
+    cursor = encode_cursor(row)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "W10", "eyJhIjogMX0"])  # garbage, [], {"a": 1}
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+class FakeSession:
+    """Answers the reltuples query with 'estimate' and COUNT(*) with 'exact'."""
+
+    def __init__(self, estimate, exact):
+        self.results = {"estimate": estimate, "exact": exact}
+        self.queries = []
+
+    def execute(self, statement):
+        kind = "estimate" if statement is crypto_service.ESTIMATE_TOTAL_SQL else "exact"
+        self.queries.append(kind)
+        return SimpleNamespace(scalar=lambda: self.results[kind])
+
+
+@pytest.fixture(autouse=True)
+def empty_estimate_cache(monkeypatch):
+    monkeypatch.setitem(crypto_service._total_estimate_cache, "value", None)
+    monkeypatch.setitem(crypto_service._total_estimate_cache, "expires_at", 0.0)
+
+
+@pytest.mark.parametrize("reltuples", [-1, None, 0, 500])
+def test_estimate_falls_back_to_exact_count(reltuples):
+    db = FakeSession(reltuples, 5972)
+    assert estimate_total_count(db) == 5972
+    assert db.queries == ["estimate", "exact"]
+
+
+def test_large_estimate_is_used_and_cached():
+    db = FakeSession(2_000_000, None)
+    assert estimate_total_count(db) == 2_000_000
+    assert estimate_total_count(db) == 2_000_000
+    assert db.queries == ["estimate"]
@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+import pytest
+
+from benchmarks.provider_stub import StubProvider, SyntheticMarket, stub_client
+from services import crypto_service
+from services.crypto_service import _get_json, _retry_delay, iter_coingecko_pages, iter_coinpaprika_pages
+
+MARKETS_URL = "http://stub/api/v3/coins/markets"
+TICKERS_URL = "http://stub/v1/tickers"
+
+
+def collect(pages):
+    async def main():
+        return [page async for page in pages]
+    return asyncio.run(main())
+
+
+class SleepLog(list):
+    on_sleep = None
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records retry sleeps instead of waiting; on_sleep hooks run before each one returns."""
+    recorded, hooks = SleepLog(), []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+        for hook in hooks:
+            hook()
+        await real_sleep(0)
+
+    monkeypatch.setattr(crypto_service.asyncio, "sleep", fake_sleep)
+    recorded.on_sleep = hooks.append
+    return recorded
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_coingecko_stops_at_the_short_page(concurrency):
+    provider = StubProvider(SyntheticMarket(coins=600))
+    pages = collect(iter_coingecko_pages(
+        stub_client(provider), MARKETS_URL, per_page=250, max_pages=20, concurrency=concurrency,
+    ))
+    assert [len(page) for page in sorted(pages, key=len, reverse=True)] == [250, 250, 100]
+    # Pages 1-3, plus at most the ones already in flight when page 3 came back short
+    assert 3 <= provider.requests <= 3 + concurrency - 1
+
+
+def test_coingecko_respects_max_pages():
+    provider = StubProvider(SyntheticMarket(coins=10_000))
+    pages = collect(iter_coingecko_pages(stub_client(provider), MARKETS_URL, per_page=100, max_pages=2, concurrency=1))
+    assert sum(len(page) for page in pages) == 200
+    assert provider.requests == 2
+
+
+@pytest.mark.parametrize("status, attribute", [(429, "rate_limit_fraction"), (503, "unavailable_fraction")])
+def test_retries_on_rate_limit_and_unavailable(sleeps, status, attribute):
+    provider = StubProvider(SyntheticMarket(coins=50), retry_after_seconds=2)
+    setattr(provider, attribute, 1.0)
+    # The provider recovers after the second retry
+    sleeps.on_sleep(lambda: len(sleeps) == 2 and setattr(provider, attribute, 0.0))
+
+    pages = collect(iter_coinpaprika_pages(stub_client(provider), TICKERS_URL))
+    assert sum(len(page) for page in pages) == 50
+    assert provider.responses[status] == 2 and provider.responses[200] == 1
+    assert sleeps == [2.0, 2.0]  # Retry-After, not the exponential backoff
+
+
+def test_gives_up_after_max_retries(sleeps, monkeypatch):
+    monkeypatch.setattr(crypto_service.settings, "COINPAPRIKA_MAX_RETRIES", 2)
+    provider = StubProvider(SyntheticMarket(coins=50), unavailable_fraction=1.0)
+
+    async def main():
+        return await _get_json(stub_client(provider), TICKERS_URL, {}, "coinpaprika")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(main())
+    assert provider.requests == 3 and len(sleeps) == 2
+
+
+def test_retry_after_is_capped(sleeps, monkeypatch):
+    monkeypatch.setattr(crypto_service.settings, "FETCH_MAX_RETRY_AFTER_SECONDS", 30.0)
+    provider = StubProvider(SyntheticMarket(coins=50), rate_limit_fraction=1.0, retry_after_seconds=86400)
+    sleeps.on_sleep(lambda: setattr(provider, "rate_limit_fraction", 0.0))
+
+    collect(iter_coinpaprika_pages(stub_client(provider), TICKERS_URL))
+    assert sleeps == [30.0]
+
+
+def test_backoff_without_retry_after_grows():
+    delays = [_retry_delay(None, attempt, 1.0) for attempt in range(3)]
+    assert 1.0 <= delays[0] <= 1.5 and 2.0 <= delays[1] <= 2.5 and 4.0 <= delays[2] <= 4.5
@@ -0,0 +1,76 @@
+import re
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from models.etl_models import ConsolidatedQuote
+from services.database_service import CONSOLIDATE_SQL, refresh_consolidated_quotes
+from services.quote_service import get_quote, get_quotes
+
+
+def normalized(sql):
+    return re.sub(r"\s+", " ", sql)
+
+
+def test_consolidation_picks_are_deterministic_on_ties():
+    sql = normalized(CONSOLIDATE_SQL)
+    # One coin per (symbol, source): the largest, equal market caps settled by source_record_id
+    assert "DISTINCT ON (symbol, source_name)" in sql
+    assert "ORDER BY symbol, source_name, market_cap_usd DESC, source_record_id" in sql
+    # Across sources the name comes from the largest market cap, equal ones settled by source_name
+    assert "array_agg(name ORDER BY market_cap_usd DESC, source_name))[1]" in sql
+    assert "string_agg(source_name, ',' ORDER BY source_name)" in sql
+
+
+class RecordingSession:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, statement, params=None):
+        self.executed.append((str(statement), params))
+        return SimpleNamespace(rowcount=len((params or {}).get("symbols", ())) or 7)
+
+
+def test_refresh_is_restricted_to_the_touched_symbols():
+    session = RecordingSession()
+    assert refresh_consolidated_quotes(session, ["ETH", "BTC", "ETH"]) == 2
+    (sql, params), = session.executed
+    assert "AND symbol IN" in sql
+    assert params == {"symbols": ["BTC", "ETH"]}
+
+    # Nothing touched: nothing to recompute
+    assert refresh_consolidated_quotes(session, []) == 0
+    assert len(session.executed) == 1
+
+    assert refresh_consolidated_quotes(session) == 7
+    assert "symbol IN" not in session.executed[-1][0]
+
+
+def quote(symbol, market_cap_usd, sources):
+    return ConsolidatedQuote(
+        symbol=symbol, name=symbol.title(), price_usd=1.0, min_price_usd=1.0, max_price_usd=1.0,
+        price_divergence_pct=0.0, market_cap_usd=market_cap_usd, volume_24h_usd=None,
+        source_count=len(sources.split(",")), sources=sources,
+    )
+
+
+def test_quotes_with_equal_market_caps_page_in_symbol_order(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'quotes.db'}")
+    ConsolidatedQuote.__table__.create(engine)
+    with Session(engine) as db:
+        db.add_all([
+            quote("ZZZ", 5e9, "coinpaprika"),
+            quote("BTC", 1.2e12, "coingecko,coinpaprika"),
+            quote("AAA", 5e9, "coingecko"),
+        ])
+        db.commit()
+
+        assert [q.symbol for q in get_quotes(db, limit=10, offset=0)] == ["BTC", "AAA", "ZZZ"]
+        # Pages never repeat or skip a tied row
+        assert [q.symbol for offset in range(3) for q in get_quotes(db, limit=1, offset=offset)] == ["BTC", "AAA", "ZZZ"]
+        assert [q.symbol for q in get_quotes(db, 10, 0, symbols=["ZZZ", "AAA"])] == ["AAA", "ZZZ"]
+
+        btc = get_quote(db, " btc ")
+        assert (btc.source_count, btc.sources) == (2, "coingecko,coinpaprika")
+        assert get_quote(db, "nope") is None
@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, inspect, text
+
+from core.db import INDEX_UPGRADES, SCHEMA_UPGRADES, upgrade_schema
+from models.etl_models import NormalizedMarketData
+
+
+class RecordingBind:
+    """Stands in for a PostgreSQL engine and records the SQL it is given."""
+
+    dialect = SimpleNamespace(name="postgresql")
+
+    def __init__(self, invalid=()):
+        self.statements = []
+        self.invalid = list(invalid)
+        self.autocommit = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def execution_options(self, isolation_level):
+        self.autocommit.append(isolation_level)
+        return self
+
+    def execute(self, statement, *args):
+        self.statements.append(str(statement))
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.invalid))
+
+
+def test_upgrades_are_idempotent_statements():
+    bind = RecordingBind()
+    upgrade_schema(bind)
+    assert bind.statements[:len(SCHEMA_UPGRADES)] == SCHEMA_UPGRADES
+    ddl = [statement for statement in bind.statements if not statement.startswith("SELECT")]
+    assert all("IF NOT EXISTS" in statement for statement in ddl)
+    assert bind.autocommit == ["AUTOCOMMIT"]
+
+
+def test_indexes_are_built_concurrently():
+    bind = RecordingBind()
+    upgrade_schema(bind)
+    for name, definition in INDEX_UPGRADES.items():
+        assert f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}" in bind.statements
+
+
+def test_invalid_index_is_dropped_before_rebuilding():
+    bind = RecordingBind(invalid=["ix_normalized_data_keyset"])
+    upgrade_schema(bind)
+    drop = bind.statements.index("DROP INDEX CONCURRENTLY IF EXISTS ix_normalized_data_keyset")
+    assert drop < bind.statements.index(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_normalized_data_keyset {INDEX_UPGRADES['ix_normalized_data_keyset']}"
+    )
+
+
+def test_upgraded_indexes_match_the_model():
+    indexes = {index.name: index for index in NormalizedMarketData.__table__.indexes}
+    for name, definition in INDEX_UPGRADES.items():
+        columns = [column.name for column in indexes[name].columns]
+        assert definition.startswith(f"ON normalized_data ({columns[0]}")
+        assert all(column in definition for column in columns)
+
+
+def test_upgrade_adds_content_hash():
+    assert "ALTER TABLE normalized_data ADD COLUMN IF NOT EXISTS content_hash varchar(32)" in SCHEMA_UPGRADES
+
+
+def test_other_dialects_are_left_alone(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE normalized_data (source_record_id varchar)"))
+    upgrade_schema(engine)
+    assert [column["name"] for column in inspect(engine).get_columns("normalized_data")] == ["source_record_id"]
+
+
+def test_prefix_index_keeps_its_operator_class():
+    assert INDEX_UPGRADES["ix_normalized_data_symbol_prefix"] == "ON normalized_data (symbol varchar_pattern_ops)"
@@ -0,0 +1,31 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.etl_models import NormalizedMarketData
+from services.crypto_service import _prefix_upper_bound, apply_symbol_filter
+
+
+def compiled(dialect, symbol, match):
+    query = apply_symbol_filter(select(NormalizedMarketData.symbol), symbol, None, match)
+    return str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def test_prefix_upper_bound():
+    assert _prefix_upper_bound("BT") == "BU"
+    assert _prefix_upper_bound("B9") == "B:"
+    assert _prefix_upper_bound("") is None
+
+
+def test_prefix_is_a_pattern_ops_range_on_postgresql():
+    sql = compiled(postgresql.dialect(), " bt ", "prefix")
+    assert "normalized_data.symbol ~>=~ 'BT' AND normalized_data.symbol ~<~ 'BU'" in sql
+    assert "LIKE" not in sql
+
+
+def test_prefix_wildcards_are_literal():
+    sql = compiled(sqlite.dialect(), "B%", "prefix")
+    assert "normalized_data.symbol >= 'B%' AND normalized_data.symbol < 'B&'" in sql
+
+
+def test_exact_match():
+    assert "normalized_data.symbol = 'BTC'" in compiled(postgresql.dialect(), "btc", "exact")